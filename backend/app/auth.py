@@ -10,8 +10,9 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_admin_db
 from app.models import AdminUser
+from app.services.principal_cache import principal_cache, AUTH_CACHE_TTL_SECONDS
 import os
 
 # Password hashing context
@@ -119,14 +120,42 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Adm
     return user
 
 
+def create_user_access_token(user: AdminUser) -> str:
+    """
+    Create a JWT access token for an admin user.
+    Embeds the user's token_version as "ver" so bumping it revokes the token.
+    
+    Args:
+        user: Authenticated admin user
+        
+    Returns:
+        Encoded JWT token string
+    """
+    return create_access_token(data={"sub": user.username, "ver": user.token_version or 0})
+
+
+_PRINCIPAL_FIELDS = (
+    "id", "username", "email", "is_active", "token_version", "created_at", "updated_at"
+)
+
+
+def _principal_from_user(user: AdminUser) -> dict:
+    """Column values of an AdminUser that are safe to cache (no password hash)."""
+    return {field: getattr(user, field) for field in _PRINCIPAL_FIELDS}
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_admin_db)
 ) -> AdminUser:
     """
     Dependency to get the current authenticated user from JWT token.
     Use this in protected routes to require authentication.
     
+    Verified principals are cached per token (see app/services/principal_cache.py),
+    so repeated requests with the same token skip JWT decoding and the database.
+    On a cache hit the returned AdminUser is a detached copy without password hash.
+    
     Args:
         credentials: HTTP Bearer token credentials
         db: Database session
@@ -149,6 +178,12 @@ async def get_current_user(
     )
     
     token = credentials.credentials
+    
+    if AUTH_CACHE_TTL_SECONDS > 0:
+        principal = principal_cache.get(token)
+        if principal is not None:
+            return AdminUser(**principal)
+    
     payload = decode_access_token(token)
     
     if payload is None:
@@ -158,16 +193,24 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     
+    generation = principal_cache.generation(username)
     user = db.query(AdminUser).filter(AdminUser.username == username).first()
     
     if user is None:
         raise credentials_exception
     
+    # Tokens issued before a password change or deactivation are revoked
+    if payload.get("ver", 0) != (user.token_version or 0):
+        raise credentials_exception
+    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
     
+    if AUTH_CACHE_TTL_SECONDS > 0:
+        principal_cache.put(token, _principal_from_user(user), payload["exp"], generation)
+    
     return user
 
@@ -1,24 +1,342 @@
 """
 Database configuration and connection management for BotDO.
+
+Each workload has its own connection pool on the primary (DATABASE_URL):
+bot (webhooks and /bot/process, get_db), admin (admin API, get_admin_db)
+and background (maintenance jobs, BackgroundSessionLocal). Read-only admin
+endpoints can use get_read_db, which routes SELECTs to the replicas in
+DATABASE_REPLICA_URL while their replication lag is under
+DATABASE_REPLICA_MAX_LAG_SECONDS, and to the admin pool otherwise.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, Insert, Update, Delete
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from typing import Any, Callable, Dict, List, Optional
+import itertools
+import logging
 import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 # Get database URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read replicas (comma separated)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+# Replicas lagging more than this are skipped in favour of the primary
+DATABASE_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "10"))
+# How long a replica's measured lag is trusted before measuring again
+DATABASE_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DATABASE_REPLICA_LAG_CHECK_SECONDS", "5"))
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,  # Number of connections to maintain
-    max_overflow=20,  # Maximum number of connections that can be created beyond pool_size
-)
+# Connection pools per workload, so a burst of admin queries or a long
+# background job can't take the connections the bot path needs. Each pool is
+# sized with DB_POOL_<NAME>_SIZE, DB_POOL_<NAME>_MAX_OVERFLOW and
+# DB_POOL_<NAME>_TIMEOUT_SECONDS (how long a checkout waits before failing).
+POOL_DEFAULTS = {
+    # name: (pool_size, max_overflow, checkout timeout seconds)
+    "bot": (10, 10, 5),
+    "admin": (5, 5, 10),
+    "background": (3, 2, 30),
+}
+# Connections the database allows this service (e.g. max_connections minus
+# superuser_reserved_connections); 0 disables the startup budget check
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+# Worker processes sharing that budget (uvicorn --workers)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Connections per worker held outside the pools (token revocation listener)
+DEDICATED_CONNECTIONS = 1
+
+# Pool name -> checkout counters (see MonitoredQueuePool)
+pool_counters: Dict[str, Dict[str, float]] = {}
+_pool_counters_lock = threading.Lock()
+# Called with (pool name, wait ms) after a checkout that had to wait
+pool_wait_hooks: List[Callable[[str, float], None]] = []
+
+
+def _new_counters() -> Dict[str, float]:
+    return {"checkouts": 0, "exhausted": 0, "timeouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+
+class MonitoredQueuePool(QueuePool):
+    """
+    QueuePool that counts checkouts, checkouts finding every connection in
+    use (exhausted), checkouts that gave up waiting (timeouts) and the time
+    spent waiting for a connection.
+    """
+
+    pool_name = "default"
+
+    def _record(self, exhausted: bool, timed_out: bool, wait_ms: float):
+        with _pool_counters_lock:
+            counters = pool_counters.setdefault(self.pool_name, _new_counters())
+            counters["checkouts"] += 1
+            counters["exhausted"] += exhausted
+            counters["timeouts"] += timed_out
+            counters["wait_ms_total"] += wait_ms
+            counters["wait_ms_max"] = max(counters["wait_ms_max"], wait_ms)
+
+    def _do_get(self):
+        exhausted = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self._record(exhausted, True, (time.perf_counter() - started) * 1000)
+            logger.error(f"❌ Pool de conexiones '{self.pool_name}' agotado: timeout esperando conexión")
+            raise
+        wait_ms = (time.perf_counter() - started) * 1000
+        self._record(exhausted, False, wait_ms)
+        if exhausted:
+            for hook in pool_wait_hooks:
+                hook(self.pool_name, wait_ms)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.pool_name = self.pool_name
+        return pool
+
+
+def _pool_setting(name: str, key: str, default):
+    return type(default)(os.getenv(f"DB_POOL_{name.upper()}_{key}", default))
+
+
+def pool_limits(name: str) -> Dict[str, float]:
+    """
+    Configured limits of a named pool.
+
+    Args:
+        name: Pool name (key of POOL_DEFAULTS)
+
+    Returns:
+        pool_size, max_overflow and timeout_seconds
+    """
+    size, overflow, timeout = POOL_DEFAULTS[name]
+    return {
+        "pool_size": _pool_setting(name, "SIZE", size),
+        "max_overflow": _pool_setting(name, "MAX_OVERFLOW", overflow),
+        "timeout_seconds": _pool_setting(name, "TIMEOUT_SECONDS", float(timeout)),
+    }
 
-# Create SessionLocal class for database sessions
+
+def _create_pool_engine(name: str):
+    limits = pool_limits(name)
+    pool_engine = create_engine(
+        DATABASE_URL,
+        poolclass=MonitoredQueuePool,
+        pool_pre_ping=True,  # Verify connections before using
+        pool_size=limits["pool_size"],  # Number of connections to maintain
+        max_overflow=limits["max_overflow"],  # Connections allowed beyond pool_size
+        pool_timeout=limits["timeout_seconds"],  # Wait for a free connection before failing
+    )
+    pool_engine.pool.pool_name = name
+    return pool_engine
+
+
+# One engine per workload, all on the primary
+engines = {name: _create_pool_engine(name) for name in POOL_DEFAULTS}
+
+# Bot-critical engine: webhooks, /bot/process, write-behind, warm-up
+engine = engines["bot"]
+
+# Create SessionLocal class for database sessions (bot path)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Admin API (CRUD, auth, stats)
+AdminSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engines["admin"])
+# Background jobs (partitions, archival, rollups)
+BackgroundSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engines["background"])
+
+
+def pool_status() -> Dict[str, Dict[str, Any]]:
+    """Usage, limits and checkout counters of every named pool."""
+    status = {}
+    for name, pool_engine in engines.items():
+        pool = pool_engine.pool
+        with _pool_counters_lock:
+            counters = dict(pool_counters.get(name) or _new_counters())
+        counters["wait_ms_total"] = round(counters["wait_ms_total"], 1)
+        counters["wait_ms_max"] = round(counters["wait_ms_max"], 1)
+        status[name] = {
+            **pool_limits(name),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            **counters,
+        }
+    return status
+
+
+def connection_budget() -> Dict[str, int]:
+    """
+    Maximum connections this deployment can open on the primary.
+
+    Returns:
+        per_worker, workers, total and the configured max (0 = unchecked)
+    """
+    per_worker = DEDICATED_CONNECTIONS + sum(
+        int(limits["pool_size"]) + int(limits["max_overflow"])
+        for limits in (pool_limits(name) for name in POOL_DEFAULTS)
+    )
+    return {
+        "per_worker": per_worker,
+        "workers": WEB_CONCURRENCY,
+        "total": per_worker * WEB_CONCURRENCY,
+        "max": DB_MAX_CONNECTIONS,
+    }
+
+
+def validate_connection_budget() -> Dict[str, int]:
+    """
+    Check that every worker's pools fit in DB_MAX_CONNECTIONS.
+
+    Returns:
+        The connection budget (see connection_budget)
+
+    Raises:
+        EnvironmentError: If the pools could open more connections than allowed
+    """
+    budget = connection_budget()
+    if budget["max"] and budget["total"] > budget["max"]:
+        limits = ", ".join(
+            f"{name}={int(l['pool_size'])}+{int(l['max_overflow'])}"
+            for name, l in ((name, pool_limits(name)) for name in POOL_DEFAULTS)
+        )
+        raise EnvironmentError(
+            f"Database connection budget exceeded: {budget['workers']} worker(s) x "
+            f"{budget['per_worker']} connections ({limits}, +{DEDICATED_CONNECTIONS} dedicated) = "
+            f"{budget['total']} > DB_MAX_CONNECTIONS={budget['max']}. "
+            f"Lower the DB_POOL_* sizes or WEB_CONCURRENCY."
+        )
+    return budget
+
+
+# Read replica engines (empty when DATABASE_REPLICA_URL is not set)
+replica_engines = [
+    create_engine(
+        url.strip(),
+        pool_pre_ping=True,
+        pool_size=5,
+        max_overflow=10,
+    )
+    for url in DATABASE_REPLICA_URL.split(",")
+    if url.strip()
+]
+
+# Lag seconds to 0 when the replica has replayed everything it received,
+# otherwise time since the last replayed transaction
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaLagGuard:
+    """
+    Measures and caches each replica's replication lag.
+    """
+
+    def __init__(self, engines: list, max_lag_seconds: float, check_seconds: float):
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        # Engine index -> (lag seconds or None if unreachable, measured at)
+        self._lag: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+
+    def lag(self, index: int) -> Optional[float]:
+        """
+        Replication lag of a replica, measured at most every check_seconds.
+
+        Args:
+            index: Position of the replica in replica_engines
+
+        Returns:
+            Lag in seconds, or None if the replica could not be queried
+        """
+        with self._lock:
+            cached = self._lag.get(index)
+            if cached and time.monotonic() - cached[1] < self.check_seconds:
+                return cached[0]
+            # Claim this check so concurrent requests reuse the old value
+            self._lag[index] = (cached[0] if cached else None, time.monotonic())
+
+        previous = cached[0] if cached else 0.0
+        try:
+            with self.engines[index].connect() as conn:
+                lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+        except Exception as e:
+            lag = None
+            if previous is not None:
+                logger.warning(f"⚠️  Réplica {index} no disponible, lecturas al primario: {str(e)}")
+
+        with self._lock:
+            self._lag[index] = (lag, time.monotonic())
+        was_lagging = previous is not None and previous > self.max_lag_seconds
+        if lag is not None and lag > self.max_lag_seconds and not was_lagging:
+            logger.warning(
+                f"⚠️  Réplica {index} con {lag:.1f}s de retraso "
+                f"(máximo {self.max_lag_seconds:.0f}s): lecturas al primario"
+            )
+        return lag
+
+    def pick(self):
+        """
+        Next replica within the lag limit, round robin.
+
+        Returns:
+            Replica engine, or None if every replica is lagging or down
+        """
+        count = len(self.engines)
+        start = next(self._round_robin)
+        for offset in range(count):
+            index = (start + offset) % count
+            lag = self.lag(index)
+            if lag is not None and lag <= self.max_lag_seconds:
+                return self.engines[index]
+        return None
+
+    def status(self) -> List[Dict[str, Optional[float]]]:
+        """Last measured lag of each replica."""
+        with self._lock:
+            return [
+                {"replica": index, "lag_seconds": self._lag.get(index, (None,))[0]}
+                for index in range(len(self.engines))
+            ]
+
+
+replica_lag_guard = ReplicaLagGuard(
+    replica_engines, DATABASE_REPLICA_MAX_LAG_SECONDS, DATABASE_REPLICA_LAG_CHECK_SECONDS
+)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a healthy replica and everything else
+    (flushes, INSERT/UPDATE/DELETE) to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_engines
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+        ):
+            # Pin the replica for the whole session so one request reads a
+            # consistent snapshot instead of hopping between replicas
+            if "replica" not in self.info:
+                self.info["replica"] = replica_lag_guard.pick()
+            if self.info["replica"] is not None:
+                return self.info["replica"]
+        return engines["admin"]
+
+
+# Sessions for read-only admin endpoints (admin pool without replicas)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engines["admin"])
 
 # Create Base class for declarative models
 Base = declarative_base()
@@ -26,8 +344,8 @@ Base = declarative_base()
 
 def get_db():
     """
-    Dependency function to get database session.
-    Use this in FastAPI endpoints as a dependency.
+    Dependency function to get database session from the bot pool.
+    Use this in FastAPI endpoints of the bot path as a dependency.
     
     Usage:
         @app.get("/items/")
@@ -41,6 +359,41 @@ def get_db():
         db.close()
 
 
+def get_admin_db():
+    """
+    Dependency function to get database session from the admin pool.
+    Use this in admin API endpoints so they can't starve the bot path.
+    
+    Usage:
+        @app.post("/items/")
+        def create_item(db: Session = Depends(get_admin_db)):
+            ...
+    """
+    db = AdminSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """
+    Dependency function to get a database session for read-only endpoints.
+    Queries go to a replica within the lag limit, or to the primary's
+    admin pool.
+    
+    Usage:
+        @app.get("/items/")
+        def list_items(db: Session = Depends(get_read_db)):
+            return db.query(Item).all()
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
     """
     Initialize database tables.
@@ -1,5 +1,13 @@
+import time
+
+# Measured from the first line of the module to the end of the lifespan startup
+_STARTUP_BEGAN = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import sys
 import logging
@@ -15,9 +23,9 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-# Import routers
-from app.routers import auth, messages, users, bot
-from app.routers.connectors import slack, whapi
+# Import routers (platform connectors are imported on demand, see below)
+from app.routers import auth, messages, users, bot, stats, admin
+from app.routers.connectors import enabled_connectors, load_connector
 
 
 # ===================================
@@ -44,6 +52,15 @@ def get_optional_env(var_name: str, default: str = None) -> str:
     return os.getenv(var_name, default)
 
 
+def get_connector_env(var_name: str, connector: str, enabled: list) -> str:
+    """
+    Get environment variable that is required only when its connector is enabled.
+    """
+    if connector in enabled:
+        return get_required_env(var_name)
+    return get_optional_env(var_name, "")
+
+
 # Validate and load all required environment variables at startup
 try:
     # Database (DATABASE_URL is primary, others are for Docker Compose only)
@@ -54,20 +71,32 @@ try:
     POSTGRES_USER = get_optional_env("POSTGRES_USER", "postgres")
     POSTGRES_PASSWORD = get_optional_env("POSTGRES_PASSWORD", "")
     
-    # Slack (required for Slack functionality)
-    SLACK_BOT_TOKEN = get_required_env("SLACK_BOT_TOKEN")
-    SLACK_APP_TOKEN = get_optional_env("SLACK_APP_TOKEN", "")  # Not always needed
-    SLACK_SIGNING_SECRET = get_required_env("SLACK_SIGNING_SECRET")
+    # Connection pools of every worker must fit in DB_MAX_CONNECTIONS
+    from app.database import validate_connection_budget
+    DB_CONNECTION_BUDGET = validate_connection_budget()
+    
+    # Connectors to load; credentials are only required for enabled ones
+    ENABLED_CONNECTORS = enabled_connectors()
+    
+    # Slack (required when the slack connector is enabled)
+    SLACK_BOT_TOKEN = get_connector_env("SLACK_BOT_TOKEN", "slack", ENABLED_CONNECTORS)
+    SLACK_APP_TOKEN = get_optional_env("SLACK_APP_TOKEN", "")  # Only needed for Socket Mode
+    SLACK_SIGNING_SECRET = get_connector_env("SLACK_SIGNING_SECRET", "slack", ENABLED_CONNECTORS)
+    # Receive Slack events over Socket Mode websockets as well as HTTP
+    SLACK_SOCKET_MODE = "slack" in ENABLED_CONNECTORS and get_optional_env("SLACK_SOCKET_MODE", "false").lower() == "true"
+    if SLACK_SOCKET_MODE:
+        SLACK_APP_TOKEN = get_required_env("SLACK_APP_TOKEN")
     
     # Digital Ocean (optional - only needed for DO integration)
     DIGITALOCEAN_API_KEY = get_optional_env("DIGITALOCEAN_API_KEY", "")
     DIGITALOCEAN_AGENT_ID = get_optional_env("DIGITALOCEAN_AGENT_ID", "")
     DIGITALOCEAN_API_URL = get_optional_env("DIGITALOCEAN_API_URL", "https://api.digitalocean.com/v2")
     
-    # Whapi (required for WhatsApp functionality)
-    WHAPI_API_KEY = get_required_env("WHAPI_API_KEY")
-    WHAPI_BASE_URL = get_required_env("WHAPI_BASE_URL")
+    # Whapi (required when the whapi connector is enabled)
+    WHAPI_API_KEY = get_connector_env("WHAPI_API_KEY", "whapi", ENABLED_CONNECTORS)
+    WHAPI_BASE_URL = get_connector_env("WHAPI_BASE_URL", "whapi", ENABLED_CONNECTORS)
     WHAPI_CHANNEL_ID = get_optional_env("WHAPI_CHANNEL_ID", "")
+    WHAPI_WEBHOOK_SECRET = get_optional_env("WHAPI_WEBHOOK_SECRET", "")  # Webhooks are rejected without it
     
     # Security
     SECRET_KEY = get_required_env("SECRET_KEY")
@@ -84,6 +113,11 @@ try:
     LOG_LEVEL = get_optional_env("LOG_LEVEL", "INFO")
     
     print("✅ All required environment variables loaded successfully")
+    print(
+        f"✅ Database connection budget: {DB_CONNECTION_BUDGET['workers']} worker(s) x "
+        f"{DB_CONNECTION_BUDGET['per_worker']} = {DB_CONNECTION_BUDGET['total']} "
+        f"(max: {DB_CONNECTION_BUDGET['max'] or 'not checked'})"
+    )
     
 except EnvironmentError as e:
     print(f"❌ Environment Configuration Error: {e}", file=sys.stderr)
@@ -91,11 +125,93 @@ except EnvironmentError as e:
     sys.exit(1)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start background maintenance tasks and stop them on shutdown.
+    """
+    from app.services.partition_service import partition_maintenance_loop
+    from app.services.archive_service import archive_loop
+    from app.services.rollup_service import rollup_catch_up_loop
+    from app.services.conversation_summary import summarization_loop
+    from app.services.principal_cache import RevocationListener
+    from app.services.write_behind import outbound_buffer
+    from app.services.media_store import media_store
+    from app.services.warmup import run_warmup
+    from app.services.digitalocean_client import close_http_client
+    from app.services.health_monitor import health_monitor
+    from app.services.query_log import query_log
+    from app.services.turn_scheduler import turn_scheduler
+    from app.services.event_recorder import event_recorder
+
+    query_log.install()
+    revocation_listener = RevocationListener()
+    revocation_listener.start()
+    outbound_buffer.start()
+
+    whapi_send_queue = None
+    if "whapi" in ENABLED_CONNECTORS:
+        from app.services.whapi_sender import whapi_send_queue
+        whapi_send_queue.start()
+
+    slack_send_queue = None
+    if "slack" in ENABLED_CONNECTORS:
+        from app.services.slack_sender import slack_send_queue
+        slack_send_queue.start()
+
+    slack_socket_receiver = None
+    if SLACK_SOCKET_MODE:
+        from app.services.slack_socket_mode import SlackSocketModeReceiver
+        from app.routers.connectors.slack import dispatch_slack_event
+        slack_socket_receiver = SlackSocketModeReceiver(SLACK_APP_TOKEN, dispatch_slack_event)
+        slack_socket_receiver.start()
+    app.state.slack_socket_receiver = slack_socket_receiver
+
+    health_monitor.register_defaults(ENABLED_CONNECTORS)
+    health_monitor.start()
+
+    background_tasks = [
+        asyncio.create_task(partition_maintenance_loop()),
+        asyncio.create_task(archive_loop()),
+        asyncio.create_task(rollup_catch_up_loop()),
+        asyncio.create_task(summarization_loop()),
+        # Fills the DB pool and opens upstream connections; /ready waits for it
+        asyncio.create_task(run_warmup(ENABLED_CONNECTORS)),
+    ]
+    logging.getLogger(__name__).info(
+        f"🚀 Arranque completado en {(time.perf_counter() - _STARTUP_BEGAN) * 1000:.0f} ms "
+        f"(conectores: {', '.join(ENABLED_CONNECTORS) or 'ninguno'})"
+    )
+    try:
+        yield
+    finally:
+        await health_monitor.stop()
+        if slack_socket_receiver is not None:
+            await slack_socket_receiver.stop()
+        await turn_scheduler.stop()
+        if whapi_send_queue is not None:
+            await whapi_send_queue.stop()
+        if slack_send_queue is not None:
+            await slack_send_queue.stop()
+        await media_store.close()
+        await close_http_client()
+        await outbound_buffer.stop()
+        event_recorder.close()
+        await asyncio.to_thread(revocation_listener.stop)
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        query_log.uninstall()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="BotDO API",
     description="Backend API for Slack and Whapi bot integration with Digital Ocean Agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson serializes responses several times faster than the stdlib encoder
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS with environment variables
@@ -107,13 +223,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tag SQL statements with the route that ran them (slow-query log)
+from app.services.query_log import QueryRouteMiddleware
+app.add_middleware(QueryRouteMiddleware)
+
 # Register routers
 app.include_router(auth.router)
 app.include_router(messages.router)
 app.include_router(users.router)
 app.include_router(bot.router)
-app.include_router(slack.router)
-app.include_router(whapi.router)
+app.include_router(stats.router)
+app.include_router(admin.router)
+for connector_name in ENABLED_CONNECTORS:
+    app.include_router(load_connector(connector_name).router)
 
 
 @app.get("/")
@@ -131,17 +253,19 @@ async def root():
 @app.get("/health")
 async def health_check():
     """
-    Health check endpoint
+    Health check endpoint.
+    Served from the background health monitor's cache; it never calls the
+    database or upstream services itself.
     """
-    from app.database import engine
+    from app.services.health_monitor import health_monitor
     
-    # Check database connection
-    db_status = "disconnected"
-    try:
-        with engine.connect() as conn:
-            db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
+    database = health_monitor.get("database")
+    if database["status"] == "healthy":
+        db_status = "connected"
+    elif database["status"] == "unhealthy":
+        db_status = f"error: {database['error']}"
+    else:
+        db_status = database["status"]
     
     return {
         "status": "healthy",
@@ -149,31 +273,52 @@ async def health_check():
         "environment": ENVIRONMENT,
         "database": db_status,
         "integrations": {
-            "slack": "configured" if SLACK_BOT_TOKEN else "not_configured",
-            "whapi": "configured" if WHAPI_API_KEY else "not_configured",
+            "slack": "disabled" if "slack" not in ENABLED_CONNECTORS else "configured" if SLACK_BOT_TOKEN else "not_configured",
+            "whapi": "disabled" if "whapi" not in ENABLED_CONNECTORS else "configured" if WHAPI_API_KEY else "not_configured",
             "digitalocean": "configured" if DIGITALOCEAN_API_KEY else "not_configured"
-        }
+        },
+        "checks": health_monitor.snapshot()
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint: 503 until the startup warm-up has finished.
+    Use /health for liveness.
+    """
+    from app.services.warmup import readiness
+    
+    return ORJSONResponse(
+        status_code=200 if readiness.ready else 503,
+        content=readiness.snapshot()
+    )
+
+
 @app.get("/api/test")
 async def test_endpoint():
     """
     Test endpoint for frontend connectivity
     """
+    endpoints = {
+        "root": "/",
+        "health": "/health",
+        "ready": "/ready",
+        "docs": "/docs",
+        "test": "/api/test",
+        "bot": "/bot/process",
+        "stats": "/api/stats",
+        "slow_queries": "/api/admin/slow-queries",
+        "prompt_tokens": "/api/admin/prompt-tokens",
+        "turns": "/api/admin/turns"
+    }
+    for connector_name in ENABLED_CONNECTORS:
+        endpoints[f"{connector_name}_events"] = f"/canales/{connector_name}/events"
+        endpoints[f"{connector_name}_send"] = f"/canales/{connector_name}/send"
+    
     return {
         "message": "Backend API is working correctly!",
-        "endpoints": {
-            "root": "/",
-            "health": "/health",
-            "docs": "/docs",
-            "test": "/api/test",
-            "bot": "/bot/process",
-            "slack_events": "/canales/slack/events",
-            "slack_send": "/canales/slack/send",
-            "whapi_events": "/canales/whapi/events",
-            "whapi_send": "/canales/whapi/send"
-        }
+        "endpoints": endpoints
     }
 
 
@@ -1,10 +1,10 @@
 """
 SQLAlchemy ORM models for BotDO database.
 """
-from sqlalchemy import Column, String, Boolean, Text, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, Text, TIMESTAMP, ForeignKey, UniqueConstraint, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 
 from app.database import Base
@@ -17,10 +17,11 @@ class AdminUser(Base):
     __tablename__ = "admin_users"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    username = Column(String(255), unique=True, nullable=False, index=True)
-    email = Column(String(255), unique=True, nullable=False, index=True)
+    username = Column(String(255), unique=True, nullable=False)
+    email = Column(String(255), unique=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # JWT "ver" claim; bumped on password/active change
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
@@ -30,11 +31,14 @@ class User(Base):
     Track message senders across platforms.
     """
     __tablename__ = "users"
+    __table_args__ = (
+        UniqueConstraint("platform", "platform_user_id", name="unique_platform_user"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    platform = Column(String(50), nullable=False, index=True)  # 'slack', 'whatsapp', 'web'
+    platform = Column(String(50), nullable=False)  # 'slack', 'whatsapp', 'web'
     platform_user_id = Column(String(255), nullable=False)  # User ID from the platform
-    display_name = Column(String(255), index=True)
+    display_name = Column(String(255))
     email = Column(String(255))
     platform_metadata = Column(JSONB)  # Additional platform-specific data
     created_at = Column(TIMESTAMP, server_default=func.now())
@@ -47,17 +51,24 @@ class User(Base):
         return f"<User {self.display_name} ({self.platform})>"
 
 
+# Declared after the class so the column can carry DESC, as in migration 003
+Index("idx_users_platform_created_at", User.platform, User.created_at.desc())
+
+
 class Channel(Base):
     """
     Communication channels across platforms.
     """
     __tablename__ = "channels"
+    __table_args__ = (
+        UniqueConstraint("platform", "channel_id", name="unique_platform_channel"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    platform = Column(String(50), nullable=False, index=True)  # 'slack', 'whatsapp', 'web'
+    platform = Column(String(50), nullable=False)  # 'slack', 'whatsapp', 'web'
     channel_id = Column(String(255), nullable=False)  # Channel ID from the platform
     channel_name = Column(String(255))
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
     platform_metadata = Column(JSONB)  # Additional platform-specific data
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -73,20 +84,32 @@ class Message(Base):
     """
     Unified message storage for all channels.
     Main table for storing all messages across platforms.
+    Range-partitioned by month on timestamp (see database/init.sql).
     """
     __tablename__ = "messages"
+    __table_args__ = (
+        # Partitioned tables need the partition key in every unique constraint,
+        # so this no longer stops duplicate deliveries; save_message
+        # serializes them per message_id instead
+        UniqueConstraint("message_id", "timestamp", name="unique_message_id_timestamp"),
+        # Indexes matched to the actual queries (see database/migrations/003_index_redesign.sql)
+        Index("idx_messages_timestamp", "timestamp"),
+        Index("idx_messages_user_id", "user_id", postgresql_where=text("user_id IS NOT NULL")),
+        Index("idx_messages_created_at_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    message_id = Column(String(255), unique=True, nullable=False)  # Message ID from the platform
-    channel = Column(String(50), nullable=False, index=True)  # Origin: 'slack', 'whatsapp', 'web'
-    direction = Column(String(20), nullable=False, index=True)  # 'inbound' or 'outbound'
-    sender_type = Column(String(20), nullable=False, index=True)  # 'bot' or 'user'
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'), index=True)
-    channel_id = Column(UUID(as_uuid=True), ForeignKey('channels.id', ondelete='SET NULL'), index=True)
+    message_id = Column(String(255), nullable=False)  # Message ID from the platform
+    channel = Column(String(50), nullable=False)  # Origin: 'slack', 'whatsapp', 'web'
+    direction = Column(String(20), nullable=False)  # 'inbound' or 'outbound'
+    sender_type = Column(String(20), nullable=False)  # 'bot' or 'user'
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='SET NULL'))
+    channel_id = Column(UUID(as_uuid=True), ForeignKey('channels.id', ondelete='SET NULL'))
     message_text = Column(Text)
-    timestamp = Column(TIMESTAMP, nullable=False, index=True)  # Original message timestamp
+    timestamp = Column(TIMESTAMP, primary_key=True, nullable=False)  # Original message timestamp (partition key)
     platform_metadata = Column(JSONB)  # Platform-specific data (thread_ts, message_type, etc.)
-    created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
     # Relationships
@@ -96,3 +119,81 @@ class Message(Base):
     def __repr__(self):
         return f"<Message {self.message_id} from {self.channel} ({self.direction})>"
 
+
+# Declared after the class so the column can carry DESC, as in migration 003
+Index("idx_messages_channel_id_timestamp", Message.channel_id, Message.timestamp.desc())
+
+
+class MessageRollupHourly(Base):
+    """
+    Hourly message counts per channel, direction, sender type and channel_id.
+    Serves /api/stats without scanning the messages table.
+    """
+    __tablename__ = "message_rollups_hourly"
+
+    bucket = Column(TIMESTAMP, primary_key=True)  # date_trunc('hour', messages.timestamp)
+    channel = Column(String(50), primary_key=True)
+    direction = Column(String(20), primary_key=True)
+    sender_type = Column(String(20), primary_key=True)
+    channel_id = Column(UUID(as_uuid=True), primary_key=True)  # Zero UUID when the message has no channel
+    message_count = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MessageRollupHourly {self.bucket} {self.channel}/{self.direction}: {self.message_count}>"
+
+
+class RollupState(Base):
+    """
+    Watermarks of background rollup jobs.
+    """
+    __tablename__ = "rollup_state"
+
+    name = Column(String(100), primary_key=True)
+    watermark = Column(TIMESTAMP, nullable=False)  # Highest messages.created_at already rolled up
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class Media(Base):
+    """
+    Content-addressed attachment stored on disk under MEDIA_DIR.
+    Messages reference media from platform_metadata["media"].
+    """
+    __tablename__ = "media"
+    __table_args__ = (
+        UniqueConstraint("sha256", name="unique_media_sha256"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sha256 = Column(String(64), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String(255))
+    storage_path = Column(String(500), nullable=False)  # Relative to MEDIA_DIR
+    platform = Column(String(50), nullable=False)  # Platform of the first upload
+    original_filename = Column(String(500))
+    reference_count = Column(Integer, nullable=False, default=1, server_default="1")
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    last_seen_at = Column(TIMESTAMP, server_default=func.now())
+
+    def __repr__(self):
+        return f"<Media {self.sha256[:12]} ({self.size_bytes} bytes)>"
+
+
+class ConversationSummary(Base):
+    """
+    Rolling summary of the older turns of a channel's conversation.
+    Updated incrementally by the background summarizer; only messages after
+    the watermark are sent verbatim to the agent.
+    """
+    __tablename__ = "conversation_summaries"
+
+    channel_id = Column(UUID(as_uuid=True), ForeignKey('channels.id', ondelete='CASCADE'), primary_key=True)
+    summary = Column(Text, nullable=False)
+    watermark = Column(TIMESTAMP, nullable=False)  # messages.timestamp of the newest summarized message
+    summarized_messages = Column(Integer, nullable=False, default=0, server_default="0")
+    summary_tokens = Column(Integer, nullable=False, default=0, server_default="0")  # Estimated
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ConversationSummary {self.channel_id} ({self.summarized_messages} messages)>"
@@ -0,0 +1,128 @@
+"""
+Admin diagnostics routes for BotDO API.
+Exposes the slow-query log and connection pool telemetry.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+
+from app.database import pool_status
+from app.models import AdminUser
+from app.auth import get_current_user
+from app.services.query_log import query_log, SLOW_QUERY_MS, SLOW_POOL_WAIT_MS
+from app.services.conversation_summary import conversation_summarizer, prompt_token_stats
+from app.services.turn_scheduler import turn_scheduler
+from app.services.agent_endpoints import get_agent_pool
+from app.services.semantic_memory import semantic_memory
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200, description="Number of statements to return"),
+    order_by: str = Query("total_ms", description="Sort by: total_ms, max_ms, calls, slow_calls"),
+    recent: int = Query(20, ge=0, le=100, description="Number of recent slow records to include"),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Get the top SQL statements of this worker by total time, with their
+    slowest routes and last EXPLAIN capture, plus recent slow records.
+    Requires authentication.
+
+    Args:
+        limit: Number of statements to return
+        order_by: Aggregate to sort by
+        recent: Number of recent slow-query/pool-wait/explain records
+        current_user: Authenticated user
+
+    Returns:
+        Thresholds, statement aggregates, recent records and pool telemetry
+    """
+    try:
+        statements = query_log.top(limit=limit, order_by=order_by)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return {
+        "since": query_log.started_at,
+        "slow_query_ms": SLOW_QUERY_MS,
+        "slow_pool_wait_ms": SLOW_POOL_WAIT_MS,
+        "statements": statements,
+        "recent": query_log.recent(recent),
+        "pools": pool_status()
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def reset_slow_queries(
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Reset this worker's statement aggregates (the log file is kept).
+    Requires authentication.
+
+    Args:
+        current_user: Authenticated user
+
+    Returns:
+        None (204 No Content)
+    """
+    query_log.reset()
+    return None
+
+
+@router.get("/prompt-tokens")
+def get_prompt_tokens(
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Get this worker's prompt size per bot turn and the state of the
+    conversation summarizer and semantic memory. Requires authentication.
+
+    Args:
+        current_user: Authenticated user
+
+    Returns:
+        Prompt token counters, summarizer counters and memory index state
+    """
+    return {
+        "prompt": prompt_token_stats.snapshot(),
+        "summarizer": conversation_summarizer.stats(),
+        "memory": semantic_memory.stats()
+    }
+
+
+@router.get("/turns")
+def get_turn_scheduler(
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Get this worker's turn scheduler state: per-lane depth, running turns,
+    counters and queue-time percentiles. Requires authentication.
+
+    Args:
+        current_user: Authenticated user
+
+    Returns:
+        Scheduler metrics
+    """
+    return turn_scheduler.stats()
+
+
+@router.get("/agent-endpoints")
+def get_agent_endpoints(
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Get this worker's view of the agent endpoints: weights, outstanding
+    requests, latency EWMA and ejections. Requires authentication.
+
+    Args:
+        current_user: Authenticated user
+
+    Returns:
+        Load-balancing strategy and per-endpoint state
+    """
+    return get_agent_pool().stats()
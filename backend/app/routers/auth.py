@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from app.database import get_db
+from app.database import get_admin_db
 from app.models import AdminUser
 from app.schemas import (
     AdminUserCreate,
@@ -17,7 +17,7 @@ from app.schemas import (
 from app.auth import (
     get_password_hash,
     authenticate_user,
-    create_access_token,
+    create_user_access_token,
     get_current_user
 )
 
@@ -27,7 +27,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/register", response_model=AdminUserResponse, status_code=status.HTTP_201_CREATED)
 def register(
     user_data: AdminUserCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_admin_db)
 ):
     """
     Register a new admin user.
@@ -91,7 +91,7 @@ def register(
 @router.post("/login", response_model=Token)
 def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_admin_db)
 ):
     """
     Login with username and password.
@@ -116,7 +116,7 @@ def login(
         )
     
     # Create access token
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_user_access_token(user)
     
     return {
         "access_token": access_token,
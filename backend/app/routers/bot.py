@@ -5,31 +5,152 @@ Main endpoint for processing messages and generating AI responses.
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import datetime
+import asyncio
 import logging
+from typing import List, Optional
 from uuid import uuid4
 
 from app.database import get_db
 from app.schemas import BotProcessRequest, BotProcessResponse
 from app.services.message_service import MessageService
 from app.services.digitalocean_client import DigitalOceanClient
+from app.services.turn_scheduler import turn_scheduler, TurnQueueFull
+from app.services.conversation_summary import (
+    get_conversation_summary, summary_message, estimate_prompt_tokens, prompt_token_stats
+)
+from app.services.semantic_memory import get_memory_snippets
+from app.models import User, Channel, ConversationSummary, Message
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/bot", tags=["Bot"])
 
+# Messages of conversation sent to the agent, the current one included
+HISTORY_LIMIT = 20
+
+
+class PreparedTurn:
+    """
+    Database state a turn needs before the agent call.
+    """
+
+    def __init__(
+        self,
+        user: User,
+        channel: Channel,
+        summary: Optional[ConversationSummary],
+        history: List[Message]
+    ):
+        self.user = user
+        self.channel = channel
+        self.summary = summary
+        self.history = history
+
+
+def prepare_turn(
+    db: Session,
+    platform: str,
+    platform_user_id: str,
+    platform_channel_id: str
+) -> PreparedTurn:
+    """
+    Get or create the turn's user and channel rows and load the channel's
+    summary and recent history.
+
+    Needs only platform IDs, not the message or the profile lookups, so
+    connectors run it in a worker thread while they enrich the event.
+    Names and metadata are applied afterwards by process_message.
+
+    Args:
+        db: Database session (not used by anything else until this returns)
+        platform: Platform name
+        platform_user_id: User ID from the platform
+        platform_channel_id: Channel ID from the platform
+
+    Returns:
+        Prepared turn state
+    """
+    message_service = MessageService(db)
+    user = message_service.get_or_create_user(platform=platform, platform_user_id=platform_user_id)
+    channel = message_service.get_or_create_channel(platform=platform, channel_id=platform_channel_id)
+    # Long conversations send their rolling summary + the turns after it
+    summary = get_conversation_summary(db, channel.id)
+    # Loaded before the current message is saved; it is appended to the prompt later
+    history = message_service.get_conversation_history(
+        channel_db_id=channel.id,
+        limit=HISTORY_LIMIT - 1,
+        after=summary.watermark if summary else None
+    )
+    return PreparedTurn(user, channel, summary, history)
+
+
+def _apply_profile(prepared: PreparedTurn, request: BotProcessRequest):
+    """
+    Copy names, email and metadata from the request onto the prepared rows;
+    saved by the next commit (the incoming message's).
+
+    A name the connector could not resolve comes as None and keeps the
+    stored one; the platform ID is only used when nothing is stored yet.
+    """
+    user, channel = prepared.user, prepared.channel
+    user_name = request.user_name or (None if user.display_name else request.platform_user_id)
+    if user_name and user_name != user.display_name:
+        user.display_name = user_name
+    if request.user_email and request.user_email != user.email:
+        user.email = request.user_email
+    channel_name = request.channel_name or (None if channel.channel_name else request.platform_channel_id)
+    if channel_name and channel_name != channel.channel_name:
+        channel.channel_name = channel_name
+    if request.metadata:
+        user.platform_metadata = request.metadata
+        channel.platform_metadata = request.metadata
+
 
 @router.post("/process", response_model=BotProcessResponse)
-async def process_message(
+async def bot_process(
     request: BotProcessRequest,
     db: Session = Depends(get_db)
 ):
     """
-    Main bot processing endpoint.
+    Process a message submitted directly to the API.
+    Runs in the scheduler's admin lane, so direct calls share turn capacity
+    fairly with connector traffic instead of bypassing it.
+    
+    Args:
+        request: Bot process request with message details
+        db: Database session
+        
+    Returns:
+        Bot process response with AI-generated reply
+        
+    Raises:
+        HTTPException: 503 if the admin lane is full, or as process_message
+    """
+    try:
+        return await turn_scheduler.run("admin", lambda: process_message(request, db))
+    except TurnQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+
+async def process_message(
+    request: BotProcessRequest,
+    db: Session = Depends(get_db),
+    prepared: Optional[PreparedTurn] = None
+):
+    """
+    Main bot processing flow, shared by the /bot/process endpoint and the
+    connectors (which call it from their own scheduled turns).
     
     Flow:
-    1. Save incoming user message to database
-    2. Get conversation history (last 20 messages)
-    3. Format conversation to OpenAI format
+    1. Get or create user and channel, load the conversation summary and
+       history (last 20 messages, after the summary if any); skipped when
+       the caller passes a PreparedTurn
+    2. Save incoming user message to database
+    3. Format conversation to OpenAI format, led by the conversation summary
+       and, with MEMORY_ENABLED, older messages relevant to this one
     4. Send to Digital Ocean Agent
     5. Save bot response to database
     6. Return bot response
@@ -37,6 +158,7 @@ async def process_message(
     Args:
         request: Bot process request with message details
         db: Database session
+        prepared: Result of prepare_turn() for this request, if already loaded
         
     Returns:
         Bot process response with AI-generated reply
@@ -59,28 +181,24 @@ async def process_message(
         do_client = DigitalOceanClient()
         logger.info("✅ Servicios inicializados")
         
-        # Step 1: Get or create user
-        logger.info(f"👤 Obteniendo o creando usuario en BD...")
-        user = message_service.get_or_create_user(
-            platform=request.platform,
-            platform_user_id=request.platform_user_id,
-            display_name=request.user_name,
-            email=request.user_email,
-            platform_metadata=request.metadata
-        )
-        logger.info(f"✅ Usuario obtenido: DB ID={user.id}")
-        
-        # Step 2: Get or create channel
-        logger.info(f"📺 Obteniendo o creando canal en BD...")
-        channel = message_service.get_or_create_channel(
-            platform=request.platform,
-            channel_id=request.platform_channel_id,
-            channel_name=request.channel_name,
-            platform_metadata=request.metadata
-        )
-        logger.info(f"✅ Canal obtenido: DB ID={channel.id}")
+        # Step 1: Get or create user and channel, load summary and history
+        # (connectors may have done this concurrently with their own lookups)
+        if prepared is None:
+            logger.info(f"👤 Preparando usuario, canal e historial en BD...")
+            prepared = prepare_turn(
+                db,
+                platform=request.platform,
+                platform_user_id=request.platform_user_id,
+                platform_channel_id=request.platform_channel_id
+            )
+        _apply_profile(prepared, request)
+        user, channel, summary = prepared.user, prepared.channel, prepared.summary
+        conversation_history = prepared.history
+        logger.info(f"✅ Usuario DB ID={user.id}, canal DB ID={channel.id}, historial: {len(conversation_history)} mensajes")
+        if summary:
+            logger.info(f"📝 Usando resumen de {summary.summarized_messages} mensajes anteriores")
         
-        # Step 3: Save incoming user message
+        # Step 2: Save incoming user message
         logger.info(f"💾 Guardando mensaje del usuario en BD...")
         user_message = message_service.save_message(
             message_id=request.platform_message_id,
@@ -95,29 +213,39 @@ async def process_message(
         )
         logger.info(f"✅ Mensaje guardado: DB ID={user_message.id}")
         
-        # Step 4: Get conversation history (last 20 messages)
-        logger.info(f"📚 Obteniendo historial de conversación (últimos 20 mensajes)...")
-        conversation_history = message_service.get_conversation_history(
-            channel_db_id=channel.id,
-            limit=20
-        )
-        logger.info(f"✅ Historial obtenido: {len(conversation_history)} mensajes")
-        
-        # Step 5: Format to OpenAI format
+        # Step 3: Format to OpenAI format
         logger.info(f"🔄 Formateando mensajes a formato OpenAI...")
-        openai_messages = message_service.format_to_openai(conversation_history)
+        # History is loaded before the save, so the current message is only
+        # there on a redelivery; match it by ID, as texts like "ok" repeat
+        openai_messages = message_service.format_to_openai([
+            msg for msg in conversation_history if msg.message_id != request.platform_message_id
+        ])
+        openai_messages.append({
+            "role": "user",
+            "content": request.message_text
+        })
+        logger.info(f"➕ Mensaje actual agregado al contexto")
         
-        # Include the current message if not already in history
-        if not any(msg.get("content") == request.message_text for msg in openai_messages):
-            openai_messages.append({
-                "role": "user",
-                "content": request.message_text
-            })
-            logger.info(f"➕ Mensaje actual agregado al contexto")
+        # Older messages similar to this one, from before the history window.
+        # Embedding and the index catch-up block, so they run off the event loop
+        memory = await asyncio.to_thread(
+            get_memory_snippets,
+            db,
+            channel.id,
+            request.message_text,
+            before=conversation_history[0].timestamp if conversation_history else user_message.timestamp
+        )
+        if memory:
+            openai_messages.insert(0, memory)
+            logger.info(f"🧠 Fragmentos de memoria agregados: {memory['content'].count(chr(10))}")
+        
+        if summary:
+            openai_messages.insert(0, summary_message(summary))
         
-        logger.info(f"✅ Total de mensajes en contexto: {len(openai_messages)}")
+        prompt_tokens = estimate_prompt_tokens(openai_messages)
+        logger.info(f"✅ Total de mensajes en contexto: {len(openai_messages)} (~{prompt_tokens} tokens)")
         
-        # Step 6: Send to Digital Ocean Agent
+        # Step 4: Send to Digital Ocean Agent
         logger.info(f"🌊 Enviando conversación a Digital Ocean Agent...")
         bot_response_text = await do_client.send_to_agent(
             messages=openai_messages,
@@ -127,7 +255,10 @@ async def process_message(
         
         logger.info(f"✅ Respuesta recibida de Digital Ocean Agent ({len(bot_response_text)} chars)")
         
-        # Step 7: Save bot response
+        usage = do_client.last_usage or {}
+        prompt_token_stats.record(prompt_tokens, usage.get("prompt_tokens"), summary is not None)
+        
+        # Step 5: Save bot response
         logger.info(f"💾 Guardando respuesta del bot en BD...")
         bot_message_id = f"{request.platform}_bot_{uuid4()}"
         bot_message = message_service.save_message(
@@ -141,13 +272,22 @@ async def process_message(
             channel_id=channel.id,
             platform_metadata={
                 "in_reply_to": request.platform_message_id,
-                **request.metadata
-            }
+                **request.metadata,
+                "agent_endpoint": do_client.last_endpoint,
+                "prompt": {
+                    "messages": len(openai_messages),
+                    "tokens_estimated": prompt_tokens,
+                    "tokens_reported": usage.get("prompt_tokens"),
+                    "summary": summary is not None,
+                    "memory_snippets": memory["content"].count("\n") if memory else 0
+                }
+            },
+            defer=True  # Batched by the write-behind buffer when enabled
         )
         
         logger.info(f"✅ Respuesta guardada: DB ID={bot_message.id}")
         
-        # Step 8: Return response
+        # Step 6: Return response
         logger.info("🎉 BOT PROCESS REQUEST - COMPLETADO EXITOSAMENTE")
         logger.info("=" * 60)
         
@@ -174,25 +314,26 @@ async def process_message(
 async def bot_health_check():
     """
     Health check for bot service.
+    Served from the background health monitor's cache.
     
     Returns:
         Status of bot service and Digital Ocean Agent connection
     """
-    try:
-        do_client = DigitalOceanClient()
-        agent_available = await do_client.health_check()
-        
-        return {
-            "status": "healthy" if agent_available else "degraded",
-            "bot_service": "running",
-            "digitalocean_agent": "connected" if agent_available else "unavailable"
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "bot_service": "running",
-            "digitalocean_agent": "error",
-            "error": str(e)
-        }
-
+    from app.services.health_monitor import health_monitor
+    
+    agent = health_monitor.get("digitalocean")
+    if agent["status"] == "healthy":
+        status_value, agent_value = "healthy", "connected"
+    elif agent["status"] == "unhealthy":
+        status_value, agent_value = "degraded", "unavailable"
+    else:
+        status_value, agent_value = "degraded", agent["status"]
+    
+    return {
+        "status": status_value,
+        "bot_service": "running",
+        "digitalocean_agent": agent_value,
+        "checked_at": agent.get("checked_at"),
+        "age_seconds": agent.get("age_seconds"),
+        "error": agent.get("error")
+    }
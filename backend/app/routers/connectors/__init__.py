@@ -1,5 +1,52 @@
 """
 Platform connectors for BotDO.
 Handles integration with external messaging platforms like Slack and WhatsApp.
+
+Connectors are enabled with ENABLED_CONNECTORS (comma separated, default
+"slack,whapi") and imported on demand, so a deployment that only uses one
+platform never loads the other platform's SDK or needs its credentials.
 """
+import importlib
+import os
+from types import ModuleType
+from typing import Dict, List, Tuple
+
+# Connector name -> (router module, environment variables it requires)
+CONNECTORS: Dict[str, Tuple[str, List[str]]] = {
+    "slack": ("app.routers.connectors.slack", ["SLACK_BOT_TOKEN", "SLACK_SIGNING_SECRET"]),
+    "whapi": ("app.routers.connectors.whapi", ["WHAPI_API_KEY", "WHAPI_BASE_URL"]),
+}
+
+
+def enabled_connectors() -> List[str]:
+    """
+    Connectors listed in ENABLED_CONNECTORS.
+
+    Returns:
+        Connector names, in configuration order
+
+    Raises:
+        EnvironmentError: If an unknown connector is listed
+    """
+    raw = os.getenv("ENABLED_CONNECTORS", ",".join(CONNECTORS))
+    names = [name.strip().lower() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CONNECTORS]
+    if unknown:
+        raise EnvironmentError(
+            f"Unknown connector(s) in ENABLED_CONNECTORS: {', '.join(unknown)}. "
+            f"Available: {', '.join(CONNECTORS)}"
+        )
+    return names
+
+
+def load_connector(name: str) -> ModuleType:
+    """
+    Import a connector's router module.
+
+    Args:
+        name: Connector name (key of CONNECTORS)
 
+    Returns:
+        Module exposing a `router`
+    """
+    return importlib.import_module(CONNECTORS[name][0])
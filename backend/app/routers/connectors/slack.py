@@ -3,66 +3,132 @@ Slack connector for BotDO API.
 Handles Slack event subscriptions and message sending.
 """
 from fastapi import APIRouter, Request, HTTPException, status, Depends
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 import logging
-from typing import Dict, Any
+import os
+import re
 import time
-from collections import OrderedDict
+from collections import deque
+from typing import Dict, Any, Optional
 import asyncio
+import orjson
 
 from app.database import get_db
 from app.schemas import SlackEventRequest, SlackMessageRequest, BotProcessRequest
 from app.services.slack_client import SlackClient
-from app.routers.bot import process_message
+from app.services.send_queue import SendQueueFull
+from app.services.slack_sender import slack_send_queue, slack_rate_limiter
+from app.services.event_dedup import event_deduplicator
+from app.services.event_recorder import event_recorder
+from app.services.media_store import media_store
+from app.services.percentiles import percentiles
+from app.services.turn_scheduler import turn_scheduler, classify_slack_event, TurnQueueFull
+from app.routers.bot import process_message, prepare_turn
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/canales/slack", tags=["Slack Connector"])
 
-# Event deduplication cache
-# Key: event_id, Value: timestamp when processed
-_processed_events: OrderedDict[str, float] = OrderedDict()
-_MAX_CACHE_SIZE = 1000  # Maximum events to keep in cache
-_CACHE_TTL = 3600  # 1 hour in seconds
+# Seconds each Slack lookup (auth.test, users.info, conversations.info) may
+# take before the turn goes on with the raw IDs
+SLACK_LOOKUP_TIMEOUT_SECONDS = float(os.getenv("SLACK_LOOKUP_TIMEOUT_SECONDS", "1.5"))
 
+# A leading <@U...> mention, stripped when the bot identity is unavailable
+LEADING_MENTION = re.compile(r"^\s*<@[A-Z0-9]+>\s*")
 
-def _is_event_processed(event_id: str) -> bool:
+STAGE_SAMPLES = 1000
+
+
+class MentionTimings:
     """
-    Check if an event has already been processed.
-    Cleans up old entries from cache.
-    
+    Duration of the stages of recent Slack turns, up to the reply being queued.
+    """
+
+    STAGES = ("lookups", "prepare", "media", "process", "critical_path")
+
+    def __init__(self):
+        self._samples = {stage: deque(maxlen=STAGE_SAMPLES) for stage in self.STAGES}
+        self.degraded_lookups = 0
+
+    def record(self, stage: str, ms: float):
+        self._samples[stage].append(ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """p50/p95 per stage in ms; lookups and prepare run concurrently."""
+        result = {}
+        for stage, samples in self._samples.items():
+            result[stage] = percentiles(samples, (0.50, 0.95))
+        result["degraded_lookups"] = self.degraded_lookups
+        return result
+
+
+mention_timings = MentionTimings()
+
+
+async def _lookup(name: str, method: Optional[str], call, *args) -> Optional[Any]:
+    """
+    Run a blocking Slack lookup in a worker thread, giving up after
+    SLACK_LOOKUP_TIMEOUT_SECONDS.
+
     Args:
-        event_id: Unique event identifier
-        
+        name: What is looked up, for logs
+        method: Web API method called, to wait for a token of its tier
+            (None for lookups answered from a cache)
+        call: Blocking SlackClient method
+        *args: Arguments for call
+
     Returns:
-        True if event was already processed, False otherwise
+        The lookup's result, or None if it failed or timed out
     """
-    current_time = time.time()
-    
-    # Clean up old entries (older than TTL)
-    keys_to_remove = []
-    for key, timestamp in _processed_events.items():
-        if current_time - timestamp > _CACHE_TTL:
-            keys_to_remove.append(key)
-        else:
-            break  # OrderedDict, so once we hit a recent one, rest are recent
-    
-    for key in keys_to_remove:
-        del _processed_events[key]
-    
-    # Check if event already processed
-    if event_id in _processed_events:
-        logger.warning(f"⚠️  Evento duplicado detectado: {event_id}")
-        return True
-    
-    # Mark as processed
-    _processed_events[event_id] = current_time
-    
-    # Limit cache size
-    while len(_processed_events) > _MAX_CACHE_SIZE:
-        _processed_events.popitem(last=False)  # Remove oldest
-    
-    return False
+    async def run():
+        if method:
+            await slack_rate_limiter.acquire(method)
+        return await asyncio.to_thread(call, *args)
+
+    try:
+        # The wait for a tier token counts against the timeout: a throttled
+        # lookup degrades to IDs instead of holding the turn
+        return await asyncio.wait_for(run(), SLACK_LOOKUP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️  {name} tardó más de {SLACK_LOOKUP_TIMEOUT_SECONDS}s, se continúa con IDs")
+    except Exception as e:
+        logger.warning(f"⚠️  No se pudo obtener {name}: {str(e)}")
+    mention_timings.degraded_lookups += 1
+    return None
+
+
+async def enrich_slack_event(
+    slack_client: SlackClient,
+    user_id: str,
+    channel_id: str
+) -> Dict[str, Any]:
+    """
+    Look up the bot identity, the user and the channel concurrently.
+    A lookup that fails or times out leaves its fields as None, so callers
+    can tell an unresolved name from a real one.
+
+    Args:
+        slack_client: Slack client instance
+        user_id: Slack user ID
+        channel_id: Slack channel ID
+
+    Returns:
+        bot_user_id, user_name, user_email and channel_name (each None if
+        not resolved)
+    """
+    identity, user_info, channel_info = await asyncio.gather(
+        _lookup("la identidad del bot", None, slack_client.get_bot_identity),
+        _lookup("la info del usuario", "users.info", slack_client.get_user_info, user_id),
+        _lookup("la info del canal", "conversations.info", slack_client.get_channel_info, channel_id)
+    )
+    return {
+        "bot_user_id": identity["user_id"] if identity else None,
+        "user_name": (user_info.get("real_name") or user_info.get("name")) if user_info else None,
+        "user_email": user_info.get("profile", {}).get("email") if user_info else None,
+        "channel_name": channel_info.get("name") if channel_info else None
+    }
 
 
 async def _process_app_mention_background(
@@ -92,6 +158,135 @@ async def _process_app_mention_background(
         db.close()
 
 
+def _schedule_turn(event: Dict[str, Any], event_id: str):
+    """
+    Queue an event's turn in its priority lane (DMs ahead of channel chatter).
+    
+    Args:
+        event: Slack event data
+        event_id: Unique event identifier (its dedup mark is cleared if
+            the turn is rejected)
+        
+    Raises:
+        TurnQueueFull: If the lane is full
+    """
+    lane = classify_slack_event(event)
+    try:
+        turn_scheduler.submit(lane, lambda: _process_app_mention_background(event, event_id))
+    except TurnQueueFull as e:
+        # Unmark it so Slack's retry of this event is not dropped as a duplicate
+        event_deduplicator.forget(event_id)
+        logger.error(f"❌ Evento {event_id} rechazado, Slack lo reintentará: {str(e)}")
+        raise
+    logger.info(f"🚀 Turno en cola (carril {lane}) para evento: {event_id}")
+
+
+def dispatch_slack_event(payload: SlackEventRequest) -> Dict[str, Any]:
+    """
+    Deduplicate an authenticated Slack event and queue its turn.
+    Shared by the HTTP Events endpoint and the Socket Mode receiver, so both
+    ingest paths behave the same once the transport is verified.
+    
+    Args:
+        payload: Slack event envelope (event_callback)
+        
+    Returns:
+        Acknowledgement body for the HTTP endpoint
+        
+    Raises:
+        TurnQueueFull: If the event's turn could not be queued; the caller
+            must not acknowledge it, so Slack delivers it again
+    """
+    if payload.type == "event_callback":
+        event = payload.event or {}
+        event_type = event.get("type")
+        
+        logger.info(f"📨 Event callback recibido - tipo: {event_type}")
+        logger.debug(f"📝 Datos del evento: {event}")
+        
+        # Handle app_mention events (bot is mentioned with @)
+        if event_type == "app_mention":
+            user_id = event.get('user')
+            channel_id = event.get('channel')
+            text = event.get('text', '')
+            event_ts = event.get('event_ts', '')
+            client_msg_id = event.get('client_msg_id', '')
+            
+            # Create unique event ID for deduplication
+            # Prefer client_msg_id, fallback to event_ts + user + channel
+            event_id = client_msg_id if client_msg_id else f"{event_ts}_{user_id}_{channel_id}"
+            
+            logger.info(f"📩 APP_MENTION detectado:")
+            logger.info(f"   👤 Usuario: {user_id}")
+            logger.info(f"   📺 Canal: {channel_id}")
+            logger.info(f"   💬 Texto: {text}")
+            logger.info(f"   🔑 Event ID: {event_id}")
+            
+            # Check for duplicate event
+            if event_deduplicator.is_processed(event_id):
+                logger.info(f"⏭️  Evento duplicado ignorado: {event_id}")
+                logger.info("=" * 60)
+                return {"ok": True}
+            
+            # Queue the turn for background processing
+            _schedule_turn(event, event_id)
+            logger.info("=" * 60)
+            
+            # Return 200 immediately to Slack
+            # (Slack requires response within 3 seconds)
+            return {"ok": True}
+        
+        # Handle message events in threads (conversation continuation)
+        if event_type == "message":
+            # Check if it's a thread message (not bot message, not system message)
+            thread_ts = event.get('thread_ts')
+            bot_id = event.get('bot_id')
+            subtype = event.get('subtype')
+            user_id = event.get('user')
+            channel_id = event.get('channel')
+            text = event.get('text', '')
+            event_ts = event.get('event_ts', '')
+            client_msg_id = event.get('client_msg_id', '')
+            
+            # Only process if:
+            # 1. It's in a thread (thread_ts exists)
+            # 2. It's not from the bot (no bot_id)
+            # 3. It's not a system message (no subtype, except file shares)
+            # 4. Has a user (user_id exists)
+            if thread_ts and not bot_id and subtype in (None, "file_share") and user_id:
+                # Create unique event ID for deduplication
+                event_id = client_msg_id if client_msg_id else f"{event_ts}_{user_id}_{channel_id}"
+                
+                logger.info(f"💬 MENSAJE EN THREAD detectado:")
+                logger.info(f"   👤 Usuario: {user_id}")
+                logger.info(f"   📺 Canal: {channel_id}")
+                logger.info(f"   🧵 Thread: {thread_ts}")
+                logger.info(f"   💬 Texto: {text}")
+                logger.info(f"   🔑 Event ID: {event_id}")
+                
+                # Check for duplicate event
+                if event_deduplicator.is_processed(event_id):
+                    logger.info(f"⏭️  Evento duplicado ignorado: {event_id}")
+                    logger.info("=" * 60)
+                    return {"ok": True}
+                
+                # Queue the turn for background processing (same as app_mention)
+                _schedule_turn(event, event_id)
+                logger.info("=" * 60)
+                
+                return {"ok": True}
+        
+        # Ignore other event types
+        logger.info(f"⚠️  Tipo de evento ignorado: {event_type}")
+        logger.info("=" * 60)
+        return {"ok": True}
+    
+    # Unknown event type
+    logger.warning(f"⚠️  Tipo de evento desconocido: {payload.type}")
+    logger.info("=" * 60)
+    return {"ok": True}
+
+
 @router.post("/events")
 async def slack_events(
     request: Request,
@@ -137,112 +332,43 @@ async def slack_events(
         
         logger.info("✅ Firma de Slack verificada correctamente")
         
-        # Parse the event payload
-        event_data = await request.json()
-        event_type_main = event_data.get("type")
+        # Only verified events are recorded (SLACK_EVENT_RECORD_PATH)
+        event_recorder.record("http", body, request.headers)
+        
+        # Parse the raw bytes once with orjson and validate the envelope
+        # (no second request.json() parse). orjson + model_validate is
+        # cheaper here than model_validate_json, which validates every
+        # value inside the free-form `event` dict.
+        try:
+            payload = SlackEventRequest.model_validate(orjson.loads(body))
+        except (orjson.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"⚠️  Payload de Slack inválido: {str(e)}")
+            logger.info("=" * 60)
+            return {"ok": True}
+        event_type_main = payload.type
         
         logger.info(f"📋 Tipo de evento principal: {event_type_main}")
         
         # Handle URL verification challenge
         if event_type_main == "url_verification":
-            challenge = event_data.get("challenge")
+            challenge = payload.challenge or ""
             logger.info(f"🔐 Slack URL verification challenge recibido: {challenge[:20]}...")
             return {"challenge": challenge}
         
-        # Handle event callbacks
-        if event_type_main == "event_callback":
-            event = event_data.get("event", {})
-            event_type = event.get("type")
-            
-            logger.info(f"📨 Event callback recibido - tipo: {event_type}")
-            logger.info(f"📝 Datos del evento: {event}")
-            
-            # Handle app_mention events (bot is mentioned with @)
-            if event_type == "app_mention":
-                user_id = event.get('user')
-                channel_id = event.get('channel')
-                text = event.get('text', '')
-                event_ts = event.get('event_ts', '')
-                client_msg_id = event.get('client_msg_id', '')
-                
-                # Create unique event ID for deduplication
-                # Prefer client_msg_id, fallback to event_ts + user + channel
-                event_id = client_msg_id if client_msg_id else f"{event_ts}_{user_id}_{channel_id}"
-                
-                logger.info(f"📩 APP_MENTION detectado:")
-                logger.info(f"   👤 Usuario: {user_id}")
-                logger.info(f"   📺 Canal: {channel_id}")
-                logger.info(f"   💬 Texto: {text}")
-                logger.info(f"   🔑 Event ID: {event_id}")
-                
-                # Check for duplicate event
-                if _is_event_processed(event_id):
-                    logger.info(f"⏭️  Evento duplicado ignorado: {event_id}")
-                    logger.info("=" * 60)
-                    return {"ok": True}
-                
-                # Launch background task for processing
-                asyncio.create_task(_process_app_mention_background(event, event_id))
-                
-                logger.info(f"🚀 Tarea en background iniciada para evento: {event_id}")
-                logger.info("=" * 60)
-                
-                # Return 200 immediately to Slack
-                # (Slack requires response within 3 seconds)
-                return {"ok": True}
-            
-            # Handle message events in threads (conversation continuation)
-            if event_type == "message":
-                # Check if it's a thread message (not bot message, not system message)
-                thread_ts = event.get('thread_ts')
-                bot_id = event.get('bot_id')
-                subtype = event.get('subtype')
-                user_id = event.get('user')
-                channel_id = event.get('channel')
-                text = event.get('text', '')
-                event_ts = event.get('event_ts', '')
-                client_msg_id = event.get('client_msg_id', '')
-                
-                # Only process if:
-                # 1. It's in a thread (thread_ts exists)
-                # 2. It's not from the bot (no bot_id)
-                # 3. It's not a system message (no subtype)
-                # 4. Has a user (user_id exists)
-                if thread_ts and not bot_id and not subtype and user_id:
-                    # Create unique event ID for deduplication
-                    event_id = client_msg_id if client_msg_id else f"{event_ts}_{user_id}_{channel_id}"
-                    
-                    logger.info(f"💬 MENSAJE EN THREAD detectado:")
-                    logger.info(f"   👤 Usuario: {user_id}")
-                    logger.info(f"   📺 Canal: {channel_id}")
-                    logger.info(f"   🧵 Thread: {thread_ts}")
-                    logger.info(f"   💬 Texto: {text}")
-                    logger.info(f"   🔑 Event ID: {event_id}")
-                    
-                    # Check for duplicate event
-                    if _is_event_processed(event_id):
-                        logger.info(f"⏭️  Evento duplicado ignorado: {event_id}")
-                        logger.info("=" * 60)
-                        return {"ok": True}
-                    
-                    # Launch background task for processing (same as app_mention)
-                    asyncio.create_task(_process_app_mention_background(event, event_id))
-                    
-                    logger.info(f"🚀 Tarea en background iniciada para mensaje en thread: {event_id}")
-                    logger.info("=" * 60)
-                    
-                    return {"ok": True}
-            
-            # Ignore other event types
-            logger.info(f"⚠️  Tipo de evento ignorado: {event_type}")
-            logger.info("=" * 60)
-            return {"ok": True}
+        # Handle event callbacks (and anything else) like Socket Mode does
+        return dispatch_slack_event(payload)
         
-        # Unknown event type
-        logger.warning(f"⚠️  Tipo de evento desconocido: {event_type_main}")
+    except HTTPException:
+        # Invalid signature: reject instead of acknowledging
         logger.info("=" * 60)
-        return {"ok": True}
-        
+        raise
+    except TurnQueueFull:
+        # Non-2xx so Slack retries the event once the queue has drained
+        logger.info("=" * 60)
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"ok": False, "error": "turn_queue_full"}
+        )
     except Exception as e:
         logger.error(f"❌ ERROR procesando evento de Slack: {str(e)}", exc_info=True)
         logger.info("=" * 60)
@@ -266,6 +392,7 @@ async def handle_app_mention(
     """
     try:
         logger.info("🔄 Iniciando procesamiento de mensaje...")
+        started = time.perf_counter()
         
         # Extract event data
         user_id = event.get("user")
@@ -273,39 +400,64 @@ async def handle_app_mention(
         text = event.get("text", "")
         message_ts = event.get("ts")
         thread_ts = event.get("thread_ts")  # If in a thread
+        files = event.get("files") or []
         
         logger.info(f"📝 Texto original: '{text}'")
         
+        # Slack lookups and the turn's DB preparation don't depend on each
+        # other: run them together. The session is only used by the prepare
+        # thread until it returns.
+        async def timed(stage: str, awaitable):
+            stage_started = time.perf_counter()
+            try:
+                return await awaitable
+            finally:
+                mention_timings.record(stage, (time.perf_counter() - stage_started) * 1000)
+        
+        logger.info(f"👤 Obteniendo usuario {user_id} y canal {channel_id} (Slack y BD en paralelo)...")
+        profile, prepared = await asyncio.gather(
+            timed("lookups", enrich_slack_event(slack_client, user_id, channel_id)),
+            timed("prepare", asyncio.to_thread(prepare_turn, db, "slack", user_id, channel_id))
+        )
+        user_name = profile["user_name"]
+        user_email = profile["user_email"]
+        channel_name = profile["channel_name"]
+        logger.info(
+            f"✅ Usuario: {user_name or user_id} ({user_email or 'sin email'}), canal: #{channel_name or channel_id}"
+        )
+        
         # Remove bot mention from text
-        cleaned_text = slack_client.remove_bot_mention(text)
+        if profile["bot_user_id"]:
+            cleaned_text = slack_client.remove_bot_mention(text, profile["bot_user_id"])
+        else:
+            cleaned_text = LEADING_MENTION.sub("", text).strip()
         
         logger.info(f"🧹 Texto limpio (sin mención del bot): '{cleaned_text}'")
         
-        if not cleaned_text:
+        if not cleaned_text and not files:
             logger.warning("⚠️  Texto vacío después de limpiar. Ignorando mensaje.")
             return
         
-        # Get user info
-        logger.info(f"👤 Obteniendo información del usuario {user_id}...")
-        try:
-            user_info = slack_client.get_user_info(user_id)
-            user_name = user_info.get("real_name") or user_info.get("name")
-            user_email = user_info.get("profile", {}).get("email")
-            logger.info(f"✅ Usuario: {user_name} ({user_email or 'sin email'})")
-        except Exception as e:
-            logger.warning(f"⚠️  No se pudo obtener info del usuario: {str(e)}")
-            user_name = user_id
-            user_email = None
-        
-        # Get channel info
-        logger.info(f"📺 Obteniendo información del canal {channel_id}...")
-        try:
-            channel_info = slack_client.get_channel_info(channel_id)
-            channel_name = channel_info.get("name", channel_id)
-            logger.info(f"✅ Canal: #{channel_name}")
-        except Exception as e:
-            logger.warning(f"⚠️  No se pudo obtener info del canal: {str(e)}")
-            channel_name = channel_id
+        # Download shared files (streamed to disk, content-addressed)
+        media = []
+        if files:
+            logger.info(f"📎 Descargando {len(files)} archivo(s) adjunto(s)...")
+            auth_headers = {"Authorization": f"Bearer {slack_client.bot_token}"}
+            media = list(await timed("media", asyncio.gather(*[
+                media_store.store(
+                    db,
+                    platform="slack",
+                    url=f.get("url_private_download") or f.get("url_private"),
+                    headers=auth_headers,
+                    filename=f.get("name"),
+                    content_type=f.get("mimetype"),
+                    declared_size=f.get("size")
+                )
+                for f in files
+                if f.get("url_private_download") or f.get("url_private")
+            ])))
+            if not cleaned_text:
+                cleaned_text = "[archivo: " + ", ".join(f.get("name") or "sin nombre" for f in files) + "]"
         
         # Prepare bot process request
         logger.info("📦 Preparando request para el bot...")
@@ -321,18 +473,19 @@ async def handle_app_mention(
             metadata={
                 "thread_ts": thread_ts,
                 "event_ts": event.get("event_ts"),
-                "channel_type": event.get("channel_type")
+                "channel_type": event.get("channel_type"),
+                **({"media": media} if media else {})
             }
         )
         
         logger.info(f"🤖 Enviando mensaje al endpoint del bot para procesamiento...")
         logger.info(f"   Plataforma: {bot_request.platform}")
-        logger.info(f"   Usuario: {bot_request.user_name}")
-        logger.info(f"   Canal: #{bot_request.channel_name}")
+        logger.info(f"   Usuario: {bot_request.user_name or user_id}")
+        logger.info(f"   Canal: #{bot_request.channel_name or channel_id}")
         logger.info(f"   Mensaje: '{bot_request.message_text}'")
         
         # Process message through bot endpoint
-        bot_response = await process_message(bot_request, db)
+        bot_response = await timed("process", process_message(bot_request, db, prepared=prepared))
         
         logger.info(f"✅ Respuesta recibida del bot (success={bot_response.success})")
         
@@ -343,19 +496,22 @@ async def handle_app_mention(
             logger.info(f"   Thread: {thread_ts or message_ts}")
             logger.info(f"   Respuesta: '{bot_response.bot_response[:100]}...'")
             
-            slack_client.send_message(
-                channel=channel_id,
-                text=bot_response.bot_response,
+            # Queued: chunked, rate limited and delivered in order by the sender,
+            # so the turn does not wait on Slack's per-channel limit
+            slack_send_queue.enqueue(
+                channel_id,
+                bot_response.bot_response,
                 thread_ts=thread_ts or message_ts  # Reply in thread if exists
             )
             
-            logger.info("✅ Mensaje enviado exitosamente a Slack")
+            mention_timings.record("critical_path", (time.perf_counter() - started) * 1000)
+            logger.info("✅ Respuesta encolada para Slack")
         else:
             logger.error(f"❌ Error en procesamiento del bot: {bot_response.error}")
             # Send error message to user
-            slack_client.send_message(
-                channel=channel_id,
-                text="Lo siento, hubo un error al procesar tu mensaje. Por favor intenta de nuevo.",
+            slack_send_queue.enqueue(
+                channel_id,
+                "Lo siento, hubo un error al procesar tu mensaje. Por favor intenta de nuevo.",
                 thread_ts=thread_ts or message_ts
             )
             logger.info("📤 Mensaje de error enviado al usuario")
@@ -364,9 +520,9 @@ async def handle_app_mention(
         logger.error(f"❌ Error procesando app_mention: {str(e)}", exc_info=True)
         # Try to send error message to user
         try:
-            slack_client.send_message(
-                channel=event.get("channel"),
-                text="Lo siento, hubo un error inesperado. Por favor intenta de nuevo más tarde.",
+            slack_send_queue.enqueue(
+                event.get("channel"),
+                "Lo siento, hubo un error inesperado. Por favor intenta de nuevo más tarde.",
                 thread_ts=event.get("thread_ts") or event.get("ts")
             )
             logger.info("📤 Mensaje de error inesperado enviado al usuario")
@@ -374,68 +530,89 @@ async def handle_app_mention(
             logger.error(f"❌ No se pudo enviar mensaje de error a Slack: {str(e2)}")
 
 
-@router.post("/send")
+@router.post("/send", status_code=status.HTTP_202_ACCEPTED)
 async def send_slack_message(
-    message_request: SlackMessageRequest
+    message_request: SlackMessageRequest,
+    wait: bool = False
 ):
     """
-    Send a message to Slack (for manual/admin use).
+    Queue a message to send to Slack (for manual/admin use).
+    Long texts are split into ordered chunks; messages to the same thread
+    are delivered in order and rate limited like bot replies.
     
     Args:
         message_request: Message details
+        wait: Wait for delivery and return the Slack response
         
     Returns:
-        Slack API response
+        Queue position, or the delivery result when wait=true
     """
     try:
-        slack_client = SlackClient()
-        
-        response = slack_client.send_message(
-            channel=message_request.channel,
-            text=message_request.text,
+        future = slack_send_queue.enqueue(
+            message_request.channel,
+            message_request.text,
             thread_ts=message_request.thread_ts
         )
-        
+    except SendQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    if not wait:
         return {
             "success": True,
-            "message_ts": response["ts"],
-            "channel": response["channel"]
+            "queued": True,
+            "channel": message_request.channel,
+            "queue_depth": slack_send_queue.depth()
+        }
+    
+    try:
+        responses = await future
+        return {
+            "success": True,
+            "queued": False,
+            "message_ts": responses[0]["ts"],
+            "chunks": len(responses),
+            "channel": responses[0]["channel"]
         }
-        
     except Exception as e:
         logger.error(f"Error sending message to Slack: {str(e)}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to send message: {str(e)}"
         )
 
 
 @router.get("/health")
-async def slack_health():
+async def slack_health(request: Request):
     """
     Health check for Slack connector.
+    Served from the background health monitor's cache (auth.test runs on
+    the monitor's interval, not on every probe).
     
+    Args:
+        request: FastAPI request object
+        
     Returns:
-        Status of Slack integration
+        Status of Slack integration and of the send queue, plus Socket
+        Mode counters when enabled and the event recorder state
     """
-    try:
-        slack_client = SlackClient()
-        # Test authentication
-        auth_response = slack_client.client.auth_test()
-        
-        logger.info(f"✅ Canal Slack conectado: bot_id={auth_response.get('user_id')}, team={auth_response.get('team')}")
-        
-        return {
-            "status": "healthy",
-            "connected": True,
-            "bot_user_id": auth_response.get("user_id"),
-            "team": auth_response.get("team")
-        }
-    except Exception as e:
-        logger.error(f"❌ Canal Slack no conectado: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "connected": False,
-            "error": str(e)
-        }
+    from app.services.health_monitor import health_monitor
+    
+    slack = health_monitor.get("slack")
+    socket_receiver = getattr(request.app.state, "slack_socket_receiver", None)
+    return {
+        "status": slack["status"],
+        "connected": slack["ok"] is True,
+        "bot_user_id": slack.get("bot_user_id"),
+        "team": slack.get("team"),
+        "checked_at": slack.get("checked_at"),
+        "age_seconds": slack.get("age_seconds"),
+        "error": slack.get("error"),
+        "send_queue": slack_send_queue.stats(),
+        "turn_stages_ms": mention_timings.stats(),
+        "socket_mode": socket_receiver.stats() if socket_receiver else None,
+        "event_recorder": event_recorder.stats()
+    }
 
@@ -1,75 +1,296 @@
 """
 WhatsApp/Whapi connector for BotDO API.
 Handles Whapi webhook events and message sending.
-
-TODO: Implement Whapi integration following the same pattern as Slack connector.
 """
-from fastapi import APIRouter, Request, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Request, HTTPException, status
+from pydantic import ValidationError
 import logging
+import asyncio
+from typing import Dict, List, Optional
 
-from app.database import get_db
+from app.schemas import WhapiWebhookRequest, WhapiMessage, WhapiMessageRequest, BotProcessRequest
+from app.services.whapi_client import WhapiClient
+from app.services.send_queue import SendQueueFull
+from app.services.whapi_sender import whapi_send_queue
+from app.services.event_dedup import event_deduplicator
+from app.services.media_store import media_store
+from app.services.turn_scheduler import turn_scheduler, classify_whatsapp_chat, TurnQueueFull
+from app.routers.bot import process_message
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/canales/whapi", tags=["Whapi Connector"])
 
+# Message types carrying a downloadable attachment
+MEDIA_TYPES = ("image", "video", "audio", "voice", "document", "sticker")
+
+# Last queued turn per chat: a chat's turns from different webhook batches
+# run one after another, so replies and history writes keep arrival order
+_chat_tails: Dict[str, asyncio.Future] = {}
+
+
+async def _process_chat_background(messages: List[WhapiMessage], previous: Optional[asyncio.Future] = None):
+    """
+    Process the messages of one chat in order.
+    Creates its own DB session since the request one is closed by then.
+
+    Args:
+        messages: Messages of a single chat, oldest first
+        previous: The chat's previously queued turn, awaited first
+    """
+    from app.database import SessionLocal
+
+    if previous is not None:
+        # Shielded: cancelling this turn must not cancel the one before it
+        await asyncio.gather(asyncio.shield(previous), return_exceptions=True)
+
+    db = SessionLocal()
+    try:
+        for message in messages:
+            try:
+                await handle_whapi_message(message, db)
+            except Exception as e:
+                logger.error(f"❌ Error procesando mensaje de Whapi {message.id}: {str(e)}", exc_info=True)
+    finally:
+        db.close()
+
+
+def _schedule(messages: List[WhapiMessage]) -> List[WhapiMessage]:
+    """
+    Fan a webhook batch out: one turn per chat, queued in the chat's
+    priority lane (direct chats ahead of groups) and chained after the
+    chat's previous turn.
+
+    Args:
+        messages: New text messages of the batch
+
+    Returns:
+        Messages whose turn could not be queued (their lane is full)
+    """
+    rejected: List[WhapiMessage] = []
+    by_chat: Dict[str, List[WhapiMessage]] = {}
+    for message in messages:
+        by_chat.setdefault(message.chat_id, []).append(message)
+
+    for chat_id, chat_messages in by_chat.items():
+        chat_messages.sort(key=lambda m: m.timestamp or 0)
+        previous = _chat_tails.get(chat_id)
+        try:
+            turn = turn_scheduler.submit(
+                classify_whatsapp_chat(chat_id),
+                lambda chat_messages=chat_messages, previous=previous: _process_chat_background(chat_messages, previous)
+            )
+        except TurnQueueFull as e:
+            logger.error(f"❌ {len(chat_messages)} mensaje(s) de {chat_id} rechazados, Whapi los reintentará: {str(e)}")
+            rejected.extend(chat_messages)
+            continue
+        _chat_tails[chat_id] = turn
+        turn.add_done_callback(
+            lambda f, chat_id=chat_id: _chat_tails.pop(chat_id) if _chat_tails.get(chat_id) is f else None
+        )
+    return rejected
+
 
 @router.post("/events")
-async def whapi_events(
-    request: Request,
-    db: Session = Depends(get_db)
-):
+async def whapi_events(request: Request):
     """
     Receive webhook events from Whapi.
-    
-    TODO: Implement Whapi event handling
-    - Verify webhook signature
-    - Parse incoming messages
-    - Call bot processing endpoint
-    - Send response back via Whapi API
-    
+
+    Whapi delivers messages in batches. The batch is verified, filtered
+    (own messages, unsupported types and duplicates are skipped) and acknowledged
+    immediately; processing continues in the turn scheduler, one turn per
+    chat. If a chat's lane is full the batch is answered with 503 so Whapi
+    delivers it again.
+
     Args:
         request: FastAPI request object
-        db: Database session
-        
+
     Returns:
         Response to Whapi
     """
-    logger.info("Whapi events endpoint called (not yet implemented)")
-    return {"status": "not_implemented"}
+    whapi_client = WhapiClient()
+
+    if not whapi_client.verify_webhook(
+        request.headers.get("X-Webhook-Secret"),
+        request.query_params.get("token")
+    ):
+        logger.error("❌ Webhook de Whapi no verificado - REQUEST RECHAZADO")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook secret"
+        )
+
+    try:
+        payload = WhapiWebhookRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        logger.warning(f"⚠️  Payload de Whapi inválido: {str(e)}")
+        # Return 200 so Whapi does not retry a payload we will never accept
+        return {"ok": True, "accepted": 0}
+
+    accepted = []
+    for message in payload.messages:
+        if message.from_me:
+            continue
+        is_text = message.type == "text" and (message.text or {}).get("body")
+        is_media = message.type in MEDIA_TYPES and getattr(message, message.type)
+        if not (is_text or is_media):
+            logger.info(f"⚠️  Mensaje de Whapi ignorado (tipo {message.type}): {message.id}")
+            continue
+        if event_deduplicator.is_processed(f"whapi:{message.id}"):
+            logger.info(f"⏭️  Mensaje duplicado ignorado: {message.id}")
+            continue
+        accepted.append(message)
+
+    rejected = _schedule(accepted) if accepted else []
+
+    logger.info(f"📨 Lote de Whapi recibido: {len(payload.messages)} mensajes, {len(accepted)} aceptados")
+
+    if rejected:
+        # Unmark them and answer 503 so Whapi redelivers the batch; the
+        # messages that were queued are skipped then as duplicates
+        for message in rejected:
+            event_deduplicator.forget(f"whapi:{message.id}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Turn queue full, {len(rejected)} message(s) not accepted"
+        )
+
+    # Return 200 immediately so Whapi does not time out and retry
+    return {"ok": True, "accepted": len(accepted)}
+
+
+async def handle_whapi_message(
+    message: WhapiMessage,
+    db
+):
+    """
+    Process one incoming WhatsApp message and queue the reply.
+    Attachments are downloaded first and referenced from the metadata.
+
+    Args:
+        message: Whapi message
+        db: Database session
+    """
+    sender = message.from_ or message.chat_id.split("@")[0]
+    metadata = {
+        "chat_id": message.chat_id,
+        "source": message.source,
+        "whapi_timestamp": message.timestamp
+    }
+
+    if message.type in MEDIA_TYPES:
+        payload = getattr(message, message.type)
+        whapi_client = WhapiClient()
+        url = whapi_client.media_download_url(payload)
+        if url:
+            # Direct links are pre-signed; only the Whapi API itself wants the token
+            auth_headers = None
+            if url.startswith(whapi_client.base_url):
+                auth_headers = {"Authorization": whapi_client.headers["Authorization"]}
+            metadata["media"] = [await media_store.store(
+                db,
+                platform="whatsapp",
+                url=url,
+                headers=auth_headers,
+                filename=payload.get("filename"),
+                content_type=payload.get("mime_type"),
+                declared_size=payload.get("file_size")
+            )]
+        text = (payload.get("caption") or "").strip() or f"[{message.type}]"
+    else:
+        text = message.text["body"].strip()
+
+    bot_request = BotProcessRequest(
+        platform="whatsapp",
+        platform_message_id=message.id,
+        platform_channel_id=message.chat_id,
+        platform_user_id=sender,
+        message_text=text,
+        user_name=message.from_name or sender,
+        channel_name=message.chat_name or message.from_name or message.chat_id,
+        metadata=metadata
+    )
 
+    bot_response = await process_message(bot_request, db)
 
-@router.post("/send")
+    if bot_response.success:
+        await whapi_send_queue.send(message.chat_id, bot_response.bot_response)
+        logger.info(f"✅ Respuesta enviada a WhatsApp: {message.chat_id}")
+    else:
+        logger.error(f"❌ Error en procesamiento del bot: {bot_response.error}")
+        await whapi_send_queue.send(
+            message.chat_id,
+            "Lo siento, hubo un error al procesar tu mensaje. Por favor intenta de nuevo."
+        )
+
+
+@router.post("/send", status_code=status.HTTP_202_ACCEPTED)
 async def send_whapi_message(
-    request: Request
+    message_request: WhapiMessageRequest,
+    wait: bool = False
 ):
     """
-    Send a message via Whapi (for manual/admin use).
-    
-    TODO: Implement message sending via Whapi API
-    
+    Queue a message to send via Whapi (for manual/admin use).
+    Messages to the same chat are delivered in order and rate limited
+    like bot replies.
+
     Args:
-        request: Message details
-        
+        message_request: Message details
+        wait: Wait for delivery and return the Whapi response
+
     Returns:
-        Whapi API response
+        Queue position, or the delivery result when wait=true
     """
-    logger.info("Whapi send endpoint called (not yet implemented)")
-    return {"status": "not_implemented"}
+    try:
+        future = whapi_send_queue.enqueue(message_request.to, message_request.body)
+    except SendQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+    if not wait:
+        return {
+            "success": True,
+            "queued": True,
+            "to": message_request.to,
+            "queue_depth": whapi_send_queue.depth()
+        }
+
+    try:
+        response = await future
+        return {
+            "success": True,
+            "queued": False,
+            "message_id": response.get("message", {}).get("id"),
+            "to": message_request.to
+        }
+    except Exception as e:
+        logger.error(f"Error sending message to Whapi: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to send message: {str(e)}"
+        )
 
 
 @router.get("/health")
 async def whapi_health():
     """
     Health check for Whapi connector.
-    
+    Connectivity comes from the background health monitor's cache.
+
     Returns:
-        Status of Whapi integration
+        Status of Whapi integration and of the send queue
     """
+    from app.services.health_monitor import health_monitor
+
+    whapi = health_monitor.get("whapi")
     return {
-        "status": "not_implemented",
-        "connected": False,
-        "message": "Whapi integration not yet implemented"
+        "status": whapi["status"],
+        "connected": whapi["ok"] is True,
+        "checked_at": whapi.get("checked_at"),
+        "age_seconds": whapi.get("age_seconds"),
+        "error": whapi.get("error"),
+        "webhook_secret_configured": bool(WhapiClient().webhook_secret),
+        "send_queue": whapi_send_queue.stats()
     }
-
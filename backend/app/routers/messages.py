@@ -9,7 +9,7 @@ from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_admin_db, get_read_db
 from app.models import AdminUser, Message
 from app.schemas import (
     MessageCreate,
@@ -18,6 +18,8 @@ from app.schemas import (
     MessageFilter
 )
 from app.auth import get_current_user
+from app.services.archive_service import ArchiveService
+from app.services.projection import MESSAGE_FIELDS, projected_response
 
 router = APIRouter(prefix="/api/messages", tags=["Messages"])
 
@@ -31,7 +33,12 @@ def list_messages(
     date_to: Optional[datetime] = Query(None, description="Filter messages until this date"),
     limit: int = Query(100, ge=1, le=1000, description="Number of messages to return"),
     offset: int = Query(0, ge=0, description="Number of messages to skip"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return (e.g. id,timestamp,message_text); "
+                    "selects only those columns and skips ORM/pydantic processing"
+    ),
+    db: Session = Depends(get_read_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -46,43 +53,111 @@ def list_messages(
         date_to: End date for filtering
         limit: Maximum number of messages to return
         offset: Number of messages to skip (for pagination)
+        fields: Optional projection; only these fields are returned
         db: Database session
         current_user: Authenticated user
         
     Returns:
         List of messages matching the filters
+        
+    Raises:
+        HTTPException: If `fields` lists an unknown field
     """
-    query = db.query(Message)
-    
-    # Apply filters
+    # Build filters
+    conditions = []
     if channel:
-        query = query.filter(Message.channel == channel)
+        conditions.append(Message.channel == channel)
     
     if direction:
-        query = query.filter(Message.direction == direction)
+        conditions.append(Message.direction == direction)
     
     if sender_type:
-        query = query.filter(Message.sender_type == sender_type)
+        conditions.append(Message.sender_type == sender_type)
     
     if date_from:
-        query = query.filter(Message.timestamp >= date_from)
+        conditions.append(Message.timestamp >= date_from)
     
     if date_to:
-        query = query.filter(Message.timestamp <= date_to)
+        conditions.append(Message.timestamp <= date_to)
     
     # Order by timestamp descending (most recent first)
-    query = query.order_by(Message.timestamp.desc())
+    order_by = [Message.timestamp.desc()]
+    
+    if fields:
+        try:
+            return projected_response(
+                db, MESSAGE_FIELDS, fields,
+                conditions=conditions, order_by=order_by, offset=offset, limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     
     # Apply pagination
-    messages = query.offset(offset).limit(limit).all()
+    messages = db.query(Message).filter(*conditions).order_by(*order_by).offset(offset).limit(limit).all()
     
     return messages
 
 
+@router.get("/channel/{channel_id}", response_model=List[MessageResponse])
+def list_channel_messages(
+    channel_id: UUID,
+    date_from: Optional[datetime] = Query(None, description="Filter messages from this date"),
+    date_to: Optional[datetime] = Query(None, description="Filter messages until this date"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of messages to return"),
+    db: Session = Depends(get_read_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    List a channel's messages, reading archived ranges transparently.
+    Requires authentication.
+    
+    Args:
+        channel_id: Database UUID of the channel
+        date_from: Start date for filtering
+        date_to: End date for filtering
+        limit: Maximum number of messages to return
+        db: Database session
+        current_user: Authenticated user
+        
+    Returns:
+        Messages from Postgres and the archive, most recent first
+    """
+    query = db.query(Message).filter(Message.channel_id == channel_id)
+    
+    if date_from:
+        query = query.filter(Message.timestamp >= date_from)
+    
+    if date_to:
+        query = query.filter(Message.timestamp <= date_to)
+    
+    hot_messages = query.order_by(Message.timestamp.desc()).limit(limit).all()
+    
+    # Only touch the archive when the hot rows don't fill the page; the
+    # newest `limit` archived rows are enough to complete it
+    archived_messages = []
+    if len(hot_messages) < limit:
+        hot_ids = {message.id for message in hot_messages}
+        for row in ArchiveService(db).read_archived(channel_id, date_from, date_to, limit=limit):
+            if row["id"] not in hot_ids:
+                row["metadata"] = row.get("platform_metadata")
+                archived_messages.append(row)
+    
+    messages = hot_messages + archived_messages
+    messages.sort(
+        key=lambda m: m["timestamp"] if isinstance(m, dict) else m.timestamp,
+        reverse=True
+    )
+    
+    return messages[:limit]
+
+
 @router.post("/", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 def create_message(
     message_data: MessageCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -131,7 +206,7 @@ def create_message(
 @router.get("/{message_id}", response_model=MessageResponse)
 def get_message(
     message_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -164,7 +239,7 @@ def get_message(
 def update_message(
     message_id: UUID,
     message_data: MessageUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -212,7 +287,7 @@ def update_message(
 @router.delete("/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_message(
     message_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -0,0 +1,108 @@
+"""
+Statistics routes for BotDO API.
+Serves message volume time series from the hourly rollup tables.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.database import get_read_db
+from app.models import AdminUser
+from app.auth import get_current_user
+from app.services.rollup_service import RollupService
+
+router = APIRouter(prefix="/api/stats", tags=["Stats"])
+
+
+@router.get("/")
+def get_stats(
+    date_from: Optional[datetime] = Query(None, description="Series start (default: 7 days ago)"),
+    date_to: Optional[datetime] = Query(None, description="Series end (default: now)"),
+    granularity: str = Query("hour", description="Bucket size: hour, day, week, month"),
+    group_by: Optional[str] = Query(None, description="Split by: channel, direction, sender_type, channel_id"),
+    channel: Optional[str] = Query(None, description="Filter by channel (slack, whatsapp, web)"),
+    direction: Optional[str] = Query(None, description="Filter by direction (inbound, outbound)"),
+    sender_type: Optional[str] = Query(None, description="Filter by sender type (bot, user)"),
+    channel_id: Optional[UUID] = Query(None, description="Filter by channel UUID"),
+    db: Session = Depends(get_read_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Get message volume over time.
+    Reads only the hourly rollups, so cost depends on the range, not table size.
+    Requires authentication.
+
+    Args:
+        date_from: Series start
+        date_to: Series end
+        granularity: Bucket size
+        group_by: Optional dimension to split the series by
+        channel: Filter by channel origin
+        direction: Filter by message direction
+        sender_type: Filter by sender type
+        channel_id: Filter by channel UUID
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        Time series points with bucket, count and the group_by dimension
+    """
+    date_to = date_to or datetime.now()
+    date_from = date_from or date_to - timedelta(days=7)
+
+    try:
+        series = RollupService(db).get_series(
+            date_from=date_from,
+            date_to=date_to,
+            granularity=granularity,
+            group_by=group_by,
+            filters={
+                "channel": channel,
+                "direction": direction,
+                "sender_type": sender_type,
+                "channel_id": channel_id
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "granularity": granularity,
+        "group_by": group_by,
+        "total": sum(point["count"] for point in series),
+        "series": series
+    }
+
+
+@router.get("/reconcile")
+def reconcile_stats(
+    date_from: Optional[datetime] = Query(None, description="Range start (default: 24 hours ago)"),
+    date_to: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    db: Session = Depends(get_read_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Check the rollups against a GROUP BY over the raw messages table.
+    This scans messages in the range, so keep the range small.
+    Requires authentication.
+
+    Args:
+        date_from: Range start
+        date_to: Range end
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        Totals from both sources and any mismatching groups
+    """
+    date_to = date_to or datetime.now()
+    date_from = date_from or date_to - timedelta(hours=24)
+
+    return RollupService(db).reconcile(date_from, date_to)
@@ -8,7 +8,7 @@ from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_admin_db, get_read_db
 from app.models import AdminUser, User
 from app.schemas import (
     UserCreate,
@@ -16,6 +16,7 @@ from app.schemas import (
     UserResponse
 )
 from app.auth import get_current_user
+from app.services.projection import USER_FIELDS, projected_response
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -25,7 +26,12 @@ def list_users(
     platform: Optional[str] = Query(None, description="Filter by platform (slack, whatsapp, web)"),
     limit: int = Query(100, ge=1, le=1000, description="Number of users to return"),
     offset: int = Query(0, ge=0, description="Number of users to skip"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return (e.g. id,display_name,email); "
+                    "selects only those columns and skips ORM/pydantic processing"
+    ),
+    db: Session = Depends(get_read_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -36,23 +42,36 @@ def list_users(
         platform: Filter by platform
         limit: Maximum number of users to return
         offset: Number of users to skip (for pagination)
+        fields: Optional projection; only these fields are returned
         db: Database session
         current_user: Authenticated user
         
     Returns:
         List of users matching the filters
+        
+    Raises:
+        HTTPException: If `fields` lists an unknown field
     """
-    query = db.query(User)
-    
     # Apply platform filter
-    if platform:
-        query = query.filter(User.platform == platform)
+    conditions = [User.platform == platform] if platform else []
     
     # Order by created_at descending (most recent first)
-    query = query.order_by(User.created_at.desc())
+    order_by = [User.created_at.desc()]
+    
+    if fields:
+        try:
+            return projected_response(
+                db, USER_FIELDS, fields,
+                conditions=conditions, order_by=order_by, offset=offset, limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
     
     # Apply pagination
-    users = query.offset(offset).limit(limit).all()
+    users = db.query(User).filter(*conditions).order_by(*order_by).offset(offset).limit(limit).all()
     
     return users
 
@@ -60,7 +79,7 @@ def list_users(
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -111,7 +130,7 @@ def create_user(
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -144,7 +163,7 @@ def get_user(
 def update_user(
     user_id: UUID,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -192,7 +211,7 @@ def update_user(
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """
@@ -1,8 +1,8 @@
 """
 Pydantic schemas for request/response validation in BotDO API.
 """
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, EmailStr, Field, AliasChoices, validator
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import UUID
 
@@ -83,6 +83,10 @@ class UserUpdate(BaseModel):
 class UserResponse(UserBase):
     """Schema for user response"""
     id: UUID
+    # The ORM column is platform_metadata (`metadata` is SQLAlchemy's MetaData)
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("platform_metadata", "metadata")
+    )
     created_at: datetime
     updated_at: datetime
     
@@ -179,6 +183,10 @@ class MessageUpdate(BaseModel):
 class MessageResponse(MessageBase):
     """Schema for message response"""
     id: UUID
+    # The ORM column is platform_metadata (`metadata` is SQLAlchemy's MetaData)
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("platform_metadata", "metadata")
+    )
     user_id: Optional[UUID] = None
     channel_id: Optional[UUID] = None
     created_at: datetime
@@ -289,3 +297,44 @@ class SlackMessageRequest(BaseModel):
     text: str = Field(..., description="Message text to send")
     thread_ts: Optional[str] = Field(None, description="Thread timestamp for replies")
 
+
+
+# ============================================
+# Whapi Event Schemas
+# ============================================
+
+class WhapiMessage(BaseModel):
+    """Schema for a message in a Whapi webhook batch"""
+    id: str
+    type: str
+    chat_id: str
+    from_me: bool = False
+    timestamp: Optional[int] = None
+    source: Optional[str] = None
+    text: Optional[Dict[str, Any]] = None
+    # Media payloads (id, mime_type, file_size, link, caption...), keyed by type
+    image: Optional[Dict[str, Any]] = None
+    video: Optional[Dict[str, Any]] = None
+    audio: Optional[Dict[str, Any]] = None
+    voice: Optional[Dict[str, Any]] = None
+    document: Optional[Dict[str, Any]] = None
+    sticker: Optional[Dict[str, Any]] = None
+    from_: Optional[str] = Field(None, alias="from")
+    from_name: Optional[str] = None
+    chat_name: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+
+
+class WhapiWebhookRequest(BaseModel):
+    """Schema for Whapi webhook request (messages arrive in batches)"""
+    messages: List[WhapiMessage] = Field(default_factory=list)
+    event: Optional[Dict[str, Any]] = None
+    channel_id: Optional[str] = None
+
+
+class WhapiMessageRequest(BaseModel):
+    """Schema for sending messages via Whapi"""
+    to: str = Field(..., description="WhatsApp chat ID (phone@s.whatsapp.net or group@g.us)")
+    body: str = Field(..., description="Message text to send")
@@ -0,0 +1,271 @@
+"""
+Agent Endpoint Pool for BotDO.
+Spreads agent calls over several Digital Ocean agent endpoints
+(DIGITALOCEAN_AGENT_ENDPOINTS) instead of a single DIGITALOCEAN_API_URL:
+- static weights per endpoint
+- selection by least outstanding requests or by latency EWMA (power of two
+  random choices, so workers do not all pile onto the same "best" endpoint)
+- passive health: an endpoint failing AGENT_EJECT_FAILURES times in a row is
+  ejected for a growing period, then re-admitted on probation
+- per-endpoint counters, outstanding requests and latency
+"""
+import logging
+import math
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated endpoints: url|weight|agent_id|api_key (only url is required;
+# agent_id and api_key default to DIGITALOCEAN_AGENT_ID / DIGITALOCEAN_API_KEY)
+DIGITALOCEAN_AGENT_ENDPOINTS = os.getenv("DIGITALOCEAN_AGENT_ENDPOINTS", "")
+# "ewma" (latency x load, power of two choices) or "least_outstanding"
+AGENT_LB_STRATEGY = os.getenv("AGENT_LB_STRATEGY", "ewma")
+# Seconds after which a latency sample weighs 1/e of a fresh one
+AGENT_EWMA_DECAY_SECONDS = float(os.getenv("AGENT_EWMA_DECAY_SECONDS", "10"))
+# Consecutive failures (network, 429, 5xx) that eject an endpoint
+AGENT_EJECT_FAILURES = int(os.getenv("AGENT_EJECT_FAILURES", "3"))
+# First ejection period; doubles on each ejection in a row, up to AGENT_EJECT_MAX_SECONDS
+AGENT_EJECT_SECONDS = float(os.getenv("AGENT_EJECT_SECONDS", "30"))
+AGENT_EJECT_MAX_SECONDS = float(os.getenv("AGENT_EJECT_MAX_SECONDS", "300"))
+
+
+class AgentEndpoint:
+    """
+    One agent endpoint with its load, latency and health state.
+    """
+
+    def __init__(self, url: str, agent_id: Optional[str], api_key: Optional[str], weight: float = 1.0):
+        """
+        Initialize endpoint.
+
+        Args:
+            url: Agent API base URL (direct *.agents.do-ai.run or the DO API)
+            agent_id: Agent ID (used with the DO API URL)
+            api_key: Bearer token for this endpoint
+            weight: Relative share of traffic
+        """
+        self.url = url.rstrip("/")
+        self.agent_id = agent_id
+        self.api_key = api_key
+        self.weight = max(weight, 0.01)
+        self.direct = ".agents.do-ai.run" in self.url
+        host = urlparse(self.url).netloc or self.url
+        self.name = host if self.direct or not agent_id else f"{host}/{agent_id}"
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        self.outstanding = 0
+        self.ewma_ms: Optional[float] = None
+        self._ewma_at = 0.0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def chat_url(self) -> str:
+        """Chat completion URL of this endpoint."""
+        if self.direct:
+            return f"{self.url}/api/v1/chat/completions"
+        return f"{self.url}/ai/agents/{self.agent_id}/chat"
+
+    @property
+    def info_url(self) -> str:
+        """URL used for warm-up and health probes."""
+        if self.direct:
+            return f"{self.url}/health"
+        return f"{self.url}/ai/agents/{self.agent_id}"
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def score(self, strategy: str) -> float:
+        """Lower is better: expected wait for a new request, per unit of weight."""
+        load = self.outstanding + 1
+        if strategy == "least_outstanding":
+            return load / self.weight
+        # An endpoint without samples looks fast, so it gets measured quickly
+        return (self.ewma_ms or 0.0) * load / self.weight
+
+    def observe(self, latency_ms: float, now: float):
+        """Fold a latency sample into the time-decayed EWMA."""
+        if self.ewma_ms is None:
+            self.ewma_ms = latency_ms
+        else:
+            decay = math.exp(-(now - self._ewma_at) / AGENT_EWMA_DECAY_SECONDS)
+            self.ewma_ms = self.ewma_ms * decay + latency_ms * (1 - decay)
+        self._ewma_at = now
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.failures,
+            "ejections": self.ejections,
+            "ejected_for_seconds": round(max(0.0, self.ejected_until - now), 1)
+        }
+
+
+def parse_endpoints(spec: str, agent_id: Optional[str], api_key: Optional[str]) -> List[AgentEndpoint]:
+    """
+    Parse DIGITALOCEAN_AGENT_ENDPOINTS.
+
+    Args:
+        spec: Comma-separated url|weight|agent_id|api_key entries
+        agent_id: Default agent ID
+        api_key: Default API key
+
+    Returns:
+        Endpoints in the order given
+
+    Raises:
+        ValueError: If a weight is not a number
+    """
+    endpoints = []
+    for entry in spec.split(","):
+        fields = [field.strip() for field in entry.split("|")]
+        if not fields[0]:
+            continue
+        fields += [""] * (4 - len(fields))
+        url, weight, endpoint_agent_id, endpoint_api_key = fields[:4]
+        try:
+            weight_value = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for agent endpoint {url}: {weight}")
+        endpoints.append(AgentEndpoint(url, endpoint_agent_id or agent_id, endpoint_api_key or api_key, weight_value))
+    return endpoints
+
+
+class AgentEndpointPool:
+    """
+    Chooses an agent endpoint per request and tracks their health.
+    """
+
+    def __init__(self, endpoints: List[AgentEndpoint], strategy: str = AGENT_LB_STRATEGY):
+        """
+        Initialize pool.
+
+        Args:
+            endpoints: Endpoints to balance over (at least one)
+            strategy: "ewma" or "least_outstanding"
+        """
+        if not endpoints:
+            raise ValueError("At least one agent endpoint is required")
+        if strategy not in ("ewma", "least_outstanding"):
+            raise ValueError(f"Unknown AGENT_LB_STRATEGY: {strategy}")
+        self.endpoints = endpoints
+        self.strategy = strategy
+
+    def choose(self, exclude: Optional[AgentEndpoint] = None) -> AgentEndpoint:
+        """
+        Pick the endpoint for the next request.
+
+        Two endpoints are drawn at random in proportion to their weights and
+        the one with the lower score wins. Ejected endpoints are skipped
+        unless every endpoint is ejected.
+
+        Args:
+            exclude: Endpoint to avoid (the one that just failed), if others exist
+
+        Returns:
+            Chosen endpoint
+        """
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e.available(now) and e is not exclude]
+        if not candidates:
+            # Everything is ejected: keep serving from all of them rather than failing
+            candidates = [e for e in self.endpoints if e is not exclude] or self.endpoints
+        if len(candidates) <= 2:
+            pair = candidates
+        else:
+            first = random.choices(candidates, weights=[e.weight for e in candidates])[0]
+            rest = [e for e in candidates if e is not first]
+            pair = [first, random.choices(rest, weights=[e.weight for e in rest])[0]]
+        return min(pair, key=lambda e: e.score(self.strategy))
+
+    def begin(self, endpoint: AgentEndpoint) -> float:
+        """Mark a request as outstanding; returns its start time."""
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        return time.monotonic()
+
+    def succeed(self, endpoint: AgentEndpoint, started: float):
+        """Record a successful request: latency sample, health reset."""
+        now = time.monotonic()
+        endpoint.outstanding -= 1
+        endpoint.observe((now - started) * 1000, now)
+        if endpoint.ejections:
+            logger.info(f"✅ Endpoint del agente {endpoint.name} readmitido")
+        endpoint.failures = 0
+        endpoint.ejections = 0
+
+    def fail(self, endpoint: AgentEndpoint, started: float):
+        """Record a failed request; ejects the endpoint after too many in a row."""
+        now = time.monotonic()
+        endpoint.outstanding -= 1
+        endpoint.errors += 1
+        endpoint.failures += 1
+        # Failures are slow or instant; neither says much about latency, so
+        # only penalize: a failing endpoint must not look fast
+        endpoint.observe(max((now - started) * 1000, endpoint.ewma_ms or 0.0), now)
+        if endpoint.failures >= AGENT_EJECT_FAILURES and endpoint.available(now):
+            endpoint.ejections += 1
+            period = min(AGENT_EJECT_MAX_SECONDS, AGENT_EJECT_SECONDS * 2 ** (endpoint.ejections - 1))
+            endpoint.ejected_until = now + period
+            # On re-admission a single failure ejects it again
+            endpoint.failures = AGENT_EJECT_FAILURES - 1
+            logger.warning(
+                f"⚠️  Endpoint del agente {endpoint.name} expulsado por {period:.0f}s "
+                f"({AGENT_EJECT_FAILURES} fallos seguidos)"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Strategy and per-endpoint state."""
+        now = time.monotonic()
+        return {
+            "strategy": self.strategy,
+            "endpoints": [endpoint.stats(now) for endpoint in self.endpoints]
+        }
+
+
+_pool: Optional[AgentEndpointPool] = None
+
+
+def agent_pool_configured() -> bool:
+    """
+    Whether an agent pool can be built: DIGITALOCEAN_AGENT_ENDPOINTS (each
+    entry may carry its own agent ID and key), or DIGITALOCEAN_AGENT_ID
+    with DIGITALOCEAN_API_KEY.
+    """
+    if DIGITALOCEAN_AGENT_ENDPOINTS.strip():
+        return True
+    return bool(os.getenv("DIGITALOCEAN_AGENT_ID") and os.getenv("DIGITALOCEAN_API_KEY"))
+
+
+def get_agent_pool() -> AgentEndpointPool:
+    """
+    Get the process-wide endpoint pool, built on first use from
+    DIGITALOCEAN_AGENT_ENDPOINTS or, if unset, DIGITALOCEAN_API_URL.
+
+    Returns:
+        Shared AgentEndpointPool
+    """
+    global _pool
+    if _pool is None:
+        agent_id = os.getenv("DIGITALOCEAN_AGENT_ID")
+        api_key = os.getenv("DIGITALOCEAN_API_KEY")
+        endpoints = parse_endpoints(DIGITALOCEAN_AGENT_ENDPOINTS, agent_id, api_key) if DIGITALOCEAN_AGENT_ENDPOINTS.strip() else [
+            AgentEndpoint(os.getenv("DIGITALOCEAN_API_URL", "https://api.digitalocean.com/v2"), agent_id, api_key)
+        ]
+        _pool = AgentEndpointPool(endpoints)
+    return _pool
@@ -0,0 +1,475 @@
+"""
+Archive Service for BotDO.
+Moves old messages out of Postgres into compressed NDJSON segment files on
+local disk, indexed by a manifest per channel and time range.
+"""
+import asyncio
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterator
+from uuid import UUID
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Message
+
+logger = logging.getLogger(__name__)
+
+# Root directory for segment files and the manifest
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+# Rows read and deleted per transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+# Maximum rows written to a single segment file
+ARCHIVE_SEGMENT_MAX_ROWS = int(os.getenv("ARCHIVE_SEGMENT_MAX_ROWS", "50000"))
+# Archive messages older than this many days in the background (0 disables)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+# Seconds between background archival runs
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "86400"))
+
+# Channel key used for messages without a channel
+NO_CHANNEL_KEY = "none"
+
+# Advisory lock key so only one worker archives at a time
+_ARCHIVE_LOCK_KEY = 0x6D736761  # "msga"
+
+# Serializes manifest rewrites within this process
+_manifest_lock = threading.Lock()
+
+_ARCHIVED_COLUMNS = [
+    "id", "message_id", "channel", "direction", "sender_type", "user_id",
+    "channel_id", "message_text", "timestamp", "platform_metadata",
+    "created_at", "updated_at"
+]
+
+
+def _serialize_message(message: Message) -> Dict[str, Any]:
+    """Convert a Message row into a JSON-serializable dict."""
+    row = {}
+    for column in _ARCHIVED_COLUMNS:
+        value = getattr(message, column)
+        if isinstance(value, UUID):
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        row[column] = value
+    return row
+
+
+def _deserialize_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an archived dict back into column values."""
+    values = dict(row)
+    for column in ("id", "user_id", "channel_id"):
+        if values.get(column):
+            values[column] = UUID(values[column])
+    for column in ("timestamp", "created_at", "updated_at"):
+        if values.get(column):
+            values[column] = datetime.fromisoformat(values[column])
+    return values
+
+
+def _channel_key(channel_id: Optional[UUID]) -> str:
+    """Manifest key for a channel UUID."""
+    return str(channel_id) if channel_id else NO_CHANNEL_KEY
+
+
+class ArchiveService:
+    """
+    Service for archiving, reading and restoring cold messages.
+    """
+
+    def __init__(self, db: Session, archive_dir: str = ARCHIVE_DIR):
+        """
+        Initialize archive service.
+
+        Args:
+            db: Database session
+            archive_dir: Directory holding segments and manifest
+        """
+        self.db = db
+        self.archive_dir = archive_dir
+        self.manifest_path = os.path.join(archive_dir, "manifest.json")
+
+    # ----------------------------------------
+    # Manifest
+    # ----------------------------------------
+
+    def load_manifest(self) -> Dict[str, Any]:
+        """
+        Load the archive manifest.
+
+        Returns:
+            Manifest dict: {"channels": {channel_key: [segment, ...]}}
+        """
+        if not os.path.exists(self.manifest_path):
+            return {"channels": {}}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        """Atomically replace the manifest file."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def find_segments(
+        self,
+        channel_id: Optional[UUID],
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the segments of a channel that overlap a time range.
+
+        Args:
+            channel_id: Database UUID of the channel (None for channel-less messages)
+            date_from: Range start (inclusive)
+            date_to: Range end (inclusive)
+
+        Returns:
+            Matching manifest segment entries
+        """
+        segments = self.load_manifest()["channels"].get(_channel_key(channel_id), [])
+        matches = []
+        for segment in segments:
+            if date_from and datetime.fromisoformat(segment["max_timestamp"]) < date_from:
+                continue
+            if date_to and datetime.fromisoformat(segment["min_timestamp"]) > date_to:
+                continue
+            matches.append(segment)
+        return matches
+
+    # ----------------------------------------
+    # Archival
+    # ----------------------------------------
+
+    def _write_segment(self, channel_key: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Write rows to a new gzip NDJSON segment and fsync it.
+
+        Args:
+            channel_key: Manifest key of the channel
+            rows: Serialized rows ordered by timestamp
+
+        Returns:
+            Manifest entry for the new segment
+        """
+        first_ts = rows[0]["timestamp"]
+        relative_path = os.path.join(
+            "segments",
+            channel_key,
+            f"{first_ts[:7].replace('-', '_')}-{uuid.uuid4().hex[:12]}.ndjson.gz"
+        )
+        path = os.path.join(self.archive_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        digest = hashlib.sha256()
+        with open(path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as gz:
+                for row in rows:
+                    line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+                    digest.update(line)
+                    gz.write(line)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        return {
+            "file": relative_path,
+            "channel_id": None if channel_key == NO_CHANNEL_KEY else channel_key,
+            "min_timestamp": first_ts,
+            "max_timestamp": rows[-1]["timestamp"],
+            "message_count": len(rows),
+            "sha256": digest.hexdigest(),
+            "archived_at": datetime.now().isoformat()
+        }
+
+    def _register_segment(self, channel_key: str, entry: Dict[str, Any]):
+        """Add a segment entry to the manifest."""
+        with _manifest_lock:
+            manifest = self.load_manifest()
+            manifest["channels"].setdefault(channel_key, []).append(entry)
+            manifest["channels"][channel_key].sort(key=lambda s: s["min_timestamp"])
+            self._save_manifest(manifest)
+
+    def _delete_archived(self, keys: List[tuple]):
+        """
+        Delete archived rows in small batches, one transaction per batch.
+
+        Args:
+            keys: (id, timestamp) primary keys of the archived rows
+        """
+        for start in range(0, len(keys), ARCHIVE_BATCH_SIZE):
+            batch = keys[start:start + ARCHIVE_BATCH_SIZE]
+            self.db.query(Message).filter(
+                tuple_(Message.id, Message.timestamp).in_(batch),
+                Message.timestamp.between(
+                    min(ts for _, ts in batch), max(ts for _, ts in batch)
+                )
+            ).delete(synchronize_session=False)
+            self.db.commit()
+
+    def _archive_channel(self, channel_id: Optional[UUID], cutoff: datetime) -> int:
+        """
+        Archive one channel's messages older than cutoff.
+
+        Args:
+            channel_id: Database UUID of the channel (None for channel-less messages)
+            cutoff: Messages with timestamp before this are archived
+
+        Returns:
+            Number of messages archived
+        """
+        channel_key = _channel_key(channel_id)
+        archived = 0
+
+        while True:
+            rows: List[Dict[str, Any]] = []
+            keys: List[tuple] = []
+            last_key = None
+
+            # Read the segment in keyset-paginated batches
+            while len(rows) < ARCHIVE_SEGMENT_MAX_ROWS:
+                query = self.db.query(Message).filter(
+                    Message.channel_id == channel_id if channel_id else Message.channel_id.is_(None),
+                    Message.timestamp < cutoff
+                )
+                if last_key:
+                    query = query.filter(tuple_(Message.timestamp, Message.id) > last_key)
+                batch = query.order_by(
+                    Message.timestamp.asc(), Message.id.asc()
+                ).limit(min(ARCHIVE_BATCH_SIZE, ARCHIVE_SEGMENT_MAX_ROWS - len(rows))).all()
+
+                if not batch:
+                    break
+
+                for message in batch:
+                    rows.append(_serialize_message(message))
+                    keys.append((message.id, message.timestamp))
+                last_key = (batch[-1].timestamp, batch[-1].id)
+                self.db.expunge_all()
+
+            self.db.rollback()
+
+            if not rows:
+                return archived
+
+            entry = self._write_segment(channel_key, rows)
+            self._register_segment(channel_key, entry)
+            self._delete_archived(keys)
+            archived += len(rows)
+
+            logger.info(
+                f"📦 Segmento archivado: {entry['file']} ({entry['message_count']} mensajes, "
+                f"{entry['min_timestamp']} → {entry['max_timestamp']})"
+            )
+
+    def archive_older_than(self, days: int) -> Dict[str, Any]:
+        """
+        Move messages older than the given age into archive segments.
+
+        Args:
+            days: Minimum message age in days
+
+        Returns:
+            Summary with archived message count per channel
+        """
+        # Session-level lock held on a dedicated connection for the whole run,
+        # since the session itself commits and releases its connection per batch
+        with self.db.get_bind().connect() as lock_conn:
+            if not lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": _ARCHIVE_LOCK_KEY}
+            ).scalar():
+                logger.info("⏭️  Archivado ya en curso en otro proceso")
+                return {"archived": 0, "channels": {}}
+
+            try:
+                cutoff = datetime.now() - timedelta(days=days)
+                channel_ids = [
+                    row[0] for row in self.db.query(Message.channel_id).filter(
+                        Message.timestamp < cutoff
+                    ).distinct().all()
+                ]
+                self.db.rollback()
+
+                summary = {}
+                for channel_id in channel_ids:
+                    summary[_channel_key(channel_id)] = self._archive_channel(channel_id, cutoff)
+
+                return {"archived": sum(summary.values()), "channels": summary}
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ARCHIVE_LOCK_KEY})
+
+    # ----------------------------------------
+    # Reading and restore
+    # ----------------------------------------
+
+    def iter_segment(self, segment: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the rows of a segment file.
+
+        Args:
+            segment: Manifest segment entry
+
+        Yields:
+            Archived rows as dicts
+        """
+        path = os.path.join(self.archive_dir, segment["file"])
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read_archived(
+        self,
+        channel_id: Optional[UUID],
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read archived messages of a channel within a time range.
+
+        With a limit, segments are read newest first and reading stops once
+        the next segment (by its max_timestamp in the manifest) cannot hold
+        anything newer than the rows already collected, so a page only
+        decompresses the segments it needs.
+
+        Args:
+            channel_id: Database UUID of the channel
+            date_from: Range start (inclusive)
+            date_to: Range end (inclusive)
+            limit: Return only the newest `limit` messages
+
+        Returns:
+            Archived messages as column dicts, ordered by timestamp (newest
+            first when a limit is given)
+        """
+        segments = self.find_segments(channel_id, date_from, date_to)
+        if limit is not None:
+            segments.sort(key=lambda segment: segment["max_timestamp"], reverse=True)
+
+        messages = []
+        for segment in segments:
+            if limit is not None and len(messages) >= limit:
+                messages = heapq.nlargest(limit, messages, key=lambda m: m["timestamp"])
+                if datetime.fromisoformat(segment["max_timestamp"]) <= messages[-1]["timestamp"]:
+                    break
+            for row in self.iter_segment(segment):
+                values = _deserialize_row(row)
+                if date_from and values["timestamp"] < date_from:
+                    continue
+                if date_to and values["timestamp"] > date_to:
+                    continue
+                messages.append(values)
+
+        if limit is not None:
+            return heapq.nlargest(limit, messages, key=lambda m: m["timestamp"])
+        messages.sort(key=lambda m: m["timestamp"])
+        return messages
+
+    def restore(
+        self,
+        channel_id: Optional[UUID],
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> int:
+        """
+        Move archived segments of a channel back into Postgres.
+        Whole segments overlapping the range are restored and then removed
+        from the manifest.
+
+        Args:
+            channel_id: Database UUID of the channel
+            date_from: Range start (inclusive)
+            date_to: Range end (inclusive)
+
+        Returns:
+            Number of messages restored
+        """
+        restored = 0
+        channel_key = _channel_key(channel_id)
+
+        for segment in self.find_segments(channel_id, date_from, date_to):
+            rows = [_deserialize_row(row) for row in self.iter_segment(segment)]
+
+            # Old months may have been dropped by retention; recreate them
+            months = {row["timestamp"].date().replace(day=1) for row in rows}
+            for month in sorted(months):
+                self.db.execute(text("SELECT create_messages_partition(:month)"), {"month": month})
+
+            for start in range(0, len(rows), ARCHIVE_BATCH_SIZE):
+                batch = rows[start:start + ARCHIVE_BATCH_SIZE]
+                self.db.execute(
+                    insert(Message).values(batch).on_conflict_do_nothing(
+                        constraint="unique_message_id_timestamp"
+                    )
+                )
+                self.db.commit()
+
+            with _manifest_lock:
+                manifest = self.load_manifest()
+                manifest["channels"][channel_key] = [
+                    s for s in manifest["channels"].get(channel_key, [])
+                    if s["file"] != segment["file"]
+                ]
+                if not manifest["channels"][channel_key]:
+                    del manifest["channels"][channel_key]
+                self._save_manifest(manifest)
+            os.remove(os.path.join(self.archive_dir, segment["file"]))
+
+            restored += len(rows)
+            logger.info(f"♻️  Segmento restaurado: {segment['file']} ({len(rows)} mensajes)")
+
+        return restored
+
+
+def run_archival(days: int = ARCHIVE_AFTER_DAYS) -> Dict[str, Any]:
+    """
+    Run one archival pass with its own database session.
+
+    Args:
+        days: Minimum message age in days
+
+    Returns:
+        Archival summary
+    """
+    from app.database import BackgroundSessionLocal
+
+    db = BackgroundSessionLocal()
+    try:
+        return ArchiveService(db).archive_older_than(days)
+    finally:
+        db.close()
+
+
+async def archive_loop(interval_seconds: int = ARCHIVE_INTERVAL_SECONDS):
+    """
+    Periodically archive messages older than ARCHIVE_AFTER_DAYS.
+    Does nothing when ARCHIVE_AFTER_DAYS is 0.
+
+    Args:
+        interval_seconds: Seconds to wait between runs
+    """
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return
+
+    while True:
+        try:
+            result = await asyncio.to_thread(run_archival)
+            if result["archived"]:
+                logger.info(f"📦 Archivado completado: {result['archived']} mensajes")
+        except Exception as e:
+            logger.error(f"❌ Error archivando mensajes: {str(e)}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,483 @@
+"""
+Conversation Summary Service for BotDO.
+Folds the older turns of long conversations into a rolling summary per
+channel, so process_message sends summary + recent turns instead of paying
+prompt tokens for the whole thread. Summaries are updated incrementally from
+a timestamp watermark by a background loop; they are never regenerated.
+"""
+import asyncio
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from uuid import UUID
+
+from sqlalchemy import text, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Message, ConversationSummary
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: every summary update is an extra agent call
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "false").lower() == "true"
+# Summarize a channel once this many messages sit after its watermark
+SUMMARY_TRIGGER_MESSAGES = int(os.getenv("SUMMARY_TRIGGER_MESSAGES", "30"))
+# Newest messages that are never folded into the summary
+SUMMARY_KEEP_RECENT = int(os.getenv("SUMMARY_KEEP_RECENT", "10"))
+# Maximum messages folded per agent call
+SUMMARY_BATCH_MESSAGES = int(os.getenv("SUMMARY_BATCH_MESSAGES", "100"))
+# Maximum tokens of the summary returned by the agent
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+# Seconds between summarizer runs, and channels updated per run
+SUMMARY_INTERVAL_SECONDS = int(os.getenv("SUMMARY_INTERVAL_SECONDS", "60"))
+SUMMARY_CHANNELS_PER_RUN = int(os.getenv("SUMMARY_CHANNELS_PER_RUN", "20"))
+
+# Same window as conversation history (see message_service)
+HISTORY_LOOKBACK_DAYS = int(os.getenv("HISTORY_LOOKBACK_DAYS", "30"))
+
+# Advisory lock key so only one worker summarizes at a time
+_SUMMARY_LOCK_KEY = 0x6D736773  # "msgs"
+
+# Characters per token used for estimates (no tokenizer for the agent's model)
+_CHARS_PER_TOKEN = 4
+
+_SUMMARY_INSTRUCTIONS = (
+    "Eres un asistente que resume conversaciones de soporte. Actualiza el resumen "
+    "existente con los mensajes nuevos. Conserva nombres, datos concretos, "
+    "decisiones, problemas abiertos y compromisos; omite saludos y repeticiones. "
+    "Responde solo con el resumen actualizado, en el idioma de la conversación."
+)
+
+_CANDIDATES_SQL = text("""
+    SELECT m.channel_id, COUNT(*) AS pending, s.watermark
+    FROM messages m
+    LEFT JOIN conversation_summaries s ON s.channel_id = m.channel_id
+    WHERE m.channel_id IN (
+            SELECT DISTINCT channel_id FROM messages
+            WHERE timestamp >= :active_since AND channel_id IS NOT NULL
+        )
+      AND m.timestamp >= :since
+      AND m.timestamp > COALESCE(s.watermark, '-infinity'::timestamp)
+    GROUP BY m.channel_id, s.watermark
+    HAVING COUNT(*) >= :trigger
+    ORDER BY COUNT(*) DESC
+    LIMIT :channels
+""")
+
+
+def estimate_tokens(value: str) -> int:
+    """
+    Estimate the token count of a text.
+
+    Args:
+        value: Text
+
+    Returns:
+        Estimated tokens (about 4 characters per token)
+    """
+    return math.ceil(len(value or "") / _CHARS_PER_TOKEN)
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Estimate the prompt tokens of a list of OpenAI-format messages.
+
+    Args:
+        messages: [{"role": ..., "content": ...}, ...]
+
+    Returns:
+        Estimated tokens, counting a few tokens of overhead per message
+    """
+    return sum(estimate_tokens(message.get("content", "")) + 4 for message in messages)
+
+
+def summary_message(summary: ConversationSummary) -> Dict[str, str]:
+    """
+    Prompt message that carries a conversation summary.
+
+    Args:
+        summary: Stored summary
+
+    Returns:
+        System message in OpenAI format
+    """
+    return {
+        "role": "system",
+        "content": f"Resumen de la conversación anterior:\n{summary.summary}"
+    }
+
+
+def get_conversation_summary(db: Session, channel_db_id: UUID) -> Optional[ConversationSummary]:
+    """
+    Get a channel's summary when summarization is enabled.
+
+    Args:
+        db: Database session
+        channel_db_id: Database UUID of the channel
+
+    Returns:
+        ConversationSummary or None
+    """
+    if not SUMMARY_ENABLED:
+        return None
+    return db.get(ConversationSummary, channel_db_id)
+
+
+class PromptTokenStats:
+    """
+    Per-worker prompt size of bot turns, with and without a summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear the counters."""
+        with self._lock:
+            self.since = datetime.now()
+            self.turns = 0
+            self.turns_with_summary = 0
+            self.estimated_total = 0
+            self.estimated_max = 0
+            self.reported_turns = 0
+            self.reported_total = 0
+
+    def record(self, estimated: int, reported: Optional[int], with_summary: bool):
+        """
+        Count one bot turn.
+
+        Args:
+            estimated: Estimated prompt tokens
+            reported: Prompt tokens reported by the agent, if any
+            with_summary: Whether the prompt used a conversation summary
+        """
+        with self._lock:
+            self.turns += 1
+            self.turns_with_summary += int(with_summary)
+            self.estimated_total += estimated
+            self.estimated_max = max(self.estimated_max, estimated)
+            if reported is not None:
+                self.reported_turns += 1
+                self.reported_total += reported
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and per-turn averages."""
+        with self._lock:
+            return {
+                "since": self.since.isoformat(),
+                "turns": self.turns,
+                "turns_with_summary": self.turns_with_summary,
+                "avg_prompt_tokens_estimated": round(self.estimated_total / self.turns, 1) if self.turns else None,
+                "max_prompt_tokens_estimated": self.estimated_max,
+                "avg_prompt_tokens_reported": (
+                    round(self.reported_total / self.reported_turns, 1) if self.reported_turns else None
+                ),
+            }
+
+
+# Process-wide prompt size counters
+prompt_token_stats = PromptTokenStats()
+
+
+class ConversationSummaryService:
+    """
+    Service for finding long conversations and storing their summaries.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initialize conversation summary service.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    def find_candidates(self, active_since: datetime) -> List[Dict[str, Any]]:
+        """
+        Channels with at least SUMMARY_TRIGGER_MESSAGES messages after their
+        watermark. Only channels with messages since active_since are checked:
+        the pending count of the others has not changed.
+
+        Args:
+            active_since: Start of the activity window
+
+        Returns:
+            List of {"channel_id", "pending", "watermark"}, most pending first
+        """
+        since = (
+            datetime.now() - timedelta(days=HISTORY_LOOKBACK_DAYS)
+            if HISTORY_LOOKBACK_DAYS > 0 else datetime(1970, 1, 1)
+        )
+        rows = self.db.execute(_CANDIDATES_SQL, {
+            "active_since": max(active_since, since),
+            "since": since,
+            "trigger": SUMMARY_TRIGGER_MESSAGES,
+            "channels": SUMMARY_CHANNELS_PER_RUN
+        }).mappings().all()
+        self.db.rollback()
+        return [dict(row) for row in rows]
+
+    def load_batch(self, channel_db_id: UUID, pending: int) -> Dict[str, Any]:
+        """
+        Load the current summary and the oldest messages to fold into it,
+        leaving the newest SUMMARY_KEEP_RECENT messages out.
+
+        Args:
+            channel_db_id: Database UUID of the channel
+            pending: Messages after the watermark
+
+        Returns:
+            {"summary", "watermark", "messages"} (messages oldest first)
+        """
+        current = self.db.get(ConversationSummary, channel_db_id)
+        watermark = current.watermark if current else None
+        take = min(pending - SUMMARY_KEEP_RECENT, SUMMARY_BATCH_MESSAGES)
+
+        query = self.db.query(
+            Message.sender_type, Message.message_text, Message.timestamp
+        ).filter(Message.channel_id == channel_db_id)
+        if watermark is not None:
+            query = query.filter(Message.timestamp > watermark)
+        elif HISTORY_LOOKBACK_DAYS > 0:
+            query = query.filter(Message.timestamp >= datetime.now() - timedelta(days=HISTORY_LOOKBACK_DAYS))
+        messages = query.order_by(Message.timestamp).limit(max(take, 0)).all()
+        self.db.rollback()
+
+        return {
+            "summary": current.summary if current else None,
+            "watermark": watermark,
+            "messages": messages
+        }
+
+    def store(
+        self,
+        channel_db_id: UUID,
+        previous_watermark: Optional[datetime],
+        summary: str,
+        watermark: datetime,
+        folded: int
+    ) -> bool:
+        """
+        Save an updated summary if nobody moved the watermark meanwhile.
+
+        Args:
+            channel_db_id: Database UUID of the channel
+            previous_watermark: Watermark the update was built from
+            summary: New summary text
+            watermark: Timestamp of the newest folded message
+            folded: Messages folded by this update
+
+        Returns:
+            True if the summary was saved
+        """
+        stmt = insert(ConversationSummary).values(
+            channel_id=channel_db_id,
+            summary=summary,
+            watermark=watermark,
+            summarized_messages=folded,
+            summary_tokens=estimate_tokens(summary)
+        )
+        if previous_watermark is None:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["channel_id"])
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["channel_id"],
+                set_={
+                    "summary": stmt.excluded.summary,
+                    "watermark": stmt.excluded.watermark,
+                    "summarized_messages": ConversationSummary.summarized_messages + stmt.excluded.summarized_messages,
+                    "summary_tokens": stmt.excluded.summary_tokens,
+                    "updated_at": func.now()
+                },
+                where=ConversationSummary.watermark == previous_watermark
+            )
+        saved = self.db.execute(stmt).rowcount == 1
+        self.db.commit()
+        return saved
+
+
+def _summary_prompt(previous: Optional[str], messages: List[Any]) -> List[Dict[str, str]]:
+    """Agent messages asking to fold new turns into the previous summary."""
+    lines = [
+        f"{'Bot' if message.sender_type == 'bot' else 'Usuario'}: {message.message_text}"
+        for message in messages if message.message_text
+    ]
+    return [
+        {"role": "system", "content": _SUMMARY_INSTRUCTIONS},
+        {
+            "role": "user",
+            "content": (
+                f"Resumen actual:\n{previous or '(vacío)'}\n\n"
+                "Mensajes nuevos:\n" + "\n".join(lines)
+            )
+        }
+    ]
+
+
+async def summarize_channel(channel_db_id: UUID, pending: int) -> int:
+    """
+    Fold the oldest pending messages of a channel into its summary.
+
+    Args:
+        channel_db_id: Database UUID of the channel
+        pending: Messages after the watermark
+
+    Returns:
+        Number of messages folded (0 if another worker got there first)
+
+    Raises:
+        AgentResponseError: If the agent returned no usable summary (nothing
+            is stored and the watermark stays put)
+    """
+    from app.database import BackgroundSessionLocal
+    from app.services.digitalocean_client import DigitalOceanClient, AgentResponseError
+
+    db = BackgroundSessionLocal()
+    try:
+        service = ConversationSummaryService(db)
+        batch = await asyncio.to_thread(service.load_batch, channel_db_id, pending)
+        messages = batch["messages"]
+        if not messages:
+            return 0
+
+        # Turns without text (media only) still move the watermark
+        if any(message.message_text for message in messages):
+            summary = await DigitalOceanClient().send_to_agent(
+                messages=_summary_prompt(batch["summary"], messages),
+                max_tokens=SUMMARY_MAX_TOKENS,
+                temperature=0.2,
+                fallback=False
+            )
+            # Storing a non-summary would advance the watermark past messages
+            # that were never summarized; fail the channel and retry next run
+            if not (summary or "").strip():
+                raise AgentResponseError("Empty summary from agent")
+        else:
+            summary = batch["summary"] or ""
+
+        saved = await asyncio.to_thread(
+            service.store, channel_db_id, batch["watermark"],
+            summary.strip(), messages[-1].timestamp, len(messages)
+        )
+        return len(messages) if saved else 0
+    finally:
+        db.close()
+
+
+class ConversationSummarizer:
+    """
+    Background loop that keeps conversation summaries up to date.
+    """
+
+    def __init__(self):
+        self._active_since = datetime(1970, 1, 1)
+        self.runs = 0
+        self.channels_updated = 0
+        self.messages_folded = 0
+        self.last_run_at: Optional[datetime] = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        """
+        Run one summarization pass.
+
+        Returns:
+            Summary with the channels updated and messages folded
+        """
+        from app.database import engines, BackgroundSessionLocal
+
+        started = datetime.now()
+        # Session-level lock held on a dedicated connection for the whole run,
+        # since agent calls happen between the pass's transactions
+        lock_conn = await asyncio.to_thread(engines["background"].connect)
+        acquired = False
+        try:
+            acquired = await asyncio.to_thread(
+                lambda: lock_conn.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": _SUMMARY_LOCK_KEY}
+                ).scalar()
+            )
+            if not acquired:
+                return {"channels": 0, "messages": 0}
+
+            db = BackgroundSessionLocal()
+            try:
+                candidates = await asyncio.to_thread(
+                    ConversationSummaryService(db).find_candidates, self._active_since
+                )
+            finally:
+                db.close()
+
+            channels, folded, complete = 0, 0, len(candidates) < SUMMARY_CHANNELS_PER_RUN
+            for candidate in candidates:
+                try:
+                    count = await summarize_channel(candidate["channel_id"], candidate["pending"])
+                except Exception as e:
+                    complete = False
+                    logger.error(f"❌ Error resumiendo canal {candidate['channel_id']}: {str(e)}")
+                    continue
+                channels += int(count > 0)
+                folded += count
+                if candidate["pending"] - count >= SUMMARY_TRIGGER_MESSAGES:
+                    complete = False
+
+            # Skipped, failed or still-long channels are checked again next run
+            if complete:
+                self._active_since = started
+        finally:
+            if acquired:
+                await asyncio.to_thread(
+                    lock_conn.execute, text("SELECT pg_advisory_unlock(:key)"), {"key": _SUMMARY_LOCK_KEY}
+                )
+            await asyncio.to_thread(lock_conn.close)
+
+        self.runs += 1
+        self.channels_updated += channels
+        self.messages_folded += folded
+        self.last_run_at = started
+        return {"channels": channels, "messages": folded}
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of this worker's summarizer."""
+        return {
+            "enabled": SUMMARY_ENABLED,
+            "trigger_messages": SUMMARY_TRIGGER_MESSAGES,
+            "keep_recent": SUMMARY_KEEP_RECENT,
+            "runs": self.runs,
+            "channels_updated": self.channels_updated,
+            "messages_folded": self.messages_folded,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+
+# Process-wide summarizer
+conversation_summarizer = ConversationSummarizer()
+
+
+async def summarization_loop(interval_seconds: int = SUMMARY_INTERVAL_SECONDS):
+    """
+    Periodically fold the older turns of long conversations into summaries.
+    Does nothing unless SUMMARY_ENABLED is true.
+
+    Args:
+        interval_seconds: Seconds to wait between runs
+    """
+    if not SUMMARY_ENABLED:
+        return
+
+    while True:
+        try:
+            result = await conversation_summarizer.run_once()
+            if result["channels"]:
+                logger.info(
+                    f"📝 Resúmenes actualizados: {result['channels']} canales, "
+                    f"{result['messages']} mensajes resumidos"
+                )
+        except Exception as e:
+            logger.error(f"❌ Error actualizando resúmenes de conversación: {str(e)}")
+        await asyncio.sleep(interval_seconds)
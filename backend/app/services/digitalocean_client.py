@@ -7,8 +7,42 @@ import os
 from typing import List, Dict, Any, Optional
 import logging
 
+from app.services.agent_endpoints import get_agent_pool, AgentEndpoint
+
 logger = logging.getLogger(__name__)
 
+# Reply sent to the user when the agent's response cannot be read
+FALLBACK_REPLY = "Lo siento, hubo un error al procesar tu solicitud."
+
+
+class AgentResponseError(Exception):
+    """Raised when the agent answered without a usable reply."""
+
+
+# Shared HTTP client so agent calls reuse warm keep-alive (TLS) connections
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP client for the agent API.
+    
+    Returns:
+        Shared AsyncClient (created on first use)
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=30.0)
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client (on shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 class DigitalOceanClient:
     """
@@ -23,21 +57,32 @@ class DigitalOceanClient:
         self.agent_id = os.getenv("DIGITALOCEAN_AGENT_ID")
         self.api_url = os.getenv("DIGITALOCEAN_API_URL", "https://api.digitalocean.com/v2")
         
-        if not self.api_key:
-            raise ValueError("DIGITALOCEAN_API_KEY not set in environment")
-        if not self.agent_id:
-            raise ValueError("DIGITALOCEAN_AGENT_ID not set in environment")
+        # DIGITALOCEAN_AGENT_ENDPOINTS entries may carry their own agent ID and key
+        if not os.getenv("DIGITALOCEAN_AGENT_ENDPOINTS"):
+            if not self.api_key:
+                raise ValueError("DIGITALOCEAN_API_KEY not set in environment")
+            if not self.agent_id:
+                raise ValueError("DIGITALOCEAN_AGENT_ID not set in environment")
+        
+        # Endpoints to spread requests over (DIGITALOCEAN_AGENT_ENDPOINTS,
+        # or just DIGITALOCEAN_API_URL)
+        self.pool = get_agent_pool()
         
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        # Token usage reported with the last response (OpenAI "usage" object)
+        self.last_usage: Optional[Dict[str, Any]] = None
+        # Name of the endpoint that served the last response
+        self.last_endpoint: Optional[str] = None
     
     async def send_to_agent(
         self,
         messages: List[Dict[str, str]],
         max_tokens: Optional[int] = 1000,
-        temperature: Optional[float] = 0.7
+        temperature: Optional[float] = 0.7,
+        fallback: bool = True
     ) -> str:
         """
         Send conversation to Digital Ocean Agent and get response.
@@ -47,22 +92,18 @@ class DigitalOceanClient:
                 [{"role": "user", "content": "..."}, ...]
             max_tokens: Maximum tokens in response
             temperature: Response randomness (0.0 to 1.0)
+            fallback: Return FALLBACK_REPLY when the response has no
+                readable reply; when False, raise instead (for callers that
+                store the text rather than show it to a user)
             
         Returns:
             Agent's response text
             
         Raises:
             httpx.HTTPError: If API request fails
+            AgentResponseError: If fallback is False and the response has
+                no readable reply
         """
-        # Construct the API endpoint for the agent
-        # If api_url already contains .agents.do-ai.run, it's a direct agent URL
-        if ".agents.do-ai.run" in self.api_url:
-            # Direct agent URL - use OpenAI-compatible endpoint
-            endpoint = f"{self.api_url}/api/v1/chat/completions"
-        else:
-            # Standard API URL - use full path
-            endpoint = f"{self.api_url}/ai/agents/{self.agent_id}/chat"
-        
         payload = {
             "messages": messages,
             "max_tokens": max_tokens,
@@ -70,7 +111,6 @@ class DigitalOceanClient:
         }
         
         logger.info("🌊 Enviando request a Digital Ocean Agent...")
-        logger.info(f"   Endpoint: {endpoint}")
         logger.info(f"   Número de mensajes: {len(messages)}")
         logger.info(f"   Max tokens: {max_tokens}, Temperature: {temperature}")
         logger.info(f"   Mensajes:")
@@ -79,46 +119,48 @@ class DigitalOceanClient:
             content = msg.get('content', '')[:100]  # Primeros 100 chars
             logger.info(f"      [{i}] {role}: {content}...")
         
+        endpoint = self.pool.choose()
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                logger.info("📡 Realizando llamada HTTP a Digital Ocean...")
-                
-                response = await client.post(
-                    endpoint,
-                    headers=self.headers,
-                    json=payload
-                )
-                
-                logger.info(f"📥 Respuesta recibida - Status Code: {response.status_code}")
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                logger.info(f"📋 Estructura de respuesta: {list(data.keys())}")
-                
-                # Extract the response text from the API response
-                # The exact structure may vary based on DO API
-                # Adjust this based on actual API response format
-                if "choices" in data and len(data["choices"]) > 0:
-                    agent_response = data["choices"][0]["message"]["content"]
-                    logger.info(f"✅ Respuesta extraída de 'choices[0].message.content'")
-                    logger.info(f"   Respuesta ({len(agent_response)} chars): {agent_response[:100]}...")
-                    return agent_response
-                elif "response" in data:
-                    agent_response = data["response"]
-                    logger.info(f"✅ Respuesta extraída de 'response'")
-                    logger.info(f"   Respuesta ({len(agent_response)} chars): {agent_response[:100]}...")
-                    return agent_response
-                elif "message" in data:
-                    agent_response = data["message"]
-                    logger.info(f"✅ Respuesta extraída de 'message'")
-                    logger.info(f"   Respuesta ({len(agent_response)} chars): {agent_response[:100]}...")
-                    return agent_response
-                else:
-                    logger.error(f"❌ Formato de respuesta inesperado de Digital Ocean")
-                    logger.error(f"   Estructura recibida: {data}")
-                    return "Lo siento, hubo un error al procesar tu solicitud."
-                
+            try:
+                data = await self._post(endpoint, payload)
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if not _endpoint_failure(e) or len(self.pool.endpoints) < 2:
+                    raise
+                # Another endpoint may well answer; the reply was never produced
+                failed = endpoint
+                endpoint = self.pool.choose(exclude=failed)
+                logger.warning(f"⚠️  Endpoint {failed.name} falló, reintentando en {endpoint.name}: {str(e)}")
+                data = await self._post(endpoint, payload)
+            self.last_usage = data.get("usage")
+            self.last_endpoint = endpoint.name
+            
+            logger.info(f"📋 Estructura de respuesta: {list(data.keys())}")
+            
+            # Extract the response text from the API response
+            # The exact structure may vary based on DO API
+            # Adjust this based on actual API response format
+            if "choices" in data and len(data["choices"]) > 0:
+                agent_response = data["choices"][0]["message"]["content"]
+                logger.info(f"✅ Respuesta extraída de 'choices[0].message.content'")
+                logger.info(f"   Respuesta ({len(agent_response)} chars): {agent_response[:100]}...")
+                return agent_response
+            elif "response" in data:
+                agent_response = data["response"]
+                logger.info(f"✅ Respuesta extraída de 'response'")
+                logger.info(f"   Respuesta ({len(agent_response)} chars): {agent_response[:100]}...")
+                return agent_response
+            elif "message" in data:
+                agent_response = data["message"]
+                logger.info(f"✅ Respuesta extraída de 'message'")
+                logger.info(f"   Respuesta ({len(agent_response)} chars): {agent_response[:100]}...")
+                return agent_response
+            else:
+                logger.error(f"❌ Formato de respuesta inesperado de Digital Ocean")
+                logger.error(f"   Estructura recibida: {data}")
+                if not fallback:
+                    raise AgentResponseError(f"Unexpected agent response: {list(data.keys())}")
+                return FALLBACK_REPLY
+            
         except httpx.HTTPStatusError as e:
             logger.error(f"❌ Error HTTP de Digital Ocean Agent:")
             logger.error(f"   Status Code: {e.response.status_code}")
@@ -127,32 +169,91 @@ class DigitalOceanClient:
         except httpx.RequestError as e:
             logger.error(f"❌ Error de conexión con Digital Ocean Agent:")
             logger.error(f"   Error: {str(e)}")
-            logger.error(f"   Endpoint: {endpoint}")
+            logger.error(f"   Endpoint: {endpoint.chat_url}")
+            raise
+        except AgentResponseError:
             raise
         except Exception as e:
             logger.error(f"❌ Error inesperado con Digital Ocean Agent:")
             logger.error(f"   Error: {str(e)}", exc_info=True)
             raise
     
-    async def health_check(self) -> bool:
+    async def _post(self, endpoint: AgentEndpoint, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Check if the Digital Ocean Agent is accessible.
+        POST a chat request to one endpoint, recording the outcome in the pool.
         
+        Args:
+            endpoint: Endpoint chosen by the pool
+            payload: Chat request body
+            
         Returns:
-            True if agent is accessible, False otherwise
+            Parsed JSON response
         """
+        logger.info(f"📡 Realizando llamada HTTP a Digital Ocean ({endpoint.name})...")
+        started = self.pool.begin(endpoint)
         try:
-            endpoint = f"{self.api_url}/ai/agents/{self.agent_id}"
+            response = await get_http_client().post(
+                endpoint.chat_url,
+                headers=endpoint.headers,
+                json=payload
+            )
+            logger.info(f"📥 Respuesta recibida - Status Code: {response.status_code}")
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            if _endpoint_failure(e):
+                self.pool.fail(endpoint, started)
+            else:
+                # The endpoint answered; the request itself was refused
+                self.pool.succeed(endpoint, started)
+            raise
+        self.pool.succeed(endpoint, started)
+        return data
+    
+    async def warm_up(self) -> Dict[str, int]:
+        """
+        Open the connection to every agent endpoint (DNS, TCP and TLS
+        handshake) so the first real requests find them in the shared
+        client's pool.
+        
+        Returns:
+            HTTP status code of the probe per endpoint (any status means the
+            connection is up)
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    endpoint,
-                    headers=self.headers
+        Raises:
+            httpx.RequestError: If an endpoint cannot be reached
+        """
+        statuses = {}
+        for endpoint in self.pool.endpoints:
+            response = await get_http_client().get(endpoint.info_url, headers=endpoint.headers, timeout=10.0)
+            statuses[endpoint.name] = response.status_code
+        return statuses
+    
+    async def health_check(self) -> bool:
+        """
+        Check if the Digital Ocean Agent is accessible.
+        
+        Returns:
+            True if at least one agent endpoint is accessible, False otherwise
+        """
+        for endpoint in self.pool.endpoints:
+            try:
+                response = await get_http_client().get(
+                    endpoint.info_url,
+                    headers=endpoint.headers,
+                    timeout=10.0
                 )
                 response.raise_for_status()
                 return True
-                
-        except Exception as e:
-            logger.error(f"Health check failed: {str(e)}")
-            return False
+            except Exception as e:
+                logger.error(f"Health check failed ({endpoint.name}): {str(e)}")
+        return False
+
 
+def _endpoint_failure(error: Exception) -> bool:
+    """Whether an error says the endpoint is unhealthy (network, 429, 5xx)."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
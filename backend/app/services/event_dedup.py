@@ -0,0 +1,81 @@
+"""
+Event Deduplication for BotDO.
+Remembers recently processed webhook event IDs so platform retries and
+duplicate deliveries are only processed once. Shared by all connectors.
+"""
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class EventDeduplicator:
+    """
+    In-memory cache of processed event IDs with TTL and size limit.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: int = 3600):
+        """
+        Initialize event deduplicator.
+
+        Args:
+            max_size: Maximum events to keep in cache
+            ttl_seconds: How long an event ID is remembered
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # Key: event_id, Value: timestamp when processed
+        self._processed_events: OrderedDict[str, float] = OrderedDict()
+
+    def is_processed(self, event_id: str) -> bool:
+        """
+        Check if an event has already been processed, marking it as processed
+        if not. Cleans up old entries from cache.
+
+        Args:
+            event_id: Unique event identifier (prefix it with the platform)
+
+        Returns:
+            True if event was already processed, False otherwise
+        """
+        current_time = time.time()
+
+        # Clean up old entries (older than TTL)
+        keys_to_remove = []
+        for key, timestamp in self._processed_events.items():
+            if current_time - timestamp > self.ttl_seconds:
+                keys_to_remove.append(key)
+            else:
+                break  # OrderedDict, so once we hit a recent one, rest are recent
+
+        for key in keys_to_remove:
+            del self._processed_events[key]
+
+        # Check if event already processed
+        if event_id in self._processed_events:
+            logger.warning(f"⚠️  Evento duplicado detectado: {event_id}")
+            return True
+
+        # Mark as processed
+        self._processed_events[event_id] = current_time
+
+        # Limit cache size
+        while len(self._processed_events) > self.max_size:
+            self._processed_events.popitem(last=False)  # Remove oldest
+
+        return False
+
+    def forget(self, event_id: str):
+        """
+        Drop an event's processed mark, so a redelivery is accepted again
+        (used when its turn could not be queued).
+
+        Args:
+            event_id: Event identifier passed to is_processed
+        """
+        self._processed_events.pop(event_id, None)
+
+
+# Process-wide deduplicator shared by the Slack and Whapi connectors
+event_deduplicator = EventDeduplicator()
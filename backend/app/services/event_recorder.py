@@ -0,0 +1,121 @@
+"""
+Event Recorder for BotDO.
+Captures verified Slack events (raw body, relevant headers and arrival
+time) to a JSON-lines file, so real traffic can be replayed later against
+another build with benchmarks/replay_events.py. Enabled by setting
+SLACK_EVENT_RECORD_PATH; both HTTP Events and Socket Mode are recorded.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# File to append recorded events to (empty: recording off). Events contain
+# message text: record only for capture sessions and keep the file private
+SLACK_EVENT_RECORD_PATH = os.getenv("SLACK_EVENT_RECORD_PATH", "")
+# Recording stops once the file reaches this size
+SLACK_EVENT_RECORD_MAX_MB = float(os.getenv("SLACK_EVENT_RECORD_MAX_MB", "100"))
+
+# Headers kept; the signature is not, replays are signed again
+RECORDED_HEADERS = (
+    "content-type",
+    "user-agent",
+    "x-slack-request-timestamp",
+    "x-slack-retry-num",
+    "x-slack-retry-reason",
+)
+
+
+class EventRecorder:
+    """
+    Appends one JSON line per event: {"at", "source", "headers", "body"}.
+    """
+
+    def __init__(self, path: str = SLACK_EVENT_RECORD_PATH, max_mb: float = SLACK_EVENT_RECORD_MAX_MB):
+        """
+        Initialize recorder.
+
+        Args:
+            path: File to append to (empty disables recording)
+            max_mb: Size at which recording stops
+        """
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._file = None
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.recorded = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        self.bytes = self._file.tell()
+        logger.info(f"🎙️  Grabando eventos de Slack en {self.path}")
+
+    def record(self, source: str, body: bytes, headers: Optional[Mapping[str, str]] = None):
+        """
+        Append an event. Never raises: a recording problem must not affect
+        the event being handled.
+
+        Args:
+            source: "http" or "socket_mode"
+            body: Raw event body as received (JSON)
+            headers: Request headers (only RECORDED_HEADERS are kept)
+        """
+        if not self.path:
+            return
+        kept = {name: headers[name] for name in RECORDED_HEADERS if headers and name in headers}
+        line = orjson.dumps({
+            "at": time.time(),
+            "source": source,
+            "headers": kept,
+            "body": body.decode("utf-8", "replace")
+        }) + b"\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+                if self.bytes + len(line) > self.max_bytes:
+                    if not self.dropped:
+                        logger.warning(
+                            f"⚠️  Grabación de eventos detenida: {self.path} llegó a {SLACK_EVENT_RECORD_MAX_MB:.0f} MB"
+                        )
+                    self.dropped += 1
+                    return
+                self._file.write(line)
+                self._file.flush()
+                self.bytes += len(line)
+                self.recorded += 1
+            except OSError as e:
+                self.dropped += 1
+                logger.error(f"❌ Error grabando evento de Slack en {self.path}: {str(e)}")
+
+    def close(self):
+        """Close the recording file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Recording state and counters."""
+        return {
+            "enabled": self.enabled,
+            "path": self.path or None,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "bytes": self.bytes
+        }
+
+
+# Process-wide recorder used by the Slack connector
+event_recorder = EventRecorder()
@@ -0,0 +1,232 @@
+"""
+Background health monitor for BotDO.
+Probes each dependency (database and replicas, DigitalOcean agent, Slack,
+Whapi) on its own interval with a timeout and caches the last result, so
+the health endpoints answer from memory instead of calling upstream on
+every load-balancer probe.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between probes of each dependency
+HEALTH_DATABASE_INTERVAL_SECONDS = float(os.getenv("HEALTH_DATABASE_INTERVAL_SECONDS", "15"))
+HEALTH_AGENT_INTERVAL_SECONDS = float(os.getenv("HEALTH_AGENT_INTERVAL_SECONDS", "60"))
+HEALTH_SLACK_INTERVAL_SECONDS = float(os.getenv("HEALTH_SLACK_INTERVAL_SECONDS", "300"))
+HEALTH_WHAPI_INTERVAL_SECONDS = float(os.getenv("HEALTH_WHAPI_INTERVAL_SECONDS", "60"))
+# Timeout of a single probe
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "5"))
+# A result older than this many intervals is reported as stale
+HEALTH_STALE_INTERVALS = float(os.getenv("HEALTH_STALE_INTERVALS", "3"))
+
+
+class HealthCheck:
+    """
+    A dependency probe and its last cached result.
+    """
+
+    def __init__(self, name: str, probe: Callable[[], Any], interval: float):
+        """
+        Initialize health check.
+
+        Args:
+            name: Dependency name used in snapshots
+            probe: Sync or async callable; returns a dict of details when the
+                dependency is healthy and raises (or returns False) otherwise
+            interval: Seconds between probes
+        """
+        self.name = name
+        self.probe = probe
+        self.interval = interval
+        self.ok: Optional[bool] = None
+        self.details: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.latency_ms: Optional[float] = None
+        self.checked_at: Optional[datetime] = None
+        self._checked_monotonic: Optional[float] = None
+        self.consecutive_failures = 0
+
+    async def run_once(self):
+        """Run the probe with a timeout and store the outcome."""
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(self.probe):
+                result = await asyncio.wait_for(self.probe(), HEALTH_CHECK_TIMEOUT_SECONDS)
+            else:
+                result = await asyncio.wait_for(asyncio.to_thread(self.probe), HEALTH_CHECK_TIMEOUT_SECONDS)
+            if result is False:
+                raise RuntimeError("probe reported unavailable")
+            ok, details, error = True, result if isinstance(result, dict) else {}, None
+        except asyncio.TimeoutError:
+            ok, details, error = False, {}, f"timeout after {HEALTH_CHECK_TIMEOUT_SECONDS:.0f}s"
+        except Exception as e:
+            ok, details, error = False, {}, str(e) or type(e).__name__
+
+        if ok and self.ok is False:
+            logger.info(f"✅ {self.name} recuperado tras {self.consecutive_failures} fallo(s)")
+        elif not ok and self.ok is not False:
+            logger.warning(f"⚠️  {self.name} no disponible: {error}")
+
+        self.ok = ok
+        self.details = details
+        self.error = error
+        self.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.checked_at = datetime.now()
+        self._checked_monotonic = time.monotonic()
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cached result, with its age and whether it is stale."""
+        age = None if self._checked_monotonic is None else time.monotonic() - self._checked_monotonic
+        if self.ok is None:
+            status = "unknown"
+        elif age > self.interval * HEALTH_STALE_INTERVALS:
+            status = "stale"
+        else:
+            status = "healthy" if self.ok else "unhealthy"
+        return {
+            "status": status,
+            "ok": self.ok,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "latency_ms": self.latency_ms,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.error,
+            **self.details
+        }
+
+
+def _probe_database() -> Dict[str, Any]:
+    from sqlalchemy import text
+    from app.database import engines, pool_status
+
+    with engines["background"].connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {"pools": pool_status()}
+
+
+def _probe_replicas() -> Dict[str, Any]:
+    from app.database import replica_lag_guard
+
+    for index in range(len(replica_lag_guard.engines)):
+        replica_lag_guard.lag(index)
+    replicas = replica_lag_guard.status()
+    usable = [
+        r for r in replicas
+        if r["lag_seconds"] is not None and r["lag_seconds"] <= replica_lag_guard.max_lag_seconds
+    ]
+    if not usable:
+        raise RuntimeError("no replica within the lag limit; reads go to the primary")
+    return {"replicas": replicas, "max_lag_seconds": replica_lag_guard.max_lag_seconds}
+
+
+async def _probe_agent() -> bool:
+    from app.services.digitalocean_client import DigitalOceanClient
+
+    return await DigitalOceanClient().health_check()
+
+
+def _probe_slack() -> Dict[str, Any]:
+    from app.services.slack_client import SlackClient
+
+    identity = SlackClient().get_bot_identity(refresh=True)
+    return {"bot_user_id": identity["user_id"], "team": identity["team"]}
+
+
+async def _probe_whapi() -> bool:
+    from app.services.whapi_client import WhapiClient
+
+    return await WhapiClient().health_check()
+
+
+class HealthMonitor:
+    """
+    Runs one probe loop per dependency and serves cached snapshots.
+    """
+
+    def __init__(self):
+        self.checks: Dict[str, HealthCheck] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, name: str, probe: Callable[[], Any], interval: float):
+        """
+        Add a dependency to monitor.
+
+        Args:
+            name: Dependency name
+            probe: Sync or async probe (see HealthCheck)
+            interval: Seconds between probes
+        """
+        self.checks[name] = HealthCheck(name, probe, interval)
+
+    def register_defaults(self, enabled_connectors: List[str]):
+        """
+        Register the probes for this deployment's dependencies.
+
+        Args:
+            enabled_connectors: Connectors loaded by this worker
+        """
+        from app.services.agent_endpoints import agent_pool_configured
+
+        self.register("database", _probe_database, HEALTH_DATABASE_INTERVAL_SECONDS)
+        if os.getenv("DATABASE_REPLICA_URL"):
+            self.register("database_replicas", _probe_replicas, HEALTH_DATABASE_INTERVAL_SECONDS)
+        if agent_pool_configured():
+            self.register("digitalocean", _probe_agent, HEALTH_AGENT_INTERVAL_SECONDS)
+        if "slack" in enabled_connectors:
+            self.register("slack", _probe_slack, HEALTH_SLACK_INTERVAL_SECONDS)
+        if "whapi" in enabled_connectors:
+            self.register("whapi", _probe_whapi, HEALTH_WHAPI_INTERVAL_SECONDS)
+
+    async def _loop(self, check: HealthCheck):
+        while True:
+            try:
+                await check.run_once()
+            except Exception as e:
+                logger.error(f"❌ Error en el monitor de salud ({check.name}): {str(e)}")
+            await asyncio.sleep(check.interval)
+
+    def start(self):
+        """Start one probe loop per registered check (must run inside the event loop)."""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._loop(check)) for check in self.checks.values()]
+        logger.info(
+            "🩺 Monitor de salud iniciado: "
+            + ", ".join(f"{c.name} cada {c.interval:.0f}s" for c in self.checks.values())
+        )
+
+    async def stop(self):
+        """Cancel the probe loops."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """
+        Cached snapshot of one dependency.
+
+        Args:
+            name: Dependency name
+
+        Returns:
+            Snapshot, or status "not_monitored" if the check is not registered
+        """
+        check = self.checks.get(name)
+        if check is None:
+            return {"status": "not_monitored", "ok": None}
+        return check.snapshot()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Cached snapshot of every dependency."""
+        return {name: check.snapshot() for name, check in self.checks.items()}
+
+
+# Process-wide monitor used by the health endpoints
+health_monitor = HealthMonitor()
@@ -0,0 +1,258 @@
+"""
+Media Store for BotDO.
+Downloads connector attachments (Slack files, WhatsApp media) to local disk
+and records them in the media table.
+
+- Downloads are streamed in fixed-size chunks straight to a temp file, so
+  memory per download is one chunk regardless of file size.
+- At most MEDIA_MAX_CONCURRENT_DOWNLOADS run at once, which bounds peak
+  memory to roughly chunk size x concurrency.
+- Files are stored under MEDIA_DIR by SHA-256 (ab/cd/<sha256>); a file that
+  is already on disk is not stored twice.
+- Anything above MEDIA_MAX_BYTES is aborted mid-stream.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import Dict, Any, Optional
+
+import httpx
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Media
+
+logger = logging.getLogger(__name__)
+
+# Directory where media files are stored
+MEDIA_DIR = os.getenv("MEDIA_DIR", "media")
+# Largest attachment that will be downloaded
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(25 * 1024 * 1024)))
+# Bytes read and written per chunk
+MEDIA_CHUNK_BYTES = int(os.getenv("MEDIA_CHUNK_BYTES", str(64 * 1024)))
+# Downloads running at the same time across the process
+MEDIA_MAX_CONCURRENT_DOWNLOADS = int(os.getenv("MEDIA_MAX_CONCURRENT_DOWNLOADS", "4"))
+
+
+class MediaTooLarge(Exception):
+    """Raised when an attachment exceeds MEDIA_MAX_BYTES."""
+
+
+class MediaStore:
+    """
+    Streaming, content-addressed storage for attachments.
+    """
+
+    def __init__(
+        self,
+        media_dir: str = MEDIA_DIR,
+        max_bytes: int = MEDIA_MAX_BYTES,
+        chunk_bytes: int = MEDIA_CHUNK_BYTES,
+        max_concurrent: int = MEDIA_MAX_CONCURRENT_DOWNLOADS
+    ):
+        """
+        Initialize media store.
+
+        Args:
+            media_dir: Root directory for stored files
+            max_bytes: Maximum size of a single file
+            chunk_bytes: Streaming chunk size
+            max_concurrent: Maximum simultaneous downloads
+        """
+        self.media_dir = media_dir
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @staticmethod
+    def path_for(sha256: str) -> str:
+        """
+        Storage path of a file relative to the media directory.
+
+        Args:
+            sha256: Hex digest of the file
+
+        Returns:
+            Relative path (ab/cd/<sha256>)
+        """
+        return os.path.join(sha256[:2], sha256[2:4], sha256)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(60.0, connect=10.0)
+            )
+        return self._http
+
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream a file to disk, hashing it on the way.
+
+        Args:
+            url: Download URL
+            headers: Request headers (e.g. Authorization)
+            content_type: Known MIME type; taken from the response otherwise
+
+        Returns:
+            Dict with sha256, size_bytes, content_type, storage_path and
+            deduplicated (True if the file was already stored)
+
+        Raises:
+            MediaTooLarge: If the file is larger than max_bytes
+            httpx.HTTPError: If the download fails
+        """
+        tmp_dir = os.path.join(self.media_dir, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f"{uuid.uuid4().hex}.part")
+
+        async with self._semaphore:
+            try:
+                digest = hashlib.sha256()
+                size = 0
+                async with self._client().stream("GET", url, headers=headers) as response:
+                    response.raise_for_status()
+
+                    declared = response.headers.get("Content-Length")
+                    if declared and int(declared) > self.max_bytes:
+                        raise MediaTooLarge(f"{declared} bytes > {self.max_bytes}")
+                    content_type = content_type or response.headers.get("Content-Type", "").split(";")[0] or None
+
+                    with open(tmp_path, "wb") as f:
+                        async for chunk in response.aiter_bytes(self.chunk_bytes):
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                raise MediaTooLarge(f"more than {self.max_bytes} bytes")
+                            digest.update(chunk)
+                            f.write(chunk)
+                        f.flush()
+                        await asyncio.to_thread(os.fsync, f.fileno())
+
+                sha256 = digest.hexdigest()
+                storage_path = self.path_for(sha256)
+                final_path = os.path.join(self.media_dir, storage_path)
+                deduplicated = os.path.exists(final_path)
+                if not deduplicated:
+                    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                    os.replace(tmp_path, final_path)
+
+                return {
+                    "sha256": sha256,
+                    "size_bytes": size,
+                    "content_type": content_type,
+                    "storage_path": storage_path,
+                    "deduplicated": deduplicated
+                }
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def record(
+        self,
+        db: Session,
+        stored: Dict[str, Any],
+        platform: str,
+        filename: Optional[str] = None
+    ) -> Media:
+        """
+        Insert a media row, or bump its reference count if the content is known.
+
+        Args:
+            db: Database session
+            stored: Result of fetch()
+            platform: Platform the attachment came from
+            filename: Original file name
+
+        Returns:
+            Media row
+        """
+        media_id = db.execute(
+            insert(Media).values(
+                sha256=stored["sha256"],
+                size_bytes=stored["size_bytes"],
+                content_type=stored["content_type"],
+                storage_path=stored["storage_path"],
+                platform=platform,
+                original_filename=filename
+            ).on_conflict_do_update(
+                constraint="unique_media_sha256",
+                set_={
+                    "reference_count": Media.reference_count + 1,
+                    "last_seen_at": func.now()
+                }
+            ).returning(Media.id)
+        ).scalar_one()
+        db.commit()
+        return db.get(Media, media_id)
+
+    async def store(
+        self,
+        db: Session,
+        platform: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        declared_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Download and record an attachment, returning the reference to keep
+        in Message.platform_metadata["media"]. Failures are returned as a
+        reference with an "error" key so the message is still processed.
+
+        Args:
+            db: Database session
+            platform: Platform the attachment came from
+            url: Download URL
+            headers: Request headers (e.g. Authorization)
+            filename: Original file name
+            content_type: MIME type reported by the platform
+            declared_size: Size reported by the platform, checked before downloading
+
+        Returns:
+            Media reference dict
+        """
+        reference = {"filename": filename, "content_type": content_type}
+        try:
+            if declared_size and declared_size > self.max_bytes:
+                raise MediaTooLarge(f"{declared_size} bytes > {self.max_bytes}")
+
+            stored = await self.fetch(url, headers=headers, content_type=content_type)
+            media = self.record(db, stored, platform, filename)
+            reference.update({
+                "media_id": str(media.id),
+                "sha256": media.sha256,
+                "content_type": media.content_type,
+                "size_bytes": media.size_bytes
+            })
+            logger.info(
+                f"📎 Adjunto guardado: {filename or media.sha256[:12]} "
+                f"({media.size_bytes} bytes{', duplicado' if stored['deduplicated'] else ''})"
+            )
+        except MediaTooLarge as e:
+            logger.warning(f"⚠️  Adjunto descartado por tamaño ({filename}): {str(e)}")
+            reference["error"] = "too_large"
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Error descargando adjunto ({filename}): {str(e)}")
+            reference["error"] = "download_failed"
+        return reference
+
+
+# Process-wide store used by the connectors
+media_store = MediaStore()
@@ -2,13 +2,21 @@
 Message Service for BotDO.
 Handles message storage, retrieval, and conversation formatting for AI models.
 """
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
-from datetime import datetime
-from uuid import UUID
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+import os
 
 from app.models import Message, User, Channel
 from app.schemas import MessageCreate
+from app.services.rollup_service import RollupService, ROLLUP_INLINE
+from app.services.write_behind import outbound_buffer
+
+# Only look this many days back for conversation history so the query is
+# pruned to the most recent monthly partitions (0 disables the window)
+HISTORY_LOOKBACK_DAYS = int(os.getenv("HISTORY_LOOKBACK_DAYS", "30"))
 
 
 class MessageService:
@@ -137,7 +145,8 @@ class MessageService:
         timestamp: datetime,
         user_id: Optional[UUID] = None,
         channel_id: Optional[UUID] = None,
-        platform_metadata: Optional[Dict[str, Any]] = None
+        platform_metadata: Optional[Dict[str, Any]] = None,
+        defer: bool = False
     ) -> Message:
         """
         Save a message to the database.
@@ -152,16 +161,47 @@ class MessageService:
             user_id: UUID of the user (optional)
             channel_id: UUID of the channel (optional)
             platform_metadata: Additional platform-specific data
+            defer: Queue the insert in the outbound write-behind buffer
+                (only when OUTBOUND_WRITE_BEHIND is enabled and the buffer
+                is not full; the returned Message is then transient and has
+                no created_at yet)
             
         Returns:
             Created Message object
         """
+        if defer and outbound_buffer.enabled:
+            values = {
+                "id": uuid4(),
+                "message_id": message_id,
+                "channel": channel,
+                "direction": direction,
+                "sender_type": sender_type,
+                "user_id": user_id,
+                "channel_id": channel_id,
+                "message_text": message_text,
+                "timestamp": timestamp,
+                "platform_metadata": platform_metadata
+            }
+            if outbound_buffer.add(values):
+                return Message(**values)
+            # Buffer full: write this one directly (backpressure)
+        
+        # The partitioned table is only unique on (message_id, timestamp) and
+        # each delivery of an event is saved with its own receive time, so
+        # Postgres does not reject a duplicate. Saves of the same message_id
+        # take a transaction lock, so a concurrent retry waits and then finds
+        # the first one's row
+        self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:message_id))"), {"message_id": message_id})
+        
         # Check if message already exists
         existing = self.db.query(Message).filter(
             Message.message_id == message_id
         ).first()
         
         if existing:
+            # Release the lock (and save pending profile changes) now rather
+            # than at the turn's next commit
+            self.db.commit()
             return existing
         
         # Create new message
@@ -178,6 +218,11 @@ class MessageService:
         )
         
         self.db.add(new_message)
+        
+        # Count the message in the hourly rollups within the same transaction
+        if ROLLUP_INLINE:
+            RollupService(self.db).record_messages([new_message])
+        
         self.db.commit()
         self.db.refresh(new_message)
         
@@ -186,24 +231,50 @@ class MessageService:
     def get_conversation_history(
         self,
         channel_db_id: UUID,
-        limit: int = 20
+        limit: int = 20,
+        after: Optional[datetime] = None
     ) -> List[Message]:
         """
-        Get conversation history for a channel.
+        Get the most recent conversation history for a channel.
+        Bounded by HISTORY_LOOKBACK_DAYS so only recent partitions are scanned.
         
         Args:
             channel_db_id: Database UUID of the channel
             limit: Maximum number of messages to retrieve (default: 20)
+            after: Only messages newer than this timestamp (a summary watermark)
             
         Returns:
             List of Message objects ordered by timestamp (oldest first)
         """
-        messages = self.db.query(Message).filter(
+        query = self.db.query(Message).filter(
             Message.channel_id == channel_db_id
-        ).order_by(
-            Message.timestamp.asc()
+        )
+        
+        if HISTORY_LOOKBACK_DAYS > 0:
+            since = datetime.now() - timedelta(days=HISTORY_LOOKBACK_DAYS)
+            query = query.filter(Message.timestamp >= since)
+        if after is not None:
+            query = query.filter(Message.timestamp > after)
+        
+        messages = query.order_by(
+            Message.timestamp.desc()
         ).limit(limit).all()
         
+        # Newest-first from the index, returned oldest-first for the prompt
+        messages.reverse()
+        
+        # Read-your-writes: include bot replies still in the write-behind buffer
+        if outbound_buffer.enabled:
+            buffered = outbound_buffer.pending_for_channel(channel_db_id)
+            if buffered:
+                stored_ids = {message.id for message in messages}
+                messages.extend(
+                    Message(**values) for values in buffered
+                    if values["id"] not in stored_ids and (after is None or values["timestamp"] > after)
+                )
+                messages.sort(key=lambda message: message.timestamp)
+                messages = messages[-limit:]
+        
         return messages
     
     def format_to_openai(self, messages: List[Message]) -> List[Dict[str, str]]:
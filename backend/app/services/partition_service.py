@@ -0,0 +1,166 @@
+"""
+Partition Service for BotDO.
+Maintains the monthly partitions of the messages table and applies retention.
+"""
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import List, Dict, Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# How many future monthly partitions to keep created ahead of time
+PARTITION_MONTHS_AHEAD = int(os.getenv("MESSAGES_PARTITION_MONTHS_AHEAD", "3"))
+# Keep this many whole months of messages (0 disables retention)
+RETENTION_MONTHS = int(os.getenv("MESSAGES_RETENTION_MONTHS", "0"))
+# Seconds between maintenance runs
+MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "21600"))
+
+# Advisory lock key so only one worker runs partition DDL at a time
+_MAINTENANCE_LOCK_KEY = 0x6D736770  # "msgp"
+
+
+def retention_cutoff(retention_months: int, today: date = None) -> date:
+    """
+    Compute the first day of the oldest month that must be kept.
+
+    Args:
+        retention_months: Number of whole months to keep, including the current one
+        today: Reference date (defaults to today)
+
+    Returns:
+        Date; partitions ending on or before it can be dropped
+    """
+    today = today or date.today()
+    month_index = today.year * 12 + (today.month - 1) - (retention_months - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class PartitionService:
+    """
+    Service for creating and retiring monthly partitions of the messages table.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initialize partition service.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    def _try_lock(self) -> bool:
+        """Take the transaction-scoped maintenance lock if no other worker holds it."""
+        return bool(self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": _MAINTENANCE_LOCK_KEY}
+        ).scalar())
+
+    def ensure_future_partitions(self, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+        """
+        Create the current and upcoming monthly partitions.
+
+        Args:
+            months_ahead: Number of months after the current one to prepare
+
+        Returns:
+            Number of partitions created
+        """
+        if not self._try_lock():
+            self.db.rollback()
+            return 0
+
+        created = self.db.execute(
+            text("SELECT ensure_messages_partitions(:months)"),
+            {"months": months_ahead}
+        ).scalar()
+        self.db.commit()
+        return created or 0
+
+    def apply_retention(self, retention_months: int = RETENTION_MONTHS) -> List[str]:
+        """
+        Detach and drop partitions older than the retention window.
+
+        Args:
+            retention_months: Number of whole months to keep (0 disables retention)
+
+        Returns:
+            Names of the dropped partitions
+        """
+        if retention_months <= 0:
+            return []
+
+        if not self._try_lock():
+            self.db.rollback()
+            return []
+
+        cutoff = retention_cutoff(retention_months)
+        dropped = self.db.execute(
+            text("SELECT drop_messages_partitions_before(:cutoff)"),
+            {"cutoff": cutoff}
+        ).scalars().all()
+        self.db.commit()
+        return list(dropped)
+
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """
+        List the partitions of the messages table with their bounds and sizes.
+
+        Returns:
+            List of dicts with name, bound and estimated row count
+        """
+        rows = self.db.execute(text("""
+            SELECT c.relname AS name,
+                   pg_get_expr(c.relpartbound, c.oid) AS bound,
+                   c.reltuples::bigint AS estimated_rows
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'messages'::regclass
+            ORDER BY c.relname
+        """)).mappings().all()
+        return [dict(row) for row in rows]
+
+
+def run_partition_maintenance() -> Dict[str, Any]:
+    """
+    Run one maintenance pass with its own database session.
+
+    Returns:
+        Summary with created partition count and dropped partition names
+    """
+    from app.database import BackgroundSessionLocal
+
+    db = BackgroundSessionLocal()
+    try:
+        service = PartitionService(db)
+        created = service.ensure_future_partitions()
+        dropped = service.apply_retention()
+        return {"created": created, "dropped": dropped}
+    finally:
+        db.close()
+
+
+async def partition_maintenance_loop(interval_seconds: int = MAINTENANCE_INTERVAL_SECONDS):
+    """
+    Periodically create upcoming partitions and apply the retention policy.
+    Intended to run as a background task for the lifetime of the app.
+
+    Args:
+        interval_seconds: Seconds to wait between runs
+    """
+    while True:
+        try:
+            result = await asyncio.to_thread(run_partition_maintenance)
+            if result["created"] or result["dropped"]:
+                logger.info(
+                    f"🗂️  Mantenimiento de particiones: {result['created']} creadas, "
+                    f"eliminadas: {result['dropped'] or 'ninguna'}"
+                )
+        except Exception as e:
+            logger.error(f"❌ Error en mantenimiento de particiones: {str(e)}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,32 @@
+"""
+Latency percentiles for the in-process stats of BotDO services.
+"""
+from typing import Dict, Iterable, Optional, Sequence
+
+
+def percentiles(
+    samples: Iterable[float],
+    points: Sequence[float] = (0.50, 0.95, 0.99),
+    digits: int = 1
+) -> Dict[str, Optional[float]]:
+    """
+    Nearest-rank percentiles of a sample window.
+
+    Args:
+        samples: Recorded values, in any order
+        points: Percentiles to report, as fractions
+        digits: Decimals kept
+
+    Returns:
+        {"p50": ..., "p95": ...} keyed by point; values are None when there
+        are no samples
+    """
+    ordered = sorted(samples)
+    result: Dict[str, Optional[float]] = {}
+    for point in points:
+        key = f"p{round(point * 100)}"
+        if not ordered:
+            result[key] = None
+        else:
+            result[key] = round(ordered[min(len(ordered) - 1, int(len(ordered) * point))], digits)
+    return result
@@ -0,0 +1,249 @@
+"""
+Principal Cache for BotDO.
+Caches verified admin principals per JWT so authenticated requests skip both
+JWT decoding and the AdminUser lookup. Entries never outlive the token's exp.
+Revocations (password change, deactivation, deletion) arrive through
+Postgres LISTEN/NOTIFY on the 'admin_token_revoked' channel.
+"""
+import hashlib
+import logging
+import os
+import select
+import threading
+import time
+from typing import Dict, Any, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for how long a principal stays cached
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+# Maximum cached tokens per worker
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+REVOCATION_CHANNEL = "admin_token_revoked"
+
+
+def token_digest(token: str) -> str:
+    """SHA-256 digest of a token, so raw tokens are never kept in memory."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Thread-safe cache of verified principals keyed by token digest.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = AUTH_CACHE_TTL_SECONDS,
+        max_entries: int = AUTH_CACHE_MAX_ENTRIES
+    ):
+        """
+        Initialize principal cache.
+
+        Args:
+            ttl_seconds: Maximum lifetime of an entry
+            max_entries: Maximum number of cached tokens
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # digest -> (principal, expires_at)
+        self._entries: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        # username -> digests, for revocation
+        self._by_username: Dict[str, Set[str]] = {}
+        # username -> revocation counter, to reject fills that raced a revocation
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached principal for a token.
+
+        Args:
+            token: Raw JWT
+
+        Returns:
+            Principal dict or None if missing or expired
+        """
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at = entry
+            if time.time() >= expires_at:
+                self._remove(digest, principal["username"])
+                self.misses += 1
+                return None
+            self.hits += 1
+            return principal
+
+    def generation(self, username: str) -> int:
+        """
+        Current revocation counter of a user.
+        Read it before loading the user from the database and pass it to put().
+
+        Args:
+            username: Admin username
+
+        Returns:
+            Revocation counter
+        """
+        with self._lock:
+            return self._generations.get(username, 0)
+
+    def put(self, token: str, principal: Dict[str, Any], exp: float, generation: int):
+        """
+        Cache a verified principal until min(now + TTL, exp).
+
+        Args:
+            token: Raw JWT
+            principal: AdminUser column values
+            exp: Token expiration (UNIX timestamp)
+            generation: Value of generation() read before the database lookup
+        """
+        username = principal["username"]
+        expires_at = min(time.time() + self.ttl_seconds, exp)
+        digest = token_digest(token)
+
+        with self._lock:
+            # A revocation arrived while the principal was being loaded
+            if self._generations.get(username, 0) != generation:
+                return
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired()
+                if len(self._entries) >= self.max_entries:
+                    oldest = next(iter(self._entries))
+                    self._remove(oldest, self._entries[oldest][0]["username"])
+            self._entries[digest] = (principal, expires_at)
+            self._by_username.setdefault(username, set()).add(digest)
+
+    def invalidate_user(self, username: str):
+        """
+        Drop every cached token of a user.
+
+        Args:
+            username: Admin username
+        """
+        with self._lock:
+            self._generations[username] = self._generations.get(username, 0) + 1
+            for digest in self._by_username.pop(username, set()):
+                self._entries.pop(digest, None)
+
+    def clear(self):
+        """Drop all entries and invalidate in-flight fills."""
+        with self._lock:
+            for username in list(self._generations) + list(self._by_username):
+                self._generations[username] = self._generations.get(username, 0) + 1
+            self._entries.clear()
+            self._by_username.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and hit/miss counters."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, digest: str, username: str):
+        """Remove one entry (lock must be held)."""
+        self._entries.pop(digest, None)
+        digests = self._by_username.get(username)
+        if digests:
+            digests.discard(digest)
+            if not digests:
+                del self._by_username[username]
+
+    def _evict_expired(self):
+        """Remove expired entries (lock must be held)."""
+        now = time.time()
+        for digest, (principal, expires_at) in list(self._entries.items()):
+            if now >= expires_at:
+                self._remove(digest, principal["username"])
+
+
+# Process-wide cache used by app.auth.get_current_user
+principal_cache = PrincipalCache()
+
+
+class RevocationListener:
+    """
+    Background thread that LISTENs for token revocations and evicts them
+    from the principal cache. Clears the whole cache whenever the connection
+    drops, since notifications may have been missed.
+    """
+
+    def __init__(self, cache: PrincipalCache = principal_cache, poll_seconds: float = 5.0):
+        """
+        Initialize revocation listener.
+
+        Args:
+            cache: Cache to invalidate
+            poll_seconds: Maximum wait between checks of the stop flag
+        """
+        self.cache = cache
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = False
+
+    def start(self):
+        """Start the listener thread."""
+        self._thread = threading.Thread(target=self._run, name="auth-revocations", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the listener thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_seconds + 1)
+
+    def _connect(self):
+        """Open a dedicated connection outside the pool and LISTEN on it."""
+        from app.database import engines
+
+        conn = engines["background"].raw_connection()
+        conn.detach()  # Long-lived: don't hold a pool slot
+        conn.dbapi_connection.autocommit = True
+        cursor = conn.dbapi_connection.cursor()
+        cursor.execute(f"LISTEN {REVOCATION_CHANNEL}")
+        cursor.close()
+        return conn
+
+    def _run(self):
+        """Listen loop with reconnect and exponential backoff."""
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                self.connected = True
+                backoff = 1.0
+                # Anything revoked while disconnected is unknown: start clean
+                self.cache.clear()
+                logger.info("🔐 Escuchando revocaciones de tokens de administrador")
+
+                dbapi_conn = conn.dbapi_connection
+                while not self._stop.is_set():
+                    readable, _, _ = select.select([dbapi_conn], [], [], self.poll_seconds)
+                    if not readable:
+                        continue
+                    dbapi_conn.poll()
+                    while dbapi_conn.notifies:
+                        notify = dbapi_conn.notifies.pop(0)
+                        self.cache.invalidate_user(notify.payload)
+                        logger.info(f"🔐 Tokens revocados para usuario: {notify.payload}")
+            except Exception as e:
+                self.connected = False
+                self.cache.clear()
+                logger.warning(f"⚠️  Listener de revocaciones desconectado: {str(e)}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
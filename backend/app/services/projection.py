@@ -0,0 +1,109 @@
+"""
+Projection fast path for BotDO list endpoints.
+Selects only the requested columns with a Core query and serializes the rows
+straight to JSON with orjson, skipping ORM instances (identity map,
+attribute instrumentation) and per-row pydantic validation.
+"""
+from typing import Any, Dict, List, Optional
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Message, User
+
+# API field name -> column (same names as MessageResponse / UserResponse)
+MESSAGE_FIELDS: Dict[str, Any] = {
+    "id": Message.id,
+    "message_id": Message.message_id,
+    "channel": Message.channel,
+    "direction": Message.direction,
+    "sender_type": Message.sender_type,
+    "user_id": Message.user_id,
+    "channel_id": Message.channel_id,
+    "message_text": Message.message_text,
+    "timestamp": Message.timestamp,
+    "metadata": Message.platform_metadata,
+    "created_at": Message.created_at,
+    "updated_at": Message.updated_at,
+}
+
+USER_FIELDS: Dict[str, Any] = {
+    "id": User.id,
+    "platform": User.platform,
+    "platform_user_id": User.platform_user_id,
+    "display_name": User.display_name,
+    "email": User.email,
+    "metadata": User.platform_metadata,
+    "created_at": User.created_at,
+    "updated_at": User.updated_at,
+}
+
+
+def parse_fields(fields: str, allowed: Dict[str, Any]) -> List[str]:
+    """
+    Parse a comma-separated `fields` parameter.
+
+    Args:
+        fields: e.g. "id,timestamp,message_text"
+        allowed: Field map of the resource (MESSAGE_FIELDS or USER_FIELDS)
+
+    Returns:
+        Requested field names, without duplicates, in request order
+
+    Raises:
+        ValueError: If no field or an unknown field is requested
+    """
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not names:
+        raise ValueError("fields must list at least one field")
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(allowed)}"
+        )
+    return names
+
+
+def projected_response(
+    db: Session,
+    allowed: Dict[str, Any],
+    fields: str,
+    conditions: Optional[list] = None,
+    order_by: Optional[list] = None,
+    offset: int = 0,
+    limit: int = 100
+) -> Response:
+    """
+    Run a projected list query and return the rows as a JSON response.
+
+    Args:
+        db: Database session
+        allowed: Field map of the resource
+        fields: Comma-separated fields to return
+        conditions: WHERE clauses
+        order_by: ORDER BY clauses
+        offset: Rows to skip
+        limit: Maximum rows to return
+
+    Returns:
+        application/json response with a list of objects holding only `fields`
+
+    Raises:
+        ValueError: If `fields` is invalid
+    """
+    names = parse_fields(fields, allowed)
+    stmt = select(*[allowed[name].label(name) for name in names])
+    if conditions:
+        stmt = stmt.where(*conditions)
+    if order_by:
+        stmt = stmt.order_by(*order_by)
+    stmt = stmt.offset(offset).limit(limit)
+
+    rows = db.execute(stmt).all()
+    # orjson handles UUID and datetime natively
+    return Response(
+        content=orjson.dumps([dict(zip(names, row)) for row in rows]),
+        media_type="application/json"
+    )
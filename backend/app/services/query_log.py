@@ -0,0 +1,357 @@
+"""
+Slow-query log for BotDO.
+Times every SQL statement through SQLAlchemy cursor events and keeps
+per-statement totals keyed by normalized SQL. Statements over
+SLOW_QUERY_MS, and connection checkouts that had to wait for a pool, are
+written as JSON lines to a rotating file together with the route that ran
+them. A sample of slow SELECTs gets an EXPLAIN (ANALYZE, BUFFERS) capture,
+run off the request path and rate limited.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+# Statements slower than this are recorded
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Pool checkouts that waited longer than this are recorded
+SLOW_POOL_WAIT_MS = float(os.getenv("SLOW_POOL_WAIT_MS", "100"))
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "logs/slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+# Fraction of slow SELECTs that get an EXPLAIN, and at most this many per minute
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.2"))
+SLOW_QUERY_EXPLAIN_PER_MINUTE = int(os.getenv("SLOW_QUERY_EXPLAIN_PER_MINUTE", "6"))
+# EXPLAIN ANALYZE runs the query again; cap how long it may take
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+# Distinct normalized statements tracked before new ones are lumped together
+SLOW_QUERY_MAX_STATEMENTS = int(os.getenv("SLOW_QUERY_MAX_STATEMENTS", "2000"))
+
+# ASGI scope of the request being served (set by QueryRouteMiddleware)
+_current_scope: ContextVar[Optional[dict]] = ContextVar("query_log_scope", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# Only plain reads are safe to run again under EXPLAIN ANALYZE
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_NOT_EXPLAINABLE = re.compile(r"\b(INSERT|UPDATE|DELETE|FOR\s+UPDATE|FOR\s+SHARE|NEXTVAL|SETVAL)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape: literals and parameters become ?,
+    IN/VALUES lists collapse to (?...) and whitespace is collapsed.
+
+    Args:
+        statement: SQL as sent to the driver
+
+    Returns:
+        Normalized SQL
+    """
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PARAMETER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _VALUE_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def current_route() -> str:
+    """Route of the request running the current statement, or 'background'."""
+    scope = _current_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class QueryRouteMiddleware:
+    """
+    ASGI middleware that exposes the request scope to the SQL event hooks,
+    so recorded statements carry the route (template) that ran them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+
+class QueryLog:
+    """
+    Statement timings, slow-statement records and EXPLAIN captures.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Normalized SQL -> aggregate timings
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self._recent: deque = deque(maxlen=100)
+        self._explain_times: deque = deque()
+        self._explain_executor: Optional[ThreadPoolExecutor] = None
+        self._file_logger: Optional[logging.Logger] = None
+        self._installed = False
+        self.started_at = datetime.now()
+
+    # ----------------------------------------------------------------
+    # Setup
+    # ----------------------------------------------------------------
+
+    def install(self):
+        """Register the SQLAlchemy hooks and open the rotating log file."""
+        if self._installed or not SLOW_QUERY_LOG_ENABLED:
+            return
+        from app.database import pool_wait_hooks
+
+        directory = os.path.dirname(SLOW_QUERY_LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG_PATH,
+            maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=SLOW_QUERY_LOG_BACKUPS,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._file_logger = logging.getLogger("botdo.slow_queries")
+        self._file_logger.setLevel(logging.INFO)
+        self._file_logger.propagate = False
+        self._file_logger.addHandler(handler)
+
+        self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        pool_wait_hooks.append(self._on_pool_wait)
+        self._installed = True
+        logger.info(
+            f"🐢 Log de consultas lentas activo: > {SLOW_QUERY_MS:.0f} ms -> {SLOW_QUERY_LOG_PATH}"
+        )
+
+    def uninstall(self):
+        """Remove the hooks and stop the EXPLAIN worker."""
+        if not self._installed:
+            return
+        from app.database import pool_wait_hooks
+
+        event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", self._after_cursor_execute)
+        if self._on_pool_wait in pool_wait_hooks:
+            pool_wait_hooks.remove(self._on_pool_wait)
+        self._explain_executor.shutdown(wait=False, cancel_futures=True)
+        for handler in list(self._file_logger.handlers):
+            self._file_logger.removeHandler(handler)
+            handler.close()
+        self._installed = False
+
+    # ----------------------------------------------------------------
+    # Hooks
+    # ----------------------------------------------------------------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_log_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_log_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        sql = normalize_sql(statement)
+
+        with self._lock:
+            stats = self._statements.get(sql)
+            if stats is None:
+                if len(self._statements) >= SLOW_QUERY_MAX_STATEMENTS:
+                    sql = "(other statements)"
+                stats = self._statements.setdefault(sql, {
+                    "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "slow_calls": 0,
+                    "routes": {}, "last_explain": None
+                })
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if elapsed_ms < SLOW_QUERY_MS:
+                return
+            route = current_route()
+            stats["slow_calls"] += 1
+            stats["routes"][route] = stats["routes"].get(route, 0) + 1
+
+        record = {
+            "type": "slow_query",
+            "at": datetime.now().isoformat(),
+            "fingerprint": _fingerprint(sql),
+            "duration_ms": round(elapsed_ms, 1),
+            "route": route,
+            "database": conn.engine.url.database,
+            "rows": getattr(cursor, "rowcount", None),
+            "executemany": executemany,
+            "sql": sql,
+        }
+        self._write(record)
+
+        if not executemany and self._should_explain(statement):
+            self._explain_executor.submit(self._explain, _explain_engine(conn.engine), statement, parameters, sql)
+
+    def _on_pool_wait(self, pool_name: str, wait_ms: float):
+        if wait_ms < SLOW_POOL_WAIT_MS:
+            return
+        self._write({
+            "type": "pool_wait",
+            "at": datetime.now().isoformat(),
+            "pool": pool_name,
+            "wait_ms": round(wait_ms, 1),
+            "route": current_route(),
+        })
+
+    # ----------------------------------------------------------------
+    # EXPLAIN capture
+    # ----------------------------------------------------------------
+
+    def _should_explain(self, statement: str) -> bool:
+        """Sample slow SELECTs, at most SLOW_QUERY_EXPLAIN_PER_MINUTE."""
+        if not _EXPLAINABLE.match(statement) or _NOT_EXPLAINABLE.search(statement):
+            return False
+        if random.random() >= SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._explain_times and now - self._explain_times[0] > 60:
+                self._explain_times.popleft()
+            if len(self._explain_times) >= SLOW_QUERY_EXPLAIN_PER_MINUTE:
+                return False
+            self._explain_times.append(now)
+        return True
+
+    def _explain(self, engine, statement: str, parameters, sql: str):
+        """Run EXPLAIN (ANALYZE, BUFFERS) in a rolled-back transaction."""
+        conn = None
+        try:
+            conn = engine.raw_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            cursor.close()
+        except Exception as e:
+            plan = None
+            logger.warning(f"⚠️  No se pudo capturar EXPLAIN de consulta lenta: {str(e)}")
+        finally:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                finally:
+                    conn.close()
+        if plan is None:
+            return
+
+        with self._lock:
+            stats = self._statements.get(sql)
+            if stats is not None:
+                stats["last_explain"] = {"at": datetime.now().isoformat(), "plan": plan}
+        self._write({
+            "type": "explain",
+            "at": datetime.now().isoformat(),
+            "fingerprint": _fingerprint(sql),
+            "sql": sql,
+            "plan": plan,
+        })
+
+    # ----------------------------------------------------------------
+    # Output
+    # ----------------------------------------------------------------
+
+    def _write(self, record: Dict[str, Any]):
+        with self._lock:
+            self._recent.append(record)
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """
+        Statements with the highest total (or max, or call count) time.
+
+        Args:
+            limit: Statements to return
+            order_by: total_ms, max_ms, calls or slow_calls
+
+        Returns:
+            Statement aggregates, highest first
+
+        Raises:
+            ValueError: If order_by is not a known column
+        """
+        if order_by not in ("total_ms", "max_ms", "calls", "slow_calls"):
+            raise ValueError("order_by must be one of: total_ms, max_ms, calls, slow_calls")
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": _fingerprint(sql),
+                    "sql": sql,
+                    "calls": stats["calls"],
+                    "total_ms": round(stats["total_ms"], 1),
+                    "mean_ms": round(stats["total_ms"] / stats["calls"], 2),
+                    "max_ms": round(stats["max_ms"], 1),
+                    "slow_calls": stats["slow_calls"],
+                    "routes": dict(sorted(stats["routes"].items(), key=lambda r: -r[1])[:5]),
+                    "last_explain": stats["last_explain"],
+                }
+                for sql, stats in self._statements.items()
+            ]
+        rows.sort(key=lambda r: -r[order_by])
+        return rows[:limit]
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent slow-query, pool-wait and explain records, newest first."""
+        with self._lock:
+            return list(self._recent)[::-1][:limit]
+
+    def reset(self):
+        """Forget every aggregate and record (the log file is kept)."""
+        with self._lock:
+            self._statements.clear()
+            self._recent.clear()
+            self.started_at = datetime.now()
+
+
+def _explain_engine(engine):
+    """Replicas explain on themselves; the primary on the background pool."""
+    from app.database import engines, replica_engines
+
+    return engine if engine in replica_engines else engines["background"]
+
+
+def _fingerprint(sql: str) -> str:
+    return hashlib.sha1(sql.encode()).hexdigest()[:12]
+
+
+# Process-wide query log
+query_log = QueryLog()
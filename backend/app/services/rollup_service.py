@@ -0,0 +1,310 @@
+"""
+Rollup Service for BotDO.
+Maintains hourly message count rollups and serves time series from them.
+"""
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterable
+from uuid import UUID
+
+from sqlalchemy import text, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import MessageRollupHourly, RollupState
+
+logger = logging.getLogger(__name__)
+
+# Increment rollups in the same transaction as each message insert
+ROLLUP_INLINE = os.getenv("ROLLUP_INLINE", "true").lower() == "true"
+# Seconds between catch-up runs
+ROLLUP_CATCHUP_INTERVAL_SECONDS = int(os.getenv("ROLLUP_CATCHUP_INTERVAL_SECONDS", "300"))
+# Stay this far behind now() so slow in-flight transactions are not skipped
+ROLLUP_CATCHUP_GRACE_SECONDS = int(os.getenv("ROLLUP_CATCHUP_GRACE_SECONDS", "60"))
+
+# Stored instead of NULL so channel_id can be part of the primary key
+NO_CHANNEL_ID = UUID("00000000-0000-0000-0000-000000000000")
+
+ROLLUP_NAME = "message_rollups_hourly"
+DIMENSIONS = ("channel", "direction", "sender_type", "channel_id")
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Advisory lock key so only one worker runs the catch-up at a time
+_CATCHUP_LOCK_KEY = 0x6D736772  # "msgr"
+
+_RECOMPUTE_BUCKET_SQL = text("""
+    INSERT INTO message_rollups_hourly
+        (bucket, channel, direction, sender_type, channel_id, message_count)
+    SELECT date_trunc('hour', timestamp), channel, direction, sender_type,
+           COALESCE(channel_id, :no_channel), COUNT(*)
+    FROM messages
+    WHERE timestamp >= :bucket AND timestamp < :bucket_end
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT ON CONSTRAINT message_rollups_hourly_pkey
+    DO UPDATE SET message_count = EXCLUDED.message_count, updated_at = CURRENT_TIMESTAMP
+""")
+
+
+def _bucket(timestamp: datetime) -> datetime:
+    """Truncate a timestamp to its hour bucket."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class RollupService:
+    """
+    Service for maintaining and querying hourly message rollups.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initialize rollup service.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    def record_messages(self, messages: Iterable[Any]):
+        """
+        Increment the rollups for newly inserted messages.
+        Does not commit: call it before the commit that inserts the messages
+        so counts and rows land atomically.
+
+        Args:
+            messages: Message objects or dicts with timestamp, channel,
+                direction, sender_type and channel_id
+        """
+        counts: Counter = Counter()
+        for message in messages:
+            get = message.get if isinstance(message, dict) else lambda key: getattr(message, key)
+            counts[(
+                _bucket(get("timestamp")),
+                get("channel"),
+                get("direction"),
+                get("sender_type"),
+                get("channel_id") or NO_CHANNEL_ID
+            )] += 1
+
+        if not counts:
+            return
+
+        # Sorted keys give every writer the same lock order (no deadlocks)
+        values = [
+            {
+                "bucket": key[0],
+                "channel": key[1],
+                "direction": key[2],
+                "sender_type": key[3],
+                "channel_id": key[4],
+                "message_count": count
+            }
+            for key, count in sorted(counts.items(), key=lambda item: tuple(map(str, item[0])))
+        ]
+        stmt = insert(MessageRollupHourly).values(values)
+        stmt = stmt.on_conflict_do_update(
+            constraint="message_rollups_hourly_pkey",
+            set_={
+                "message_count": MessageRollupHourly.message_count + stmt.excluded.message_count,
+                "updated_at": func.now()
+            }
+        )
+        self.db.execute(stmt)
+
+    def catch_up(self) -> Dict[str, Any]:
+        """
+        Recompute every hour bucket touched by messages created since the
+        last watermark. Recomputing whole buckets from the raw table is
+        idempotent, so it also repairs any drift in the inline counts.
+
+        Returns:
+            Summary with the number of recomputed buckets and the new watermark
+        """
+        if not self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _CATCHUP_LOCK_KEY}
+        ).scalar():
+            self.db.rollback()
+            return {"buckets": 0, "watermark": None}
+
+        state = self.db.query(RollupState).filter(RollupState.name == ROLLUP_NAME).first()
+        watermark = state.watermark if state else datetime(1970, 1, 1)
+        new_watermark = self.db.execute(
+            text("SELECT LOCALTIMESTAMP - make_interval(secs => :grace)"),
+            {"grace": ROLLUP_CATCHUP_GRACE_SECONDS}
+        ).scalar()
+
+        if new_watermark <= watermark:
+            self.db.rollback()
+            return {"buckets": 0, "watermark": watermark}
+
+        buckets = self.db.execute(text("""
+            SELECT DISTINCT date_trunc('hour', timestamp)
+            FROM messages
+            WHERE created_at > :watermark AND created_at <= :new_watermark
+        """), {"watermark": watermark, "new_watermark": new_watermark}).scalars().all()
+
+        for bucket in sorted(buckets):
+            self.db.execute(_RECOMPUTE_BUCKET_SQL, {
+                "bucket": bucket,
+                "bucket_end": bucket + timedelta(hours=1),
+                "no_channel": NO_CHANNEL_ID
+            })
+
+        if state:
+            state.watermark = new_watermark
+        else:
+            self.db.add(RollupState(name=ROLLUP_NAME, watermark=new_watermark))
+        self.db.commit()
+
+        return {"buckets": len(buckets), "watermark": new_watermark}
+
+    def get_series(
+        self,
+        date_from: datetime,
+        date_to: datetime,
+        granularity: str = "hour",
+        group_by: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get message counts over time from the rollups.
+
+        Args:
+            date_from: Range start (inclusive)
+            date_to: Range end (inclusive)
+            granularity: Bucket size: hour, day, week or month
+            group_by: Optional dimension to split the series by
+            filters: Optional equality filters on dimensions
+
+        Returns:
+            List of points: {"bucket", "count"} plus the group_by dimension
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularity must be one of: {', '.join(GRANULARITIES)}")
+        if group_by and group_by not in DIMENSIONS:
+            raise ValueError(f"group_by must be one of: {', '.join(DIMENSIONS)}")
+
+        bucket_col = func.date_trunc(granularity, MessageRollupHourly.bucket).label("bucket")
+        columns = [bucket_col]
+        if group_by:
+            columns.append(getattr(MessageRollupHourly, group_by).label(group_by))
+
+        query = self.db.query(
+            *columns,
+            func.sum(MessageRollupHourly.message_count).label("count")
+        ).filter(
+            MessageRollupHourly.bucket >= _bucket(date_from),
+            MessageRollupHourly.bucket <= date_to
+        )
+
+        for dimension, value in (filters or {}).items():
+            if value is None:
+                continue
+            query = query.filter(getattr(MessageRollupHourly, dimension) == value)
+
+        group_columns = [bucket_col] + columns[1:]
+        rows = query.group_by(*group_columns).order_by(bucket_col).all()
+
+        series = []
+        for row in rows:
+            point = {"bucket": row.bucket, "count": int(row.count)}
+            if group_by:
+                value = getattr(row, group_by)
+                point[group_by] = None if value == NO_CHANNEL_ID else value
+            series.append(point)
+        return series
+
+    def reconcile(self, date_from: datetime, date_to: datetime) -> Dict[str, Any]:
+        """
+        Compare the rollups with a GROUP BY over the raw messages table.
+        Archived or retention-dropped messages show up as rollup surplus.
+
+        Args:
+            date_from: Range start (inclusive, truncated to the hour)
+            date_to: Range end (exclusive, truncated to the hour)
+
+        Returns:
+            Totals from both sources and the list of mismatching groups
+        """
+        params = {
+            "date_from": _bucket(date_from),
+            "date_to": _bucket(date_to),
+            "no_channel": NO_CHANNEL_ID
+        }
+        raw = {
+            tuple(row[:5]): row[5]
+            for row in self.db.execute(text("""
+                SELECT date_trunc('hour', timestamp), channel, direction, sender_type,
+                       COALESCE(channel_id, :no_channel), COUNT(*)
+                FROM messages
+                WHERE timestamp >= :date_from AND timestamp < :date_to
+                GROUP BY 1, 2, 3, 4, 5
+            """), params).all()
+        }
+        rolled = {
+            tuple(row[:5]): row[5]
+            for row in self.db.execute(text("""
+                SELECT bucket, channel, direction, sender_type, channel_id, message_count
+                FROM message_rollups_hourly
+                WHERE bucket >= :date_from AND bucket < :date_to
+            """), params).all()
+        }
+
+        mismatches = []
+        for key in sorted(set(raw) | set(rolled), key=lambda k: tuple(map(str, k))):
+            raw_count = raw.get(key, 0)
+            rollup_count = rolled.get(key, 0)
+            if raw_count != rollup_count:
+                mismatches.append({
+                    "bucket": key[0],
+                    "channel": key[1],
+                    "direction": key[2],
+                    "sender_type": key[3],
+                    "channel_id": None if key[4] == NO_CHANNEL_ID else key[4],
+                    "raw_count": raw_count,
+                    "rollup_count": rollup_count
+                })
+
+        return {
+            "date_from": params["date_from"],
+            "date_to": params["date_to"],
+            "raw_total": sum(raw.values()),
+            "rollup_total": sum(rolled.values()),
+            "consistent": not mismatches,
+            "mismatches": mismatches
+        }
+
+
+def run_rollup_catch_up() -> Dict[str, Any]:
+    """
+    Run one catch-up pass with its own database session.
+
+    Returns:
+        Catch-up summary
+    """
+    from app.database import BackgroundSessionLocal
+
+    db = BackgroundSessionLocal()
+    try:
+        return RollupService(db).catch_up()
+    finally:
+        db.close()
+
+
+async def rollup_catch_up_loop(interval_seconds: int = ROLLUP_CATCHUP_INTERVAL_SECONDS):
+    """
+    Periodically recompute rollup buckets touched by new messages.
+
+    Args:
+        interval_seconds: Seconds to wait between runs
+    """
+    while True:
+        try:
+            result = await asyncio.to_thread(run_rollup_catch_up)
+            if result["buckets"]:
+                logger.info(f"📊 Rollups actualizados: {result['buckets']} buckets recalculados")
+        except Exception as e:
+            logger.error(f"❌ Error actualizando rollups: {str(e)}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,432 @@
+"""
+Semantic Memory for BotDO.
+Retrieves older messages of a channel that are relevant to the current one,
+so process_message can add a few of them to the prompt without sending more
+history:
+- a pluggable embedder (MEMORY_EMBEDDER); the default hashing embedder
+  (signed feature hashing of words and word pairs, sublinear TF, IDF at
+  query time) runs offline
+- one in-memory index per channel: a float32 matrix of unit vectors grown
+  in place, searched with a single matrix-vector product
+- indexes are built on first use from the database and caught up from a
+  timestamp watermark on every query, so messages written by other workers
+  are picked up too
+- snippets are added under a token budget (MEMORY_TOKEN_BUDGET)
+"""
+import importlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.conversation_summary import estimate_tokens
+from app.services.percentiles import percentiles
+
+# numpy is imported where vectors are built, so workers with MEMORY_ENABLED
+# off never load it
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: adds retrieved snippets to every prompt
+MEMORY_ENABLED = os.getenv("MEMORY_ENABLED", "false").lower() == "true"
+# "hashing", or "package.module:ClassName" for a custom embedder
+MEMORY_EMBEDDER = os.getenv("MEMORY_EMBEDDER", "hashing")
+# Vector size of the hashing embedder (a power of two)
+MEMORY_DIMENSIONS = int(os.getenv("MEMORY_DIMENSIONS", "256"))
+# Snippets retrieved per turn, the minimum cosine similarity, and their token budget
+MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", "3"))
+MEMORY_MIN_SCORE = float(os.getenv("MEMORY_MIN_SCORE", "0.25"))
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "300"))
+# Characters kept of each snippet
+MEMORY_SNIPPET_CHARS = int(os.getenv("MEMORY_SNIPPET_CHARS", "400"))
+# Messages indexed per channel (newest kept) and how far back they go
+MEMORY_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", "2000"))
+MEMORY_LOOKBACK_DAYS = int(os.getenv("MEMORY_LOOKBACK_DAYS", "180"))
+# Channel indexes kept in memory per worker (least recently used are dropped)
+MEMORY_MAX_CHANNELS = int(os.getenv("MEMORY_MAX_CHANNELS", "100"))
+
+QUERY_SAMPLES = 1000
+_MIN_CAPACITY = 64
+
+_TOKEN = re.compile(r"\w\w+")
+
+_LOAD_SQL = text("""
+    SELECT sender_type, message_text, timestamp
+    FROM messages
+    WHERE channel_id = :channel_id
+      AND timestamp > :after
+      AND message_text IS NOT NULL AND message_text <> ''
+    ORDER BY timestamp DESC
+    LIMIT :limit
+""")
+
+
+def tokenize(value: str) -> List[str]:
+    """
+    Lowercased words without accents, plus consecutive word pairs.
+
+    Args:
+        value: Text
+
+    Returns:
+        Features to hash
+    """
+    folded = unicodedata.normalize("NFKD", value.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    words = _TOKEN.findall(folded)
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class HashingEmbedder:
+    """
+    Offline embedder: signed feature hashing with sublinear term frequency.
+    """
+
+    def __init__(self, dimensions: int = MEMORY_DIMENSIONS):
+        """
+        Initialize embedder.
+
+        Args:
+            dimensions: Vector size (rounded up to a power of two)
+        """
+        self.dimensions = 1 << max(4, (dimensions - 1).bit_length())
+        self._mask = self.dimensions - 1
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), dimensions); rows are unit
+            vectors (or zero for texts without words)
+        """
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, value in enumerate(texts):
+            for feature in tokenize(value or ""):
+                digest = zlib.crc32(feature.encode())
+                # One bit of the hash picks the sign, so collisions tend to cancel out
+                vectors[row, digest & self._mask] += 1.0 if digest & 0x80000000 else -1.0
+        np.copysign(np.log1p(np.abs(vectors)), vectors, out=vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def load_embedder(spec: str = MEMORY_EMBEDDER):
+    """
+    Build the configured embedder.
+
+    Args:
+        spec: "hashing" or "package.module:ClassName"; the class is
+            instantiated without arguments and must expose `dimensions` and
+            `embed(texts) -> float32 array of unit rows`
+
+    Returns:
+        Embedder instance
+
+    Raises:
+        ValueError: If the spec is not a known name or an importable class
+    """
+    if spec == "hashing":
+        return HashingEmbedder()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Invalid MEMORY_EMBEDDER: {spec}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class ChannelIndex:
+    """
+    Unit vectors of one channel's messages, with their text and time.
+    """
+
+    def __init__(self, dimensions: int, max_messages: int = MEMORY_MAX_MESSAGES):
+        """
+        Initialize an empty index.
+
+        Args:
+            dimensions: Vector size
+            max_messages: Messages kept (oldest are dropped)
+        """
+        import numpy as np
+
+        self.max_messages = max_messages
+        self.vectors = np.zeros((_MIN_CAPACITY, dimensions), dtype=np.float32)
+        self.timestamps = np.zeros(_MIN_CAPACITY, dtype=np.float64)
+        # Documents with a non-zero weight per dimension, for IDF
+        self.df = np.zeros(dimensions, dtype=np.int32)
+        self.texts: List[str] = []
+        self.senders: List[str] = []
+        self.size = 0
+        self.watermark = datetime.min
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.timestamps.nbytes + self.df.nbytes
+
+    def add(self, vectors: "np.ndarray", rows: List[Any]):
+        """
+        Append embedded messages (oldest first).
+
+        Args:
+            vectors: Their unit vectors
+            rows: (sender_type, message_text, timestamp) per vector
+        """
+        import numpy as np
+
+        count = len(rows)
+        if not count:
+            return
+        if self.size + count > len(self.vectors):
+            capacity = max(len(self.vectors) * 2, self.size + count)
+            self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+            self.timestamps = np.resize(self.timestamps, capacity)
+        self.vectors[self.size:self.size + count] = vectors
+        self.timestamps[self.size:self.size + count] = [row[2].timestamp() for row in rows]
+        self.df += (vectors != 0).sum(axis=0, dtype=np.int32)
+        self.senders.extend(row[0] for row in rows)
+        self.texts.extend(row[1][:MEMORY_SNIPPET_CHARS] for row in rows)
+        self.size += count
+        self.watermark = max(self.watermark, rows[-1][2])
+        if self.size > self.max_messages:
+            self._drop_oldest(self.size - self.max_messages)
+
+    def _drop_oldest(self, count: int):
+        import numpy as np
+
+        keep = slice(count, self.size)
+        self.size -= count
+        self.vectors[:self.size] = self.vectors[keep]
+        self.timestamps[:self.size] = self.timestamps[keep]
+        self.texts = self.texts[count:]
+        self.senders = self.senders[count:]
+        self.df = (self.vectors[:self.size] != 0).sum(axis=0, dtype=np.int32)
+
+    def search(self, query: "np.ndarray", k: int, before: Optional[datetime], min_score: float) -> List[Dict[str, Any]]:
+        """
+        Most similar messages older than `before`.
+
+        Args:
+            query: Query vector (term weights, not yet IDF-weighted)
+            k: Maximum results
+            before: Only messages older than this (None: all)
+            min_score: Minimum cosine similarity
+
+        Returns:
+            Matches, best first: {"score", "sender_type", "text", "timestamp"}
+        """
+        if not self.size or k <= 0:
+            return []
+        import numpy as np
+
+        idf = np.log((1 + self.size) / (1 + self.df)).astype(np.float32) + 1
+        weighted = query * idf
+        norm = np.linalg.norm(weighted)
+        if norm == 0:
+            return []
+        scores = self.vectors[:self.size] @ (weighted / norm)
+        if before is not None:
+            scores[self.timestamps[:self.size] >= before.timestamp()] = -np.inf
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "score": float(scores[i]),
+                "sender_type": self.senders[i],
+                "text": self.texts[i],
+                "timestamp": datetime.fromtimestamp(self.timestamps[i])
+            }
+            for i in top if scores[i] >= min_score
+        ]
+
+
+class SemanticMemory:
+    """
+    Per-worker channel indexes and retrieval for prompts.
+    """
+
+    def __init__(self, embedder=None, max_channels: int = MEMORY_MAX_CHANNELS):
+        """
+        Initialize memory.
+
+        Args:
+            embedder: Embedder (defaults to load_embedder() on first use)
+            max_channels: Channel indexes kept in memory
+        """
+        self._embedder = embedder
+        self.max_channels = max_channels
+        self._indexes: "OrderedDict[UUID, ChannelIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._query_ms: Deque[float] = deque(maxlen=QUERY_SAMPLES)
+        self._build_ms: Deque[float] = deque(maxlen=QUERY_SAMPLES)
+        self.queries = 0
+        self.snippets = 0
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = load_embedder()
+        return self._embedder
+
+    def _index(self, channel_db_id: UUID) -> ChannelIndex:
+        with self._lock:
+            index = self._indexes.get(channel_db_id)
+            if index is None:
+                index = self._indexes[channel_db_id] = ChannelIndex(self.embedder.dimensions)
+                while len(self._indexes) > self.max_channels:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(channel_db_id)
+            return index
+
+    def catch_up(self, db: Session, index: ChannelIndex, channel_db_id: UUID) -> int:
+        """
+        Embed the channel's messages newer than the index watermark.
+
+        Returns:
+            Messages added
+        """
+        after = index.watermark
+        if after == datetime.min:
+            after = datetime.now() - timedelta(days=MEMORY_LOOKBACK_DAYS)
+        rows = db.execute(_LOAD_SQL, {
+            "channel_id": channel_db_id, "after": after, "limit": index.max_messages
+        }).all()
+        rows.reverse()
+        if rows:
+            index.add(self.embedder.embed([row[1] for row in rows]), rows)
+        return len(rows)
+
+    def recall(
+        self,
+        db: Session,
+        channel_db_id: UUID,
+        query: str,
+        before: Optional[datetime] = None,
+        k: int = MEMORY_TOP_K
+    ) -> List[Dict[str, Any]]:
+        """
+        Older messages of a channel relevant to `query`.
+
+        Args:
+            db: Database session
+            channel_db_id: Database UUID of the channel
+            query: Current message text
+            before: Only messages older than this (the start of the history
+                already in the prompt)
+            k: Maximum results
+
+        Returns:
+            Matches, best first (see ChannelIndex.search)
+        """
+        started = time.perf_counter()
+        index = self._index(channel_db_id)
+        with index.lock:
+            building = index.size == 0
+            added = self.catch_up(db, index, channel_db_id)
+            if building and added:
+                self._build_ms.append((time.perf_counter() - started) * 1000)
+            query_vector = self.embedder.embed([query])[0]
+            matches = index.search(query_vector, k, before, MEMORY_MIN_SCORE)
+        self.queries += 1
+        self._query_ms.append((time.perf_counter() - started) * 1000)
+        return matches
+
+    def forget(self, channel_db_id: UUID):
+        """Drop a channel's index (rebuilt on next use)."""
+        with self._lock:
+            self._indexes.pop(channel_db_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Indexed channels and messages, memory used and latencies."""
+        with self._lock:
+            indexes = list(self._indexes.values())
+        return {
+            "enabled": MEMORY_ENABLED,
+            "channels": len(indexes),
+            "messages": sum(index.size for index in indexes),
+            "bytes": sum(index.nbytes for index in indexes),
+            "queries": self.queries,
+            "snippets": self.snippets,
+            "build_ms": percentiles(self._build_ms, (0.50, 0.95), digits=2),
+            "recall_ms": percentiles(self._query_ms, (0.50, 0.95), digits=2)
+        }
+
+
+def memory_message(matches: List[Dict[str, Any]], token_budget: int = MEMORY_TOKEN_BUDGET) -> Optional[Dict[str, str]]:
+    """
+    Prompt message with retrieved snippets, best first, within a token budget.
+
+    Args:
+        matches: Results of SemanticMemory.recall
+        token_budget: Maximum estimated tokens of the message
+
+    Returns:
+        System message in OpenAI format, or None if no snippet fits
+    """
+    header = "Fragmentos relevantes de conversaciones anteriores de este canal:"
+    lines, used = [], estimate_tokens(header)
+    for match in matches:
+        who = "asistente" if match["sender_type"] == "bot" else "usuario"
+        line = f"- [{match['timestamp']:%Y-%m-%d}] {who}: {match['text']}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    if not lines:
+        return None
+    semantic_memory.snippets += len(lines)
+    return {"role": "system", "content": "\n".join([header] + lines)}
+
+
+def get_memory_snippets(
+    db: Session,
+    channel_db_id: UUID,
+    query: str,
+    before: Optional[datetime]
+) -> Optional[Dict[str, str]]:
+    """
+    Retrieved-snippets prompt message when memory is enabled.
+
+    Errors are logged and the turn goes on without snippets.
+
+    Args:
+        db: Database session
+        channel_db_id: Database UUID of the channel
+        query: Current message text
+        before: Start of the history already in the prompt
+
+    Returns:
+        System message in OpenAI format, or None
+    """
+    if not MEMORY_ENABLED or not query:
+        return None
+    try:
+        return memory_message(semantic_memory.recall(db, channel_db_id, query, before))
+    except Exception as e:
+        logger.warning(f"⚠️  Memoria semántica no disponible para este turno: {str(e)}")
+        return None
+
+
+# Process-wide memory used by process_message
+semantic_memory = SemanticMemory()
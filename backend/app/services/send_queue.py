@@ -0,0 +1,235 @@
+"""
+Keyed Send Queue for BotDO.
+Shared structure of the outbound connector queues (Whapi, Slack):
+- one FIFO per key (a chat, a thread), drained by one worker per key that
+  exits once the key's queue is empty, so messages to a key go out in order
+- a bound on messages accepted but not yet sent
+- retry with exponential backoff on 429, 5xx and network errors,
+  honouring Retry-After
+- a single pooled httpx client shared by every send
+Subclasses deliver one queued item and own their rate limits.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+from app.services.percentiles import percentiles
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 30.0
+LATENCY_SAMPLES = 1000
+
+
+class SendQueueFull(Exception):
+    """Raised when a send queue already holds its maximum of unsent messages."""
+
+
+def retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    """
+    Backoff before the next attempt: Retry-After when the API sends it,
+    otherwise exponential with full jitter.
+
+    Args:
+        attempt: Attempts already made (1-based)
+        response: Failed response, if any
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_MAX_SECONDS)
+            except ValueError:
+                pass
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+class KeyedSendQueue:
+    """
+    Per-key FIFO send queue; subclasses implement _deliver_item.
+    """
+
+    # Platform name used in logs and errors, e.g. "Slack"
+    platform = ""
+
+    def __init__(self, queue_max: int, max_retries: int, max_connections: int):
+        """
+        Initialize the queue.
+
+        Args:
+            queue_max: Messages accepted but not yet sent before enqueue is refused
+            max_retries: Retries after the first attempt of a delivery
+            max_connections: Connections kept open to the platform API
+        """
+        self.queue_max = queue_max
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._queues: Dict[Hashable, Deque[Tuple[Any, asyncio.Future, float]]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    def start(self):
+        """Create the pooled HTTP client (idempotent)."""
+        if self._http is not None:
+            return
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+        )
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Let queued messages drain for up to `timeout` seconds, then cancel
+        the rest and close the HTTP client.
+        """
+        workers = list(self._workers.values())
+        if workers:
+            done, pending = await asyncio.wait(workers, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(
+                    f"⚠️  Cola de envío de {self.platform} cerrada con {self.depth()} mensajes pendientes"
+                )
+                await asyncio.gather(*pending, return_exceptions=True)
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def depth(self) -> int:
+        """Messages accepted but not yet sent (including the one in flight per key)."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _enqueue(self, key: Hashable, item: Any) -> asyncio.Future:
+        """
+        Append an item to its key's FIFO, starting the key's worker if idle.
+
+        Returns:
+            Future resolved with _deliver_item's result (or its final error)
+
+        Raises:
+            SendQueueFull: If the queue is at queue_max
+        """
+        if self.depth() >= self.queue_max:
+            raise SendQueueFull(f"{self.platform} send queue is full ({self.queue_max})")
+
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        # Replies are queued without awaiting the future and _run already logs
+        # a dropped message, so mark its exception retrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._queues.setdefault(key, deque()).append((item, future, time.perf_counter()))
+
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._run(key))
+        return future
+
+    async def _run(self, key: Hashable):
+        """Deliver one key's items in order; exits when its queue is empty."""
+        queue = self._queues[key]
+        try:
+            while queue:
+                # Leave the item at the head while it is in flight so depth() counts it
+                item, future, enqueued_at = queue[0]
+                try:
+                    result = await self._deliver_item(key, item)
+                    self.sent += 1
+                    if not future.done():
+                        future.set_result(result)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(
+                        f"❌ Mensaje a {self.platform} {self._target(key)} descartado tras reintentos: {str(e)}"
+                    )
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    self._latencies.append((time.perf_counter() - enqueued_at) * 1000)
+                queue.popleft()
+        finally:
+            del self._workers[key]
+            if not queue:
+                del self._queues[key]
+            self._release(key)
+
+    async def _deliver_item(self, key: Hashable, item: Any) -> Any:
+        """Deliver one queued item within the subclass's rate limits."""
+        raise NotImplementedError
+
+    def _release(self, key: Hashable):
+        """Called when a key's worker exits; drop per-key state no longer needed."""
+
+    def _target(self, key: Hashable) -> str:
+        """Destination shown in logs for a key."""
+        return str(key)
+
+    def _retryable(self, error: Exception) -> Tuple[bool, str]:
+        """
+        Whether a failed attempt is worth repeating.
+
+        Returns:
+            (retryable, reason shown in logs)
+        """
+        if isinstance(error, httpx.HTTPStatusError):
+            status_code = error.response.status_code
+            return status_code == 429 or status_code >= 500, f"HTTP {status_code}"
+        if isinstance(error, httpx.TransportError):
+            return True, "red"
+        return False, type(error).__name__
+
+    async def _with_retries(self, target: str, attempt_once: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Call `attempt_once` until it succeeds, retrying what _retryable
+        accepts up to max_retries times with backoff.
+
+        Args:
+            target: Destination shown in logs
+            attempt_once: Makes one delivery attempt
+
+        Returns:
+            The successful attempt's result
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await attempt_once()
+            except Exception as e:
+                retryable, reason = self._retryable(e)
+                if not retryable or attempt > self.max_retries:
+                    raise
+                response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+
+            delay = retry_delay(attempt, response)
+            self.retries += 1
+            logger.warning(
+                f"⚠️  Reintentando envío a {self.platform} {target} en {delay:.1f}s "
+                f"(intento {attempt}, {reason})"
+            )
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, counters and send latency (enqueue to delivery)."""
+        return {
+            "depth": self.depth(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "latency_ms": percentiles(self._latencies)
+        }
@@ -13,6 +13,12 @@ from slack_sdk.errors import SlackApiError
 
 logger = logging.getLogger(__name__)
 
+# Slack Web API base URL; overridden by local stand-ins
+SLACK_API_BASE_URL = os.getenv("SLACK_API_BASE_URL", "https://slack.com/api")
+
+# Bot identity from auth.test, resolved once per process (see get_bot_identity)
+_bot_identity: Optional[dict] = None
+
 
 class SlackClient:
     """
@@ -31,7 +37,8 @@ class SlackClient:
         if not self.signing_secret:
             raise ValueError("SLACK_SIGNING_SECRET not set in environment")
         
-        self.client = WebClient(token=self.bot_token)
+        self._signing_key = self.signing_secret.encode()
+        self.client = WebClient(token=self.bot_token, base_url=SLACK_API_BASE_URL.rstrip("/") + "/")
     
     def verify_slack_signature(
         self,
@@ -52,20 +59,23 @@ class SlackClient:
         """
         # Check timestamp to prevent replay attacks
         # Request should be no older than 5 minutes
-        if abs(time.time() - float(timestamp)) > 60 * 5:
+        try:
+            request_time = float(timestamp)
+        except ValueError:
+            logger.warning("Slack request timestamp missing or invalid")
+            return False
+        if abs(time.time() - request_time) > 60 * 5:
             logger.warning("Slack request timestamp too old")
             return False
         
-        # Compute the signature
-        sig_basestring = f"v0:{timestamp}:{body.decode('utf-8')}"
-        computed_signature = 'v0=' + hmac.new(
-            self.signing_secret.encode(),
-            sig_basestring.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        # Compute the signature over v0:<timestamp>:<body> straight from the
+        # raw bytes (no decode/re-encode copy of the body)
+        mac = hmac.new(self._signing_key, b"v0:" + timestamp.encode() + b":", hashlib.sha256)
+        mac.update(body)
+        computed_signature = "v0=" + mac.hexdigest()
         
         # Compare signatures using constant-time comparison
-        return hmac.compare_digest(computed_signature, signature)
+        return hmac.compare_digest(computed_signature.encode(), signature.encode())
     
     def send_message(
         self,
@@ -140,13 +150,38 @@ class SlackClient:
             logger.error(f"❌ Error obteniendo info de canal Slack")
             raise
     
+    def get_bot_identity(self, refresh: bool = False) -> dict:
+        """
+        Get the bot's own identity (user_id, bot_id, team), cached per process.
+        
+        Args:
+            refresh: Call auth.test again even if cached
+            
+        Returns:
+            auth.test response data
+            
+        Raises:
+            SlackApiError: If request fails
+        """
+        global _bot_identity
+        
+        if _bot_identity is None or refresh:
+            response = self.client.auth_test()
+            _bot_identity = {
+                "user_id": response.get("user_id"),
+                "bot_id": response.get("bot_id"),
+                "team": response.get("team"),
+                "team_id": response.get("team_id")
+            }
+        return _bot_identity
+    
     def remove_bot_mention(self, text: str, bot_user_id: Optional[str] = None) -> str:
         """
         Remove bot mention from message text.
         
         Args:
             text: Original message text
-            bot_user_id: Bot's user ID (optional, will fetch if not provided)
+            bot_user_id: Bot's user ID (optional, uses the cached identity if not provided)
             
         Returns:
             Text with bot mention removed
@@ -154,8 +189,7 @@ class SlackClient:
         if not bot_user_id:
             # Get bot's own user ID
             try:
-                auth_response = self.client.auth_test()
-                bot_user_id = auth_response["user_id"]
+                bot_user_id = self.get_bot_identity()["user_id"]
             except SlackApiError:
                 # If we can't get the bot ID, just return the original text
                 return text.strip()
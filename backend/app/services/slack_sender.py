@@ -0,0 +1,339 @@
+"""
+Slack Send Queue for BotDO.
+Outbound Slack messages go through an in-process queue instead of a
+blocking chat.postMessage per reply:
+- long texts are split at paragraph or code-block boundaries into ordered
+  chunks below SLACK_MESSAGE_MAX_CHARS
+- one FIFO per thread (channel + thread_ts), so replies and their chunks
+  are delivered in order
+- a token bucket per channel (Slack allows about 1 message per second per
+  channel) and workspace-wide buckets per Web API method tier
+- retries also cover retryable Slack errors ("ok": false)
+Queueing, retries and the pooled HTTP client come from KeyedSendQueue.
+"""
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.rate_limit import TokenBucket
+from app.services.send_queue import KeyedSendQueue
+from app.services.slack_client import SLACK_API_BASE_URL
+
+# Messages per second allowed to a single channel, and its burst size
+SLACK_CHANNEL_RATE_PER_SECOND = float(os.getenv("SLACK_CHANNEL_RATE_PER_SECOND", "1"))
+SLACK_CHANNEL_BURST = float(os.getenv("SLACK_CHANNEL_BURST", "2"))
+# chat.postMessage calls per minute for the whole workspace (Slack's "special" tier)
+SLACK_POST_RATE_PER_MINUTE = float(os.getenv("SLACK_POST_RATE_PER_MINUTE", "300"))
+# Characters per message; longer texts are sent as several ordered chunks
+SLACK_MESSAGE_MAX_CHARS = int(os.getenv("SLACK_MESSAGE_MAX_CHARS", "3900"))
+# Retries after the first attempt on 429/5xx/network errors
+SLACK_SEND_MAX_RETRIES = int(os.getenv("SLACK_SEND_MAX_RETRIES", "5"))
+# Messages accepted but not yet sent before enqueue is refused
+SLACK_SEND_QUEUE_MAX = int(os.getenv("SLACK_SEND_QUEUE_MAX", "10000"))
+# Connections kept open to the Slack API
+SLACK_MAX_CONNECTIONS = int(os.getenv("SLACK_MAX_CONNECTIONS", "20"))
+
+# Workspace-wide requests per minute of each Web API tier
+TIER_RATES_PER_MINUTE = {1: 1, 2: 20, 3: 50, 4: 100}
+# Tier of the methods BotDO calls through the limiter; "special" methods have
+# their own limit. auth.test is not listed: the bot identity is cached and only
+# refreshed by the warm-up and the health monitor
+METHOD_TIERS = {
+    "chat.postMessage": "special",
+    "conversations.info": 3,
+    "users.info": 4,
+}
+# Slack "ok": false errors worth another attempt
+RETRYABLE_ERRORS = {"ratelimited", "internal_error", "fatal_error", "service_unavailable", "request_timeout"}
+
+FENCE = "```"
+
+
+class SlackSendError(Exception):
+    """Slack answered with "ok": false."""
+
+    def __init__(self, error: str):
+        super().__init__(error)
+        self.error = error
+
+
+def _pack(parts: List[str], separator: str, limit: int) -> List[str]:
+    """Join consecutive parts with `separator` into pieces of at most `limit` characters."""
+    pieces: List[str] = []
+    current: Optional[str] = None
+    for part in parts:
+        if current is not None and len(current) + len(separator) + len(part) <= limit:
+            current += separator + part
+        else:
+            if current is not None:
+                pieces.append(current)
+            current = part
+    if current is not None:
+        pieces.append(current)
+    return pieces
+
+
+def _split_text(text: str, limit: int, separators: Tuple[str, ...] = ("\n", " ")) -> List[str]:
+    """Split a paragraph at line breaks, then spaces, then anywhere."""
+    if len(text) <= limit:
+        return [text]
+    if not separators:
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+    separator, rest = separators[0], separators[1:]
+    parts: List[str] = []
+    for part in text.split(separator):
+        parts.extend(_split_text(part, limit, rest))
+    return _pack(parts, separator, limit)
+
+
+def _split_code(block: str, limit: int) -> List[str]:
+    """Split a fenced code block at line breaks, closing and reopening the fence."""
+    lines = block.split("\n")
+    opening = lines[0]
+    body = lines[1:-1] if len(lines) > 1 and lines[-1].strip().startswith(FENCE) else lines[1:]
+    # Room left for the code once the fence lines are added around it
+    room = max(limit - len(opening) - len(FENCE) - 2, 1)
+    return [f"{opening}\n{code}\n{FENCE}" for code in _split_text("\n".join(body), room, ("\n",))]
+
+
+def _blocks(text: str) -> List[Tuple[str, str]]:
+    """Paragraphs ("text") and fenced code blocks ("code") of a message, in order."""
+    blocks: List[Tuple[str, str]] = []
+    current: List[str] = []
+    in_code = False
+    for line in text.split("\n"):
+        fence = line.strip().startswith(FENCE)
+        if in_code:
+            current.append(line)
+            if fence:
+                blocks.append(("code", "\n".join(current)))
+                current, in_code = [], False
+        elif fence:
+            if current:
+                blocks.append(("text", "\n".join(current)))
+            if line.strip().count(FENCE) >= 2 and len(line.strip()) > len(FENCE):
+                # Fence opened and closed on the same line
+                blocks.append(("code", line))
+                current = []
+            else:
+                current, in_code = [line], True
+        elif not line.strip():
+            if current:
+                blocks.append(("text", "\n".join(current)))
+            current = []
+        else:
+            current.append(line)
+    if current:
+        blocks.append(("code" if in_code else "text", "\n".join(current)))
+    return blocks
+
+
+def split_message(text: str, limit: int = SLACK_MESSAGE_MAX_CHARS) -> List[str]:
+    """
+    Split a message into ordered chunks of at most `limit` characters.
+
+    Paragraphs are kept whole and packed together; code blocks are never
+    split unless they alone exceed the limit, in which case they are split
+    at line breaks and every chunk gets its own fences.
+
+    Args:
+        text: Message text (Slack mrkdwn)
+        limit: Maximum characters per chunk
+
+    Returns:
+        Chunks in sending order (empty for a blank text)
+    """
+    text = text.strip()
+    if len(text) <= limit:
+        return [text] if text else []
+
+    pieces: List[str] = []
+    for kind, block in _blocks(text):
+        if len(block) <= limit:
+            pieces.append(block)
+        elif kind == "code":
+            pieces.extend(_split_code(block, limit))
+        else:
+            pieces.extend(_split_text(block, limit))
+    return _pack(pieces, "\n\n", limit)
+
+
+class SlackRateLimiter:
+    """
+    Workspace-wide token buckets, one per Web API tier.
+    """
+
+    def __init__(self, post_rate_per_minute: float = SLACK_POST_RATE_PER_MINUTE):
+        """
+        Initialize the limiter.
+
+        Args:
+            post_rate_per_minute: chat.postMessage calls per minute for the workspace
+        """
+        # A minute's worth of burst, as Slack evaluates tiers per minute
+        self._buckets: Dict[Any, TokenBucket] = {
+            tier: TokenBucket(rate / 60, rate) for tier, rate in TIER_RATES_PER_MINUTE.items()
+        }
+        self._buckets["special"] = TokenBucket(post_rate_per_minute / 60, max(post_rate_per_minute / 60, 1))
+
+    async def acquire(self, method: str) -> float:
+        """
+        Wait for a token of the method's tier.
+
+        Args:
+            method: Web API method, e.g. "chat.postMessage"
+
+        Returns:
+            Seconds spent waiting
+        """
+        return await self._buckets[METHOD_TIERS.get(method, 3)].acquire()
+
+
+class SlackSendQueue(KeyedSendQueue):
+    """
+    Per-thread FIFO send queue with per-channel and workspace rate limits.
+    """
+
+    platform = "Slack"
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        api_base_url: str = SLACK_API_BASE_URL,
+        channel_rate: float = SLACK_CHANNEL_RATE_PER_SECOND,
+        channel_burst: float = SLACK_CHANNEL_BURST,
+        limiter: Optional[SlackRateLimiter] = None,
+        max_chars: int = SLACK_MESSAGE_MAX_CHARS
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            token: Bot token; read from SLACK_BOT_TOKEN on start() if not given
+            api_base_url: Slack Web API base URL
+            channel_rate: Messages per second per channel
+            channel_burst: Burst size per channel
+            limiter: Workspace tier limiter (defaults to the process-wide one)
+            max_chars: Characters per chunk
+        """
+        super().__init__(SLACK_SEND_QUEUE_MAX, SLACK_SEND_MAX_RETRIES, SLACK_MAX_CONNECTIONS)
+        self.token = token
+        self.api_base_url = api_base_url.rstrip("/")
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.limiter = limiter or slack_rate_limiter
+        self.max_chars = max_chars
+        self._channel_buckets: Dict[str, TokenBucket] = {}
+        self.chunks = 0
+        self.rate_limited = 0
+
+    def start(self):
+        """Create the pooled HTTP client (idempotent)."""
+        if self._http is not None:
+            return
+        if self.token is None:
+            self.token = os.getenv("SLACK_BOT_TOKEN")
+        super().start()
+
+    def enqueue(self, channel: str, text: str, thread_ts: Optional[str] = None) -> asyncio.Future:
+        """
+        Queue a message, split into chunks if it is too long.
+
+        Args:
+            channel: Slack channel ID
+            text: Message text
+            thread_ts: Thread timestamp for replies (optional)
+
+        Returns:
+            Future resolved with the chat.postMessage response of every chunk
+            (or the first final error; later chunks are then dropped)
+
+        Raises:
+            SendQueueFull: If the queue is at SLACK_SEND_QUEUE_MAX
+        """
+        chunks = split_message(text, self.max_chars) or [text]
+        return self._enqueue((channel, thread_ts or ""), chunks)
+
+    async def send(self, channel: str, text: str, thread_ts: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Queue a message and wait until every chunk is delivered.
+
+        Args:
+            channel: Slack channel ID
+            text: Message text
+            thread_ts: Thread timestamp for replies (optional)
+
+        Returns:
+            chat.postMessage responses, one per chunk
+
+        Raises:
+            httpx.HTTPError: If every attempt failed
+            SlackSendError: If Slack refused the message
+        """
+        return await self.enqueue(channel, text, thread_ts)
+
+    async def _deliver_item(self, key: Tuple[str, str], chunks: List[str]) -> List[Dict[str, Any]]:
+        """Post a message's chunks in order."""
+        channel, thread_ts = key
+        bucket = self._channel_buckets.get(channel)
+        if bucket is None:
+            bucket = self._channel_buckets[channel] = TokenBucket(self.channel_rate, self.channel_burst)
+
+        results = []
+        for chunk in chunks:
+            async def attempt_once(chunk=chunk):
+                # Every attempt, retries included, counts against both limits
+                await bucket.acquire()
+                await self.limiter.acquire("chat.postMessage")
+                return await self._post(channel, chunk, thread_ts or None)
+
+            results.append(await self._with_retries(channel, attempt_once))
+            self.chunks += 1
+        return results
+
+    def _release(self, key: Tuple[str, str]):
+        channel = key[0]
+        bucket = self._channel_buckets.get(channel)
+        # Other threads of the channel may still be using the bucket
+        if bucket is not None and bucket.is_full() and not any(other == channel for other, _ in self._workers):
+            del self._channel_buckets[channel]
+
+    def _target(self, key: Tuple[str, str]) -> str:
+        return key[0]
+
+    def _retryable(self, error: Exception) -> Tuple[bool, str]:
+        if isinstance(error, SlackSendError):
+            return error.error in RETRYABLE_ERRORS, error.error
+        return super()._retryable(error)
+
+    async def _post(self, channel: str, text: str, thread_ts: Optional[str]) -> Dict[str, Any]:
+        """Call chat.postMessage once."""
+        payload = {"channel": channel, "text": text}
+        if thread_ts:
+            payload["thread_ts"] = thread_ts
+        response = await self._http.post(
+            f"{self.api_base_url}/chat.postMessage",
+            json=payload,
+            headers={"Authorization": f"Bearer {self.token}"}
+        )
+        if response.status_code == 429:
+            self.rate_limited += 1
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("ok"):
+            raise SlackSendError(data.get("error") or "unknown_error")
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, counters and send latency (enqueue to last chunk delivered)."""
+        return {
+            **super().stats(),
+            "active_threads": len(self._workers),
+            "chunks": self.chunks,
+            "rate_limited": self.rate_limited
+        }
+
+
+# Process-wide limiter and queue used by the Slack connector
+slack_rate_limiter = SlackRateLimiter()
+slack_send_queue = SlackSendQueue()
@@ -0,0 +1,196 @@
+"""
+Slack Socket Mode receiver for BotDO.
+Receives Slack events over persistent websockets opened with the app-level
+token (SLACK_APP_TOKEN) instead of one signed HTTPS POST per event. Each
+envelope is handed to the same dedup + turn scheduling path as the HTTP
+Events endpoint and acknowledged right away; an event whose turn the
+scheduler rejects is left unacknowledged so Slack redelivers it.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import httpx
+import orjson
+import websockets
+from pydantic import ValidationError
+
+from app.schemas import SlackEventRequest
+from app.services.slack_client import SLACK_API_BASE_URL
+from app.services.event_recorder import event_recorder
+from app.services.percentiles import percentiles
+from app.services.turn_scheduler import TurnQueueFull
+
+logger = logging.getLogger(__name__)
+
+# Use Socket Mode for Slack events (requires SLACK_APP_TOKEN, xapp-...)
+SLACK_SOCKET_MODE = os.getenv("SLACK_SOCKET_MODE", "false").lower() == "true"
+# Websockets kept open at once; Slack spreads envelopes across them (max 10)
+SLACK_SOCKET_CONNECTIONS = int(os.getenv("SLACK_SOCKET_CONNECTIONS", "2"))
+
+RECONNECT_BASE_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 30.0
+ACK_SAMPLES = 1000
+
+
+class SlackSocketModeReceiver:
+    """
+    Keeps SLACK_SOCKET_CONNECTIONS websockets open and dispatches their envelopes.
+    """
+
+    def __init__(
+        self,
+        app_token: str,
+        dispatch: Callable[[SlackEventRequest], Any],
+        connections: int = SLACK_SOCKET_CONNECTIONS,
+        api_base_url: str = SLACK_API_BASE_URL
+    ):
+        """
+        Initialize the receiver.
+
+        Args:
+            app_token: App-level token with the connections:write scope
+            dispatch: Called with each events_api payload (dedup + scheduling)
+            connections: Websockets to keep open
+            api_base_url: Slack Web API base URL
+        """
+        self.app_token = app_token
+        self.dispatch = dispatch
+        self.connections = max(1, min(connections, 10))
+        self.api_base_url = api_base_url.rstrip("/")
+        self._tasks: List[asyncio.Task] = []
+        self._http: Optional[httpx.AsyncClient] = None
+        self._ack_ms: Deque[float] = deque(maxlen=ACK_SAMPLES)
+        self.open_connections = 0
+        self.envelopes = 0
+        self.events = 0
+        self.invalid = 0
+        self.rejected = 0
+        self.reconnects = 0
+
+    def start(self):
+        """Open the websockets (must run inside the event loop; idempotent)."""
+        if self._tasks:
+            return
+        self._http = httpx.AsyncClient(timeout=10.0)
+        self._tasks = [
+            asyncio.create_task(self._run_connection(index)) for index in range(self.connections)
+        ]
+        logger.info(f"🔌 Slack Socket Mode iniciado con {self.connections} conexión(es)")
+
+    async def stop(self):
+        """Close the websockets and the HTTP client."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _open_url(self) -> str:
+        """Get a fresh websocket URL from apps.connections.open."""
+        response = await self._http.post(
+            f"{self.api_base_url}/apps.connections.open",
+            headers={"Authorization": f"Bearer {self.app_token}"}
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("ok"):
+            raise RuntimeError(f"apps.connections.open failed: {data.get('error')}")
+        return data["url"]
+
+    async def _run_connection(self, index: int):
+        """Keep one websocket open, reconnecting with backoff."""
+        attempt = 0
+        while True:
+            try:
+                url = await self._open_url()
+                async with websockets.connect(url, ping_interval=30, max_size=None) as ws:
+                    self.open_connections += 1
+                    attempt = 0
+                    try:
+                        async for raw in ws:
+                            if await self._handle(ws, raw):
+                                break
+                    finally:
+                        self.open_connections -= 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                attempt += 1
+                delay = random.uniform(0, min(RECONNECT_MAX_SECONDS, RECONNECT_BASE_SECONDS * 2 ** attempt))
+                logger.warning(
+                    f"⚠️  Conexión Socket Mode {index} caída, reintentando en {delay:.1f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+            self.reconnects += 1
+
+    async def _ack(self, ws, envelope_id: Optional[str], received: float):
+        """Acknowledge an envelope: Slack redelivers it if no ack arrives within 3 s."""
+        if envelope_id:
+            await ws.send(orjson.dumps({"envelope_id": envelope_id}).decode())
+            self._ack_ms.append((time.perf_counter() - received) * 1000)
+
+    async def _handle(self, ws, raw) -> bool:
+        """
+        Dispatch and acknowledge one envelope.
+
+        Returns:
+            True if Slack asked to close this connection
+        """
+        received = time.perf_counter()
+        envelope = orjson.loads(raw)
+        self.envelopes += 1
+        envelope_id = envelope.get("envelope_id")
+
+        envelope_type = envelope.get("type")
+        if envelope_type == "events_api":
+            if event_recorder.enabled:
+                event_recorder.record("socket_mode", orjson.dumps(envelope.get("payload") or {}))
+            try:
+                payload = SlackEventRequest.model_validate(envelope.get("payload") or {})
+            except ValidationError as e:
+                self.invalid += 1
+                logger.warning(f"⚠️  Payload de Slack inválido (Socket Mode): {str(e)}")
+                await self._ack(ws, envelope_id, received)
+                return False
+            self.events += 1
+            # dispatch only dedups and queues the turn, so acking after it
+            # stays far below Slack's 3 s
+            try:
+                self.dispatch(payload)
+            except TurnQueueFull:
+                self.rejected += 1
+                logger.warning(f"⚠️  Envelope {envelope_id} sin ack: cola de turnos llena, Slack lo reenviará")
+                return False
+            await self._ack(ws, envelope_id, received)
+            return False
+
+        await self._ack(ws, envelope_id, received)
+        if envelope_type == "disconnect":
+            # Slack rotates connections periodically; open a new one
+            logger.info(f"🔌 Slack pidió reconectar Socket Mode ({envelope.get('reason')})")
+            return True
+        if envelope_type == "hello":
+            logger.info(
+                f"🔌 Socket Mode conectado ({envelope.get('num_connections')} conexión(es) activas en Slack)"
+            )
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Open websockets, counters and ack latency (read to ack sent)."""
+        return {
+            "connections": self.connections,
+            "open_connections": self.open_connections,
+            "envelopes": self.envelopes,
+            "events": self.events,
+            "invalid": self.invalid,
+            "rejected": self.rejected,
+            "reconnects": self.reconnects,
+            "ack_ms": percentiles(self._ack_ms, (0.50, 0.99), digits=3)
+        }
@@ -0,0 +1,317 @@
+"""
+Turn Scheduler for BotDO.
+Bot turns (an incoming message -> agent reply) run through an in-process
+priority scheduler instead of untracked asyncio tasks, so a burst of channel
+chatter cannot delay direct messages:
+- one lane per kind of turn (dm, mention, admin, channel), classified from
+  the platform and Slack's channel_type
+- weighted fair queuing across lanes (self-clocked virtual finish tags)
+- starvation protection: a turn queued longer than TURN_AGING_SECONDS is
+  dispatched ahead of the weights
+- a global concurrency limit plus a per-lane one
+- per-lane queue-time percentiles and counters
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from app.services.percentiles import percentiles
+
+logger = logging.getLogger(__name__)
+
+LANE_DEFAULTS = {
+    # name: (weight, max concurrent turns). Lane limits below the global one
+    # keep slots free for the other lanes during a spike in one of them
+    "dm": (8, 12),
+    "mention": (4, 8),
+    "admin": (2, 4),
+    "channel": (1, 8),
+}
+# Turns running at the same time across all lanes (each holds a bot pool connection)
+TURN_MAX_CONCURRENCY = int(os.getenv("TURN_MAX_CONCURRENCY", "16"))
+# A turn queued longer than this is dispatched next regardless of weights
+TURN_AGING_SECONDS = float(os.getenv("TURN_AGING_SECONDS", "10"))
+# Queued turns per lane before submissions are refused
+TURN_QUEUE_MAX = int(os.getenv("TURN_QUEUE_MAX", "1000"))
+
+QUEUE_TIME_SAMPLES = 1000
+
+
+class TurnQueueFull(Exception):
+    """Raised when a lane already holds TURN_QUEUE_MAX queued turns."""
+
+
+def _lane_setting(name: str, setting: str, default):
+    return type(default)(os.getenv(f"TURN_LANE_{name.upper()}_{setting}", str(default)))
+
+
+def classify_slack_event(event: Dict[str, Any]) -> str:
+    """
+    Lane of a Slack event.
+
+    Args:
+        event: Slack event (app_mention or message)
+
+    Returns:
+        "dm" for direct and group-direct messages, "mention" for @bot
+        mentions, "channel" for thread follow-ups in channels
+    """
+    if event.get("channel_type") in ("im", "mpim"):
+        return "dm"
+    if event.get("type") == "app_mention":
+        return "mention"
+    return "channel"
+
+
+def classify_whatsapp_chat(chat_id: str) -> str:
+    """
+    Lane of a WhatsApp chat.
+
+    Args:
+        chat_id: Whapi chat ID
+
+    Returns:
+        "channel" for groups (@g.us), "dm" otherwise
+    """
+    return "channel" if chat_id.endswith("@g.us") else "dm"
+
+
+class _Turn:
+    __slots__ = ("factory", "future", "enqueued_at", "tag")
+
+    def __init__(self, factory: Callable[[], Awaitable[Any]], future: asyncio.Future, tag: float):
+        self.factory = factory
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.tag = tag
+
+
+class Lane:
+    """
+    Queue, limits and metrics of one kind of turn.
+    """
+
+    def __init__(self, name: str, weight: float, concurrency: int):
+        """
+        Initialize lane.
+
+        Args:
+            name: Lane name
+            weight: Share of dispatches relative to the other lanes
+            concurrency: Maximum turns of this lane running at once
+        """
+        self.name = name
+        self.weight = weight
+        self.concurrency = concurrency
+        self.queue: Deque[_Turn] = deque()
+        self.running = 0
+        self.last_tag = 0.0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.aged = 0
+        self._queue_times: Deque[float] = deque(maxlen=QUEUE_TIME_SAMPLES)
+        self.queue_time_max_ms = 0.0
+
+    def record_queue_time(self, ms: float):
+        self._queue_times.append(ms)
+        self.queue_time_max_ms = max(self.queue_time_max_ms, ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Depth, counters and queue time (submit to start) of the lane."""
+        return {
+            "weight": self.weight,
+            "concurrency": self.concurrency,
+            "queued": len(self.queue),
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "aged": self.aged,
+            "queue_time_ms": {
+                **percentiles(self._queue_times),
+                "max": round(self.queue_time_max_ms, 1)
+            }
+        }
+
+
+class TurnScheduler:
+    """
+    Weighted fair scheduler for bot turns with per-lane concurrency limits.
+    """
+
+    def __init__(
+        self,
+        lanes: Optional[Dict[str, tuple]] = None,
+        max_concurrency: int = TURN_MAX_CONCURRENCY,
+        aging_seconds: float = TURN_AGING_SECONDS,
+        queue_max: int = TURN_QUEUE_MAX
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            lanes: name -> (weight, concurrency); defaults to LANE_DEFAULTS
+                overridden by TURN_LANE_<NAME>_WEIGHT / _CONCURRENCY
+            max_concurrency: Turns running at once across all lanes
+            aging_seconds: Queue time after which a turn skips the weights
+            queue_max: Queued turns per lane before submit() refuses
+        """
+        if lanes is None:
+            lanes = {
+                name: (_lane_setting(name, "WEIGHT", float(weight)), _lane_setting(name, "CONCURRENCY", concurrency))
+                for name, (weight, concurrency) in LANE_DEFAULTS.items()
+            }
+        self.lanes: Dict[str, Lane] = {
+            name: Lane(name, weight, concurrency) for name, (weight, concurrency) in lanes.items()
+        }
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+        self.queue_max = queue_max
+        self.running = 0
+        # Virtual time: finish tag of the last dispatched turn
+        self._virtual_time = 0.0
+        self._tasks: set = set()
+
+    def submit(self, lane: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """
+        Queue a turn.
+
+        Args:
+            lane: Lane name
+            factory: Called without arguments when the turn is dispatched;
+                returns the coroutine to run
+
+        Returns:
+            Future resolved with the turn's result (or its exception)
+
+        Raises:
+            TurnQueueFull: If the lane already holds queue_max turns
+            ValueError: If the lane does not exist
+        """
+        target = self.lanes.get(lane)
+        if target is None:
+            raise ValueError(f"Unknown turn lane: {lane}")
+        if len(target.queue) >= self.queue_max:
+            target.rejected += 1
+            raise TurnQueueFull(f"Turn lane '{lane}' is full ({self.queue_max})")
+
+        future = asyncio.get_running_loop().create_future()
+        # Connectors schedule turns without awaiting them and _run_turn already
+        # counts and logs a failed turn, so mark its exception retrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        # An idle lane restarts from the current virtual time, so it cannot
+        # bank credit while it has nothing queued
+        tag = max(self._virtual_time, target.last_tag) + 1 / target.weight
+        target.last_tag = tag
+        target.queue.append(_Turn(factory, future, tag))
+        target.submitted += 1
+        self._dispatch()
+        return future
+
+    async def run(self, lane: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Queue a turn and wait for its result.
+
+        Args:
+            lane: Lane name
+            factory: See submit()
+
+        Returns:
+            The turn's result
+        """
+        return await self.submit(lane, factory)
+
+    def _next_lane(self) -> Optional[Lane]:
+        """Lane whose head turn runs next, or None if nothing can start."""
+        eligible = [lane for lane in self.lanes.values() if lane.queue and lane.running < lane.concurrency]
+        if not eligible:
+            return None
+
+        # Starvation protection: the longest-waiting over-age turn goes first
+        now = time.monotonic()
+        oldest = min(eligible, key=lambda lane: lane.queue[0].enqueued_at)
+        if now - oldest.queue[0].enqueued_at >= self.aging_seconds:
+            oldest.aged += 1
+            return oldest
+
+        return min(eligible, key=lambda lane: lane.queue[0].tag)
+
+    def _dispatch(self):
+        """Start queued turns while global and lane slots are free."""
+        while self.running < self.max_concurrency:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            turn = lane.queue.popleft()
+            if turn.future.cancelled():
+                continue
+            self._virtual_time = max(self._virtual_time, turn.tag)
+            lane.running += 1
+            self.running += 1
+            lane.record_queue_time((time.monotonic() - turn.enqueued_at) * 1000)
+            task = asyncio.create_task(self._run_turn(lane, turn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_turn(self, lane: Lane, turn: _Turn):
+        try:
+            result = await turn.factory()
+            lane.completed += 1
+            if not turn.future.done():
+                turn.future.set_result(result)
+        except asyncio.CancelledError:
+            turn.future.cancel()
+            raise
+        except Exception as e:
+            lane.failed += 1
+            logger.error(f"❌ Error en turno del carril {lane.name}: {str(e)}")
+            if not turn.future.done():
+                turn.future.set_exception(e)
+        finally:
+            lane.running -= 1
+            self.running -= 1
+            self._dispatch()
+
+    def depth(self) -> int:
+        """Turns queued in every lane (not counting running ones)."""
+        return sum(len(lane.queue) for lane in self.lanes.values())
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Drop queued turns, let running ones finish for up to `timeout`
+        seconds, then cancel the rest.
+        """
+        dropped = self.depth()
+        for lane in self.lanes.values():
+            while lane.queue:
+                lane.queue.popleft().future.cancel()
+        if dropped:
+            logger.warning(f"⚠️  Planificador de turnos cerrado con {dropped} turnos en cola")
+
+        tasks = list(self._tasks)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Global and per-lane scheduler metrics."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self.running,
+            "queued": self.depth(),
+            "aging_seconds": self.aging_seconds,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()}
+        }
+
+
+# Process-wide scheduler used by the bot endpoint and the connectors
+turn_scheduler = TurnScheduler()
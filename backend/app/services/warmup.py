@@ -0,0 +1,152 @@
+"""
+Startup warm-up and readiness for BotDO.
+Runs once per worker after startup so the first real requests don't pay for
+cold connections:
+- database: opens pool_size connections so the pool is full
+- agent: opens the keep-alive (TLS) connection of the shared agent client
+- slack: resolves and caches the bot identity (auth.test)
+
+/ready reports not-ready until the warm-up finishes; the database step is
+required and retried until it succeeds, the others are best effort.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Timeout of each warm-up step
+WARMUP_STEP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_STEP_TIMEOUT_SECONDS", "15"))
+# Delay between attempts of a required step that failed
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+
+class Readiness:
+    """
+    Warm-up progress of this worker, as reported by /ready.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Readiness state for the /ready response."""
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "steps": self.steps
+        }
+
+
+# Process-wide readiness used by /ready
+readiness = Readiness()
+
+
+def _prefill_pool() -> int:
+    """
+    Open pool_size connections at once and return them to the pool.
+    They have to be held together, otherwise each checkout reuses the last one.
+
+    Returns:
+        Number of connections opened
+    """
+    from sqlalchemy import text
+    from app.database import engine
+
+    connections = []
+    try:
+        for _ in range(engine.pool.size()):
+            conn = engine.connect()
+            connections.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+async def _warm_agent() -> str:
+    """Open the connection to every agent endpoint through the shared client."""
+    from app.services.digitalocean_client import DigitalOceanClient
+
+    statuses = await DigitalOceanClient().warm_up()
+    return ", ".join(f"{name} HTTP {status_code}" for name, status_code in statuses.items())
+
+
+def _warm_slack() -> str:
+    """Resolve and cache the Slack bot identity."""
+    from app.services.slack_client import SlackClient
+
+    identity = SlackClient().get_bot_identity(refresh=True)
+    return f"bot {identity['user_id']} ({identity['team']})"
+
+
+async def _run_step(name: str, step, required: bool):
+    """
+    Run one warm-up step with a timeout, recording its outcome.
+    Required steps are retried until they succeed.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(step):
+                result = await asyncio.wait_for(step(), WARMUP_STEP_TIMEOUT_SECONDS)
+            else:
+                result = await asyncio.wait_for(asyncio.to_thread(step), WARMUP_STEP_TIMEOUT_SECONDS)
+            readiness.steps[name] = {
+                "ok": True,
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+                "result": result,
+                "attempts": attempt
+            }
+            logger.info(f"🔥 Warm-up {name}: {result} ({readiness.steps[name]['ms']} ms)")
+            return
+        except Exception as e:
+            readiness.steps[name] = {
+                "ok": False,
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+                "error": str(e) or type(e).__name__,
+                "attempts": attempt
+            }
+            if not required:
+                logger.warning(f"⚠️  Warm-up {name} falló (se continúa): {readiness.steps[name]['error']}")
+                return
+            logger.warning(
+                f"⚠️  Warm-up {name} falló, reintentando en {WARMUP_RETRY_SECONDS:.0f}s: "
+                f"{readiness.steps[name]['error']}"
+            )
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+
+async def run_warmup(enabled_connectors: List[str]):
+    """
+    Warm up every dependency concurrently and mark the worker ready.
+
+    Args:
+        enabled_connectors: Connectors loaded by this worker
+    """
+    from app.services.agent_endpoints import agent_pool_configured
+
+    readiness.started_at = datetime.now()
+    started = time.perf_counter()
+
+    steps = [_run_step("database", _prefill_pool, required=True)]
+    if agent_pool_configured():
+        steps.append(_run_step("agent", _warm_agent, required=False))
+    if "slack" in enabled_connectors:
+        steps.append(_run_step("slack", _warm_slack, required=False))
+
+    await asyncio.gather(*steps)
+
+    readiness.completed_at = datetime.now()
+    readiness.ready = True
+    logger.info(f"✅ Warm-up completado en {(time.perf_counter() - started) * 1000:.0f} ms: worker listo")
@@ -0,0 +1,119 @@
+"""
+Whapi Client for BotDO.
+Handles Whapi (WhatsApp) API interactions and webhook verification.
+"""
+import os
+import hmac
+import logging
+from typing import Optional, Dict, Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class WhapiClient:
+    """
+    Client for interacting with Whapi API.
+    """
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize Whapi client with credentials from environment.
+
+        Args:
+            http_client: Shared (pooled) HTTP client; a short-lived one is
+                created per call when omitted
+        """
+        self.api_key = os.getenv("WHAPI_API_KEY")
+        self.base_url = os.getenv("WHAPI_BASE_URL", "https://gate.whapi.cloud").rstrip("/")
+        # Shared secret configured on the Whapi webhook, either as the
+        # X-Webhook-Secret custom header or as ?token= in the webhook URL
+        self.webhook_secret = os.getenv("WHAPI_WEBHOOK_SECRET", "")
+        self.http_client = http_client
+
+        if not self.api_key:
+            raise ValueError("WHAPI_API_KEY not set in environment")
+
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def verify_webhook(self, header_secret: Optional[str], query_token: Optional[str]) -> bool:
+        """
+        Verify that a webhook call came from Whapi using the shared secret.
+
+        Args:
+            header_secret: X-Webhook-Secret header value
+            query_token: token query parameter value
+
+        Returns:
+            True if the secret matches, False otherwise
+        """
+        if not self.webhook_secret:
+            logger.error("WHAPI_WEBHOOK_SECRET not set; rejecting Whapi webhook")
+            return False
+
+        provided = header_secret or query_token or ""
+        # Compare using constant-time comparison
+        return hmac.compare_digest(provided.encode(), self.webhook_secret.encode())
+
+    async def send_text(self, to: str, body: str) -> Dict[str, Any]:
+        """
+        Send a text message to a WhatsApp chat.
+
+        Args:
+            to: Chat ID (phone@s.whatsapp.net or group@g.us)
+            body: Message text
+
+        Returns:
+            Whapi API response
+
+        Raises:
+            httpx.HTTPError: If API request fails
+        """
+        url = f"{self.base_url}/messages/text"
+        payload = {"to": to, "body": body}
+
+        if self.http_client is not None:
+            response = await self.http_client.post(url, headers=self.headers, json=payload)
+        else:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(url, headers=self.headers, json=payload)
+
+        response.raise_for_status()
+        return response.json()
+
+    def media_download_url(self, media: Dict[str, Any]) -> Optional[str]:
+        """
+        Download URL of a media payload from a webhook message.
+        Whapi includes a direct link when auto-download is enabled;
+        otherwise the file is fetched by ID from the media endpoint.
+
+        Args:
+            media: Media object of the message (image, document, ...)
+
+        Returns:
+            URL or None if the payload has neither link nor ID
+        """
+        if media.get("link"):
+            return media["link"]
+        if media.get("id"):
+            return f"{self.base_url}/media/{media['id']}"
+        return None
+
+    async def health_check(self) -> bool:
+        """
+        Check if the Whapi channel is reachable and authorized.
+
+        Returns:
+            True if healthy, False otherwise
+        """
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(f"{self.base_url}/health", headers=self.headers)
+                return response.status_code == 200
+        except Exception as e:
+            logger.error(f"Whapi health check failed: {str(e)}")
+            return False
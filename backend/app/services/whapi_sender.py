@@ -0,0 +1,106 @@
+"""
+Whapi Send Queue for BotDO.
+Outbound WhatsApp messages go through an in-process queue instead of a
+direct POST per reply:
+- one FIFO per chat, so replies to a chat are delivered in order
+- a token bucket per chat and one per Whapi channel (phone number)
+Queueing, retries and the pooled HTTP client come from KeyedSendQueue.
+"""
+import asyncio
+import os
+from typing import Dict, Any, Optional
+
+from app.services.rate_limit import TokenBucket
+from app.services.send_queue import KeyedSendQueue
+from app.services.whapi_client import WhapiClient
+
+# Sends per second allowed for the whole Whapi channel, and its burst size
+WHAPI_SEND_RATE_PER_SECOND = float(os.getenv("WHAPI_SEND_RATE_PER_SECOND", "5"))
+WHAPI_SEND_BURST = float(os.getenv("WHAPI_SEND_BURST", "10"))
+# Sends per minute allowed to a single chat, and its burst size
+WHAPI_CHAT_RATE_PER_MINUTE = float(os.getenv("WHAPI_CHAT_RATE_PER_MINUTE", "20"))
+WHAPI_CHAT_BURST = float(os.getenv("WHAPI_CHAT_BURST", "3"))
+# Retries after the first attempt on 429/5xx/network errors
+WHAPI_SEND_MAX_RETRIES = int(os.getenv("WHAPI_SEND_MAX_RETRIES", "5"))
+# Messages accepted but not yet sent before enqueue is refused
+WHAPI_SEND_QUEUE_MAX = int(os.getenv("WHAPI_SEND_QUEUE_MAX", "10000"))
+# Connections kept open to the Whapi API
+WHAPI_MAX_CONNECTIONS = int(os.getenv("WHAPI_MAX_CONNECTIONS", "20"))
+
+
+class WhapiSendQueue(KeyedSendQueue):
+    """
+    Per-chat FIFO send queue with token-bucket rate limits.
+    """
+
+    platform = "WhatsApp"
+
+    def __init__(self):
+        super().__init__(WHAPI_SEND_QUEUE_MAX, WHAPI_SEND_MAX_RETRIES, WHAPI_MAX_CONNECTIONS)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._channel_bucket: Optional[TokenBucket] = None
+        self._client: Optional[WhapiClient] = None
+
+    def start(self):
+        """Create the pooled HTTP client and channel bucket (idempotent)."""
+        if self._http is not None:
+            return
+        super().start()
+        self._client = WhapiClient(http_client=self._http)
+        self._channel_bucket = TokenBucket(WHAPI_SEND_RATE_PER_SECOND, WHAPI_SEND_BURST)
+
+    def enqueue(self, to: str, body: str) -> asyncio.Future:
+        """
+        Queue a text message.
+
+        Args:
+            to: Chat ID
+            body: Message text
+
+        Returns:
+            Future resolved with the Whapi response (or its final error)
+
+        Raises:
+            SendQueueFull: If the queue is at WHAPI_SEND_QUEUE_MAX
+        """
+        return self._enqueue(to, body)
+
+    async def send(self, to: str, body: str) -> Dict[str, Any]:
+        """
+        Queue a text message and wait until it is delivered.
+
+        Args:
+            to: Chat ID
+            body: Message text
+
+        Returns:
+            Whapi API response
+
+        Raises:
+            httpx.HTTPError: If every attempt failed
+        """
+        return await self.enqueue(to, body)
+
+    async def _deliver_item(self, chat_id: str, body: str) -> Dict[str, Any]:
+        """Wait for the chat and channel buckets, then POST with retries."""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                WHAPI_CHAT_RATE_PER_MINUTE / 60, WHAPI_CHAT_BURST
+            )
+        await bucket.acquire()
+        await self._channel_bucket.acquire()
+        return await self._with_retries(chat_id, lambda: self._client.send_text(chat_id, body))
+
+    def _release(self, chat_id: str):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is not None and bucket.is_full():
+            del self._chat_buckets[chat_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, active chats, counters and send latency (enqueue to delivery)."""
+        return {**super().stats(), "active_chats": len(self._workers)}
+
+
+# Process-wide queue used by the Whapi connector
+whapi_send_queue = WhapiSendQueue()
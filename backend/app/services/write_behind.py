@@ -0,0 +1,306 @@
+"""
+Write-behind buffer for outbound bot messages.
+Bot replies are queued in memory and inserted in multi-row batches when the
+buffer reaches a size or time threshold, instead of one commit per reply.
+Buffered messages stay visible to conversation history reads until their
+batch is committed (read-your-writes within the process).
+A batch that fails is retried row by row: rows the database rejects go to a
+dead-letter file, and only connection failures put rows back in the queue.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional
+from uuid import UUID
+
+import orjson
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from app.models import Message
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: buffer outbound bot messages instead of committing each one
+OUTBOUND_WRITE_BEHIND = os.getenv("OUTBOUND_WRITE_BEHIND", "false").lower() == "true"
+# Flush as soon as this many messages are pending
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))
+# Flush at least this often while messages are pending
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "200"))
+# Messages held in memory at most; beyond this save_message writes directly
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "5000"))
+# JSON-lines file for messages the database rejected (kept for replay by hand)
+WRITE_BEHIND_DEAD_LETTER_PATH = os.getenv("WRITE_BEHIND_DEAD_LETTER_PATH", "write_behind_dead_letter.jsonl")
+
+
+def _is_transient(error: Exception) -> bool:
+    """Connection problems, worth retrying later, as opposed to a bad row."""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class OutboundMessageBuffer:
+    """
+    In-process buffer that batches outbound message inserts.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = OUTBOUND_WRITE_BEHIND,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval_ms: int = WRITE_BEHIND_FLUSH_MS,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        dead_letter_path: str = WRITE_BEHIND_DEAD_LETTER_PATH
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            enabled: Whether save_message(defer=True) uses the buffer
+            batch_size: Pending messages that trigger an immediate flush
+            flush_interval_ms: Maximum time a message waits before flushing
+            max_pending: Uncommitted messages above which add() refuses more
+            dead_letter_path: File receiving rows the database rejects
+        """
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.dead_letter_path = dead_letter_path
+        self._lock = threading.Lock()
+        # Flushes are serialized so batches commit in arrival order
+        self._flush_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._inflight: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_messages = 0
+        self.last_flush_ms = 0.0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+        self.refused = 0
+
+    def add(self, values: Dict[str, Any]) -> bool:
+        """
+        Queue a message insert.
+
+        Args:
+            values: Message column values, including a client-generated id
+
+        Returns:
+            False if the buffer is full (the caller must write the message
+            itself, which slows producers down while the database catches up)
+        """
+        with self._lock:
+            if len(self._pending) + len(self._inflight) >= self.max_pending:
+                self.refused += 1
+                return False
+            self._pending.append(values)
+            should_wake = len(self._pending) >= self.batch_size
+
+        if should_wake and self._wakeup is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    def pending_for_channel(self, channel_id: UUID) -> List[Dict[str, Any]]:
+        """
+        Messages of a channel that are queued or being flushed.
+
+        Args:
+            channel_id: Database UUID of the channel
+
+        Returns:
+            Column value dicts in insertion order
+        """
+        with self._lock:
+            return [
+                values for values in self._inflight + self._pending
+                if values.get("channel_id") == channel_id
+            ]
+
+    def depth(self) -> int:
+        """Number of messages not yet committed."""
+        with self._lock:
+            return len(self._pending) + len(self._inflight)
+
+    def _insert(self, rows: List[Dict[str, Any]]):
+        """Insert rows in one multi-row statement (with their rollups) and commit."""
+        from app.database import SessionLocal
+        from app.services.rollup_service import RollupService, ROLLUP_INLINE
+
+        db = SessionLocal()
+        try:
+            inserted_ids = set(db.execute(
+                insert(Message).values(rows).on_conflict_do_nothing(
+                    constraint="unique_message_id_timestamp"
+                ).returning(Message.id)
+            ).scalars().all())
+
+            if ROLLUP_INLINE:
+                RollupService(db).record_messages(
+                    values for values in rows if values["id"] in inserted_ids
+                )
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _dead_letter(self, values: Dict[str, Any], error: Exception):
+        """Append a rejected row to the dead-letter file."""
+        self.dead_lettered += 1
+        logger.error(
+            f"❌ Mensaje {values.get('message_id')} rechazado por la BD, enviado a "
+            f"{self.dead_letter_path}: {str(error)}"
+        )
+        try:
+            with open(self.dead_letter_path, "ab") as f:
+                f.write(orjson.dumps({
+                    "failed_at": time.time(),
+                    "error": str(error),
+                    "values": values
+                }, default=str) + b"\n")
+        except OSError as e:
+            logger.error(f"❌ No se pudo escribir el dead-letter ({str(e)}): {values}")
+
+    def _insert_rows(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        Insert a failed batch one row at a time.
+
+        Returns:
+            Number of rows committed
+
+        Raises:
+            Exception: The connection error that stopped the retry; the rows
+                not yet written are back at the front of the queue
+        """
+        committed = 0
+        for index, values in enumerate(batch):
+            try:
+                self._insert([values])
+                committed += 1
+            except Exception as e:
+                if _is_transient(e):
+                    # Requeue and leave _inflight in one step, so reads and
+                    # add() never see these rows twice
+                    with self._lock:
+                        self._pending = batch[index:] + self._pending
+                        self._inflight = []
+                    self.flushed_messages += committed
+                    raise
+                self._dead_letter(values, e)
+        return committed
+
+    def flush(self) -> int:
+        """
+        Insert all pending messages in one multi-row statement and commit.
+        If the batch fails it is retried row by row (see _insert_rows).
+
+        Returns:
+            Number of messages committed
+
+        Raises:
+            Exception: If the database is unreachable (rows are kept queued)
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = []
+                self._inflight = batch
+
+            started = time.perf_counter()
+            try:
+                try:
+                    self._insert(batch)
+                    committed = len(batch)
+                except Exception as e:
+                    self.failed_flushes += 1
+                    if _is_transient(e):
+                        with self._lock:
+                            self._pending = batch + self._pending
+                            self._inflight = []
+                        logger.error(f"❌ BD no disponible, lote de {len(batch)} mensajes en espera: {str(e)}")
+                        raise
+                    logger.error(
+                        f"❌ Error guardando lote de {len(batch)} mensajes, reintentando uno por uno: {str(e)}"
+                    )
+                    committed = self._insert_rows(batch)
+            finally:
+                with self._lock:
+                    self._inflight = []
+
+            self.flushes += 1
+            self.flushed_messages += committed
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            return committed
+
+    async def _run(self):
+        """Flush on the size threshold or every flush interval."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if not self.depth():
+                continue
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                # Already logged; back off briefly before retrying the batch
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self):
+        """Start the background flusher on the running event loop."""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"📝 Write-behind de mensajes salientes activo "
+            f"(lote={self.batch_size}, intervalo={int(self.flush_interval * 1000)}ms)"
+        )
+
+    async def stop(self):
+        """Stop the flusher and write out everything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.depth():
+            # Shutdown must go on even if the database is down: log what is lost
+            try:
+                flushed = await asyncio.to_thread(self.flush)
+                logger.info(f"📝 Write-behind vaciado al apagar: {flushed} mensajes")
+            except Exception as e:
+                logger.error(
+                    f"❌ Write-behind no pudo vaciarse al apagar, {self.depth()} mensajes sin guardar: {str(e)}"
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth and flush counters."""
+        return {
+            "enabled": self.enabled,
+            "depth": self.depth(),
+            "flushes": self.flushes,
+            "flushed_messages": self.flushed_messages,
+            "failed_flushes": self.failed_flushes,
+            "dead_lettered": self.dead_lettered,
+            "refused": self.refused,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
+
+
+# Process-wide buffer used by MessageService.save_message(defer=True)
+outbound_buffer = OutboundMessageBuffer()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Script to archive old messages to cold storage and restore them.
+
+Usage:
+    python archive_messages.py archive --older-than-days 180
+    python archive_messages.py restore --channel-id <uuid> [--date-from 2024-01-01] [--date-to 2024-03-31]
+    python archive_messages.py list
+
+Archived messages are written as gzip NDJSON segments under ARCHIVE_DIR and
+deleted from Postgres in small batches.
+"""
+import sys
+import os
+import argparse
+from datetime import datetime
+from uuid import UUID
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from app.database import SessionLocal
+from app.services.archive_service import ArchiveService, NO_CHANNEL_KEY
+
+
+def parse_channel_id(value: str):
+    """Parse a channel UUID, accepting 'none' for channel-less messages"""
+    return None if value == NO_CHANNEL_KEY else UUID(value)
+
+
+def list_segments(service: ArchiveService):
+    """List archived segments per channel"""
+    manifest = service.load_manifest()
+
+    if not manifest["channels"]:
+        print("No archived segments found.")
+        return
+
+    print()
+    print("=" * 100)
+    print(f"{'Channel':<38} {'Messages':<10} {'From':<28} {'To'}")
+    print("=" * 100)
+
+    for channel_key, segments in sorted(manifest["channels"].items()):
+        for segment in segments:
+            print(
+                f"{channel_key:<38} {segment['message_count']:<10} "
+                f"{segment['min_timestamp']:<28} {segment['max_timestamp']}"
+            )
+
+    print("=" * 100)
+    print()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Archive and restore old messages")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help="Archive old messages")
+    archive_parser.add_argument("--older-than-days", type=int, required=True,
+                                help="Archive messages older than this many days")
+
+    restore_parser = subparsers.add_parser("restore", help="Restore archived messages")
+    restore_parser.add_argument("--channel-id", type=parse_channel_id, required=True,
+                                help="Channel UUID (or 'none')")
+    restore_parser.add_argument("--date-from", type=datetime.fromisoformat, default=None)
+    restore_parser.add_argument("--date-to", type=datetime.fromisoformat, default=None)
+
+    subparsers.add_parser("list", help="List archived segments")
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+
+    try:
+        service = ArchiveService(db)
+
+        if args.command == "list":
+            list_segments(service)
+
+        elif args.command == "archive":
+            result = service.archive_older_than(args.older_than_days)
+            print(f"✅ Messages archived: {result['archived']}")
+            for channel_key, count in result["channels"].items():
+                print(f"   {channel_key}: {count}")
+
+        elif args.command == "restore":
+            restored = service.restore(args.channel_id, args.date_from, args.date_to)
+            print(f"✅ Messages restored: {restored}")
+
+    except KeyboardInterrupt:
+        print()
+        print("❌ Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Agent endpoint load-balancing benchmark.
+
+Starts several local agent stand-ins with different latencies and a limit
+on requests served at once (each agent's throughput ceiling), then sends
+the same closed-loop load through DigitalOceanClient with:
+- single:            only the first endpoint (today's DIGITALOCEAN_API_URL)
+- least_outstanding: all endpoints, fewest requests in flight per weight
+- ewma:              all endpoints, latency EWMA x load, power of two choices
+
+Reports throughput, latency percentiles and the share of requests each
+endpoint served. A last phase makes one endpoint answer 503 for a while and
+checks that it is ejected, that requests keep succeeding on the others,
+and that it is re-admitted once it recovers. No database is needed.
+
+Usage:
+    python benchmarks/bench_agent_endpoints.py --latencies 60,120,300 \\
+        --agent-concurrency 8 --clients 32 --requests 600
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("DIGITALOCEAN_API_KEY", "bench")
+os.environ.setdefault("DIGITALOCEAN_AGENT_ID", "bench-agent")
+# Short ejections so the benchmark can watch re-admission
+os.environ.setdefault("AGENT_EJECT_SECONDS", "1")
+
+from standins import StandInServer, agent_app
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def drive(client, requests: int, clients: int):
+    """Closed loop: `clients` workers sending back to back until `requests` are done"""
+    latencies, served, errors = [], Counter(), 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                await client.send_to_agent([{"role": "user", "content": "hola"}])
+                latencies.append((time.perf_counter() - started) * 1000)
+                served[client.last_endpoint] += 1
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, served, errors, time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent endpoint load balancing")
+    parser.add_argument("--latencies", default="60,120,300", help="Stand-in latency (ms) per endpoint")
+    parser.add_argument("--weights", default="", help="Weight per endpoint (default 1 each)")
+    parser.add_argument("--agent-concurrency", type=int, default=8, help="Requests each agent serves at once")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent bot turns")
+    parser.add_argument("--requests", type=int, default=600, help="Requests per mode")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    from app.services.agent_endpoints import AgentEndpointPool, parse_endpoints
+    from app.services.digitalocean_client import DigitalOceanClient, close_http_client
+
+    latencies_ms = [float(value) for value in args.latencies.split(",")]
+    weights = args.weights.split(",") if args.weights else ["1"] * len(latencies_ms)
+    servers = [
+        StandInServer(agent_app(latency_ms=latency, jitter_ms=latency * 0.2, concurrency=args.agent_concurrency)).start()
+        for latency in latencies_ms
+    ]
+    spec = ",".join(f"{server.url}|{weight}" for server, weight in zip(servers, weights))
+
+    def make_client(strategy: str, endpoints_spec: str):
+        client = DigitalOceanClient()
+        client.pool = AgentEndpointPool(parse_endpoints(endpoints_spec, "bench-agent", "bench"), strategy)
+        return client
+
+    modes = [
+        ("single", make_client("least_outstanding", spec.split(",")[0])),
+        ("least_outstanding", make_client("least_outstanding", spec)),
+        ("ewma", make_client("ewma", spec)),
+    ]
+    names = [endpoint.name for endpoint in modes[1][1].pool.endpoints]
+
+    print()
+    print("=" * 80)
+    print(f"{args.requests} requests, {args.clients} concurrent, agents at "
+          f"{args.latencies} ms serving {args.agent_concurrency} at once")
+    print("=" * 80)
+    print(f"{'Mode':<18} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>7}  Share per endpoint")
+    print("-" * 80)
+    for name, client in modes:
+        await drive(client, args.clients, args.clients)  # warm connections and EWMAs
+        latencies, served, errors, elapsed = await drive(client, args.requests, args.clients)
+        share = " ".join(f"{served[n] / max(sum(served.values()), 1):>4.0%}" for n in names)
+        print(f"{name:<18} {len(latencies) / elapsed:>7.1f} {percentile(latencies, 50):>8.0f} "
+              f"{percentile(latencies, 95):>8.0f} {percentile(latencies, 99):>8.0f} {errors:>7}  {share}")
+    print("-" * 80)
+
+    # Passive health: the fastest endpoint fails for a while, then recovers
+    client = modes[2][1]
+    target = client.pool.endpoints[0]
+    servers[0].app.state.failing = True
+    _, served_down, errors_down, _ = await drive(client, args.requests // 2, args.clients)
+    ejections = target.ejections
+    servers[0].app.state.failing = False
+    await asyncio.sleep(float(os.environ["AGENT_EJECT_SECONDS"]) * 2 ** ejections)
+    _, served_up, errors_up, _ = await drive(client, args.requests // 2, args.clients)
+    print(f"{target.name} failing: {errors_down} errors, ejected {ejections} time(s), "
+          f"served {served_down[target.name]} of {sum(served_down.values())}")
+    print(f"{target.name} recovered: {errors_up} errors, served {served_up[target.name]} "
+          f"of {sum(served_up.values())} after re-admission")
+    print("=" * 80)
+    print()
+
+    await close_http_client()
+    for server in servers:
+        server.stop()
+
+    ok = ejections >= 1 and errors_up == 0 and served_up[target.name] > 0
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
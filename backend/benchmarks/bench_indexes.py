@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Write-amplification benchmark for the messages index redesign (migration 003).
+
+Builds two scratch schemas with a partitioned messages table, one with the
+legacy single-column indexes and one with the redesigned set, then reports:
+- insert throughput with one commit per row (the bot hot path)
+- total index size after the load
+- EXPLAIN (ANALYZE, BUFFERS) plans for the queries the app actually runs
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_indexes.py --rows 20000
+
+Run it against a scratch database: it creates and drops the bench_* schemas.
+"""
+import sys
+import os
+import time
+import uuid
+import random
+import argparse
+import json
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import create_engine, text
+
+TABLE_DDL = """
+CREATE TABLE {schema}.messages (
+    id UUID NOT NULL,
+    message_id VARCHAR(255) NOT NULL,
+    channel VARCHAR(50) NOT NULL,
+    direction VARCHAR(20) NOT NULL,
+    sender_type VARCHAR(20) NOT NULL,
+    user_id UUID,
+    channel_id UUID,
+    message_text TEXT,
+    timestamp TIMESTAMP NOT NULL,
+    platform_metadata JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp),
+    UNIQUE (message_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+CREATE TABLE {schema}.messages_default PARTITION OF {schema}.messages DEFAULT;
+"""
+
+INDEX_SETS = {
+    "before": [
+        "CREATE INDEX ON {schema}.messages(channel)",
+        "CREATE INDEX ON {schema}.messages(direction)",
+        "CREATE INDEX ON {schema}.messages(sender_type)",
+        "CREATE INDEX ON {schema}.messages(timestamp)",
+        "CREATE INDEX ON {schema}.messages(user_id)",
+        "CREATE INDEX ON {schema}.messages(channel_id)",
+        "CREATE INDEX ON {schema}.messages(created_at)",
+    ],
+    "after": [
+        "CREATE INDEX ON {schema}.messages(channel_id, timestamp DESC)",
+        "CREATE INDEX ON {schema}.messages(timestamp)",
+        "CREATE INDEX ON {schema}.messages(user_id) WHERE user_id IS NOT NULL",
+        "CREATE INDEX ON {schema}.messages USING brin (created_at)",
+    ],
+}
+
+# Queries issued by the app (list_messages, history lookup, dedup, rollup catch-up)
+QUERIES = {
+    "list_messages (channel filter, newest first)":
+        "SELECT * FROM {schema}.messages WHERE channel = 'slack' "
+        "ORDER BY timestamp DESC LIMIT 100",
+    "list_messages (date range)":
+        "SELECT * FROM {schema}.messages WHERE timestamp >= now() - interval '2 days' "
+        "AND timestamp <= now() ORDER BY timestamp DESC LIMIT 100",
+    "conversation history":
+        "SELECT * FROM {schema}.messages WHERE channel_id = :channel_id "
+        "AND timestamp >= now() - interval '30 days' ORDER BY timestamp DESC LIMIT 20",
+    "dedup by message_id":
+        "SELECT * FROM {schema}.messages WHERE message_id = :message_id LIMIT 1",
+    "rollup catch-up (created_at window)":
+        "SELECT DISTINCT date_trunc('hour', timestamp) FROM {schema}.messages "
+        "WHERE created_at > now() - interval '5 minutes'",
+}
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def setup_schema(engine, schema: str, index_set: str, months: int):
+    """Create a scratch schema with monthly partitions and one index set"""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        conn.execute(text(TABLE_DDL.format(schema=schema)))
+        start = month_start(datetime.now())
+        for i in range(-months + 1, 2):
+            month_index = start.year * 12 + start.month - 1 + i
+            lower = datetime(month_index // 12, month_index % 12 + 1, 1)
+            upper_index = month_index + 1
+            upper = datetime(upper_index // 12, upper_index % 12 + 1, 1)
+            conn.execute(text(
+                f"CREATE TABLE {schema}.messages_{lower:%Y_%m} PARTITION OF {schema}.messages "
+                f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+            ))
+        for ddl in INDEX_SETS[index_set]:
+            conn.execute(text(ddl.format(schema=schema)))
+
+
+def generate_rows(count: int, channels: list, users: list, days: int):
+    """Yield synthetic messages shaped like the bot traffic (half bot replies)"""
+    now = datetime.now()
+    for i in range(count):
+        is_bot = i % 2 == 1
+        yield {
+            "id": uuid.uuid4(),
+            "message_id": f"bench_{uuid.uuid4().hex}",
+            "channel": random.choice(["slack", "slack", "whatsapp", "web"]),
+            "direction": "outbound" if is_bot else "inbound",
+            "sender_type": "bot" if is_bot else "user",
+            "user_id": None if is_bot else random.choice(users),
+            "channel_id": random.choice(channels),
+            "message_text": "x" * random.randint(20, 400),
+            "timestamp": now - timedelta(seconds=random.randint(0, days * 86400)),
+        }
+
+
+def load(engine, schema: str, rows: list) -> float:
+    """Insert rows with one commit each; returns rows per second"""
+    stmt = text(
+        f"INSERT INTO {schema}.messages (id, message_id, channel, direction, sender_type, "
+        f"user_id, channel_id, message_text, timestamp) VALUES (:id, :message_id, :channel, "
+        f":direction, :sender_type, :user_id, :channel_id, :message_text, :timestamp)"
+    )
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        for row in rows:
+            conn.execute(stmt, row)
+            conn.commit()
+    return len(rows) / (time.perf_counter() - started)
+
+
+def index_size(engine, schema: str) -> int:
+    """Total size in bytes of every index on the schema's partitions"""
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT COALESCE(SUM(pg_relation_size(i.indexrelid)), 0)
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = :schema
+        """), {"schema": schema}).scalar()
+
+
+def explain(engine, schema: str, params: dict) -> dict:
+    """EXPLAIN (ANALYZE, BUFFERS) every benchmark query"""
+    plans = {}
+    with engine.connect() as conn:
+        conn.execute(text(f"ANALYZE {schema}.messages"))
+        for name, sql in QUERIES.items():
+            rows = conn.execute(
+                text("EXPLAIN (ANALYZE, BUFFERS) " + sql.format(schema=schema)), params
+            ).scalars().all()
+            plans[name] = rows
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark messages index sets")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows inserted per index set")
+    parser.add_argument("--days", type=int, default=60, help="Spread of message timestamps")
+    parser.add_argument("--channels", type=int, default=200, help="Distinct conversations")
+    parser.add_argument("--json", type=str, default=None, help="Write the report to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench_* schemas")
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    channels = [uuid.uuid4() for _ in range(args.channels)]
+    users = [uuid.uuid4() for _ in range(args.channels * 2)]
+    random.seed(42)
+    rows = list(generate_rows(args.rows, channels, users, args.days))
+    months = args.days // 28 + 2
+
+    report = {"rows": args.rows, "results": {}}
+    for index_set in ("before", "after"):
+        schema = f"bench_{index_set}"
+        setup_schema(engine, schema, index_set, months)
+        throughput = load(engine, schema, rows)
+        size = index_size(engine, schema)
+        plans = explain(engine, schema, {
+            "channel_id": channels[0],
+            "message_id": rows[len(rows) // 2]["message_id"],
+        })
+        report["results"][index_set] = {
+            "indexes": INDEX_SETS[index_set],
+            "inserts_per_second": round(throughput, 1),
+            "index_bytes": size,
+            "plans": plans,
+        }
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+    print()
+    print("=" * 80)
+    print(f"{'Index set':<12} {'Indexes':<10} {'Inserts/s':<14} {'Index size'}")
+    print("=" * 80)
+    for index_set, result in report["results"].items():
+        print(
+            f"{index_set:<12} {len(result['indexes']):<10} "
+            f"{result['inserts_per_second']:<14} {result['index_bytes'] / 1024 / 1024:.1f} MB"
+        )
+    print("=" * 80)
+
+    for index_set, result in report["results"].items():
+        print()
+        print(f"### Query plans: {index_set}")
+        for name, plan in result["plans"].items():
+            print()
+            print(f"-- {name}")
+            for line in plan:
+                print(f"   {line}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print()
+        print(f"📄 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Admin list endpoint projection benchmark.
+
+Seeds bench messages (with a realistic platform_metadata JSONB payload) into
+DATABASE_URL and requests 1000-row pages of GET /api/messages/ in-process,
+with authentication bypassed, comparing:
+- orm:        today's path (ORM objects validated through MessageResponse)
+- all fields: ?fields= with every MessageResponse field (Core select + orjson)
+- narrow:     ?fields=id,timestamp,message_text (what a list view needs)
+
+Reports pages/second, ms per page, peak Python memory per page
+(tracemalloc) and response size, and checks that the all-fields projection
+returns exactly the same JSON values as the ORM path.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_list_projection.py \\
+        --rows 5000 --page-size 1000 --pages 50
+
+Run it against a scratch database: it writes and then deletes bench-proj-* messages.
+"""
+import sys
+import os
+import time
+import uuid
+import random
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+os.environ.setdefault("SLACK_SIGNING_SECRET", "bench")
+os.environ.setdefault("WHAPI_API_KEY", "bench")
+os.environ.setdefault("WHAPI_BASE_URL", "http://127.0.0.1:9")
+
+ALL_FIELDS = "id,message_id,channel,direction,sender_type,user_id,channel_id,message_text,timestamp,metadata,created_at,updated_at"
+
+
+def seed(engine, run_id: str, rows: int):
+    from sqlalchemy import insert
+    from app.models import Message
+
+    now = datetime.now()
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "id": uuid.uuid4(),
+            "message_id": f"bench-proj-{run_id}-{i}",
+            "channel": "web",
+            "direction": random.choice(["inbound", "outbound"]),
+            "sender_type": random.choice(["user", "bot"]),
+            "message_text": "Mensaje de prueba para el listado de administración " * 3,
+            # Stay inside the current partition
+            "timestamp": now - timedelta(seconds=i),
+            "platform_metadata": {
+                "thread_ts": f"1700000000.{i:06d}",
+                "message_type": "text",
+                "user_name": f"Bench {i % 50}",
+                "blocks": [{"type": "rich_text", "elements": [{"type": "text", "text": "línea " * 30}]}],
+            },
+        })
+    with engine.begin() as conn:
+        for start in range(0, len(batch), 1000):
+            conn.execute(insert(Message), batch[start:start + 1000])
+
+
+def cleanup(engine, run_id: str):
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM messages WHERE message_id LIKE :pattern"),
+                     {"pattern": f"bench-proj-{run_id}-%"})
+
+
+def measure(client, params: dict, pages: int, page_size: int, total_rows: int):
+    """ms per page and peak traced memory of one page"""
+    offsets = [(i * page_size) % max(total_rows - page_size + 1, 1) for i in range(pages)]
+    started = time.perf_counter()
+    for offset in offsets:
+        response = client.get("/api/messages/", params={**params, "limit": page_size, "offset": offset})
+        assert response.status_code == 200, response.text
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    response = client.get("/api/messages/", params={**params, "limit": page_size, "offset": 0})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / pages * 1000, peak / 1024 / 1024, len(response.content), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark projected list endpoints")
+    parser.add_argument("--rows", type=int, default=5000, help="Bench messages to seed")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per page (max 1000)")
+    parser.add_argument("--pages", type=int, default=50, help="Pages requested per mode")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    from fastapi.testclient import TestClient
+    from app.auth import get_current_user
+    from app.database import engine
+    from app.models import AdminUser
+    import app.main
+
+    app.main.app.dependency_overrides[get_current_user] = lambda: AdminUser(username="bench")
+    # No lifespan: background loops and warm-up are not needed here
+    client = TestClient(app.main.app)
+
+    run_id = uuid.uuid4().hex[:8]
+    seed(engine, run_id, args.rows)
+    try:
+        modes = [
+            ("orm", {}),
+            ("all fields", {"fields": ALL_FIELDS}),
+            ("narrow", {"fields": "id,timestamp,message_text"}),
+        ]
+        filters = {"channel": "web"}
+
+        # Warm up the pool and the query plans
+        for _, params in modes:
+            client.get("/api/messages/", params={**filters, **params, "limit": 10})
+
+        print()
+        print("=" * 80)
+        print(f"{args.pages} pages of {args.page_size} rows ({args.rows} bench messages)")
+        print("=" * 80)
+        print(f"{'Mode':<14} {'Pages/s':>10} {'ms/page':>10} {'Peak MB/page':>14} {'KB/page':>10}")
+        print("-" * 80)
+        responses = {}
+        for name, params in modes:
+            ms, peak_mb, size, response = measure(client, {**filters, **params}, args.pages, args.page_size, args.rows)
+            responses[name] = response.json()
+            print(f"{name:<14} {1000 / ms:>10.1f} {ms:>10.1f} {peak_mb:>14.1f} {size / 1024:>10.0f}")
+        print("=" * 80)
+        same = responses["orm"] == responses["all fields"]
+        print(f"All-fields projection matches ORM response: {'yes' if same else 'NO'}")
+        print()
+    finally:
+        cleanup(engine, run_id)
+
+
+if __name__ == "__main__":
+    main()
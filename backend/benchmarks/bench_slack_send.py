@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Slack send queue benchmark.
+
+Posts bot replies (some long, with code blocks) to many threads across a few
+channels against a local Slack Web API stand-in that enforces a per-channel
+rate limit with 429 + Retry-After, like Slack does, and compares:
+- direct: one concurrent chat.postMessage per reply, as the connector did
+          before the queue (no chunking, no retries)
+- queue:  SlackSendQueue (chunking, per-channel and workspace buckets,
+          per-thread FIFO, retries)
+
+Reports replies delivered, 429s served, messages over the length limit,
+whether every thread received its chunks in order, and enqueue-to-delivery
+latency. No database is needed.
+
+Usage:
+    python benchmarks/bench_slack_send.py --channels 4 --threads 5 --replies 3 \\
+        --channel-rate 5 --max-chars 1000
+"""
+import sys
+import os
+import re
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from standins import StandInServer, slack_api_app
+
+MARKER = re.compile(r"r(\d+)p(\d+)")
+
+
+def reply_text(seq: int, long: bool) -> str:
+    """A reply whose paragraphs carry an rNpM marker, to check ordering on arrival"""
+    if not long:
+        return f"r{seq}p0 Respuesta corta."
+    paragraphs = [f"r{seq}p{i} " + "texto de la respuesta " * 15 for i in range(8)]
+    code = "```python\n" + "\n".join(f"valor_{i} = {i}  # r{seq}p8" for i in range(60)) + "\n```"
+    return "\n\n".join(paragraphs[:4] + [code] + [f"r{seq}p9 " + "conclusión " * 20])
+
+
+def workload(args):
+    """(channel, thread_ts, text) in submission order"""
+    posts = []
+    for seq in range(args.replies):
+        for channel in range(args.channels):
+            for thread in range(args.threads):
+                posts.append((f"C{channel:04d}", f"1700000000.{thread:06d}", reply_text(seq, seq % 2 == 1)))
+    return posts
+
+
+def check_order(sent):
+    """Every thread received its markers in non-decreasing order"""
+    seen = {}
+    for channel, thread_ts, text, _ in sent:
+        for seq, part in MARKER.findall(text):
+            seen.setdefault((channel, thread_ts), []).append((int(seq), int(part)))
+    return all(markers == sorted(markers) for markers in seen.values())
+
+
+async def run_direct(args, posts):
+    import httpx
+
+    api = StandInServer(slack_api_app(
+        latency_ms=args.latency_ms, channel_rate=args.channel_rate, channel_burst=args.channel_burst
+    )).start()
+    latencies = []
+
+    async def post(client, channel, thread_ts, text):
+        started = time.perf_counter()
+        response = await client.post(f"{api.url}/chat.postMessage",
+                                     json={"channel": channel, "text": text, "thread_ts": thread_ts})
+        latencies.append((time.perf_counter() - started) * 1000)
+        return response.status_code == 200
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        results = await asyncio.gather(*(post(client, *p) for p in posts))
+    api.stop()
+    state = api.app.state
+    return {
+        "delivered": sum(results),
+        "throttled": state.throttled,
+        # Slack would truncate or reject these instead of splitting them
+        "oversized": sum(1 for _, _, text in posts if len(text) > args.max_chars),
+        "posts": len(state.sent),
+        "in_order": check_order(state.sent),
+        "latencies": latencies,
+    }
+
+
+async def run_queue(args, posts):
+    from app.services.slack_sender import SlackSendQueue, SlackRateLimiter
+
+    api = StandInServer(slack_api_app(
+        latency_ms=args.latency_ms, channel_rate=args.channel_rate, channel_burst=args.channel_burst
+    )).start()
+    queue = SlackSendQueue(
+        token="xoxb-bench", api_base_url=api.url,
+        channel_rate=args.channel_rate, channel_burst=args.channel_burst,
+        limiter=SlackRateLimiter(args.post_rate_per_minute), max_chars=args.max_chars
+    )
+    futures = [queue.enqueue(channel, text, thread_ts) for channel, thread_ts, text in posts]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    stats = queue.stats()
+    await queue.stop()
+    api.stop()
+    state = api.app.state
+    return {
+        "delivered": sum(1 for r in results if not isinstance(r, Exception)),
+        "throttled": state.throttled,
+        "oversized": sum(1 for _, _, text, _ in state.sent if len(text) > args.max_chars),
+        "posts": len(state.sent),
+        "in_order": check_order(state.sent),
+        "stats": stats,
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Slack send queue")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=5, help="Threads per channel")
+    parser.add_argument("--replies", type=int, default=3, help="Replies per thread (every other one long)")
+    parser.add_argument("--channel-rate", type=float, default=5, help="Posts per second per channel")
+    parser.add_argument("--channel-burst", type=float, default=2)
+    parser.add_argument("--post-rate-per-minute", type=float, default=3000, help="Workspace chat.postMessage rate")
+    parser.add_argument("--max-chars", type=int, default=1000, help="Characters per message")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Stand-in response latency")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    posts = workload(args)
+    direct = await run_direct(args, posts)
+    queued = await run_queue(args, posts)
+    stats = queued["stats"]
+
+    print()
+    print("=" * 80)
+    print(f"{len(posts)} replies to {args.channels} channels x {args.threads} threads, "
+          f"{args.channel_rate}/s per channel (burst {args.channel_burst:.0f}), limit {args.max_chars} chars")
+    print("=" * 80)
+    print(f"{'Mode':<8} {'Delivered':>10} {'Posts':>7} {'429s':>6} {'Oversized':>10} {'In order':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8}")
+    print("-" * 80)
+    print(f"{'direct':<8} {direct['delivered']:>10} {direct['posts']:>7} {direct['throttled']:>6} "
+          f"{direct['oversized']:>10} {str(direct['in_order']):>9} "
+          f"{percentile(direct['latencies'], 50):>8.0f} {percentile(direct['latencies'], 95):>8.0f}")
+    print(f"{'queue':<8} {queued['delivered']:>10} {queued['posts']:>7} {queued['throttled']:>6} "
+          f"{queued['oversized']:>10} {str(queued['in_order']):>9} "
+          f"{stats['latency_ms']['p50']:>8.0f} {stats['latency_ms']['p95']:>8.0f}")
+    print("-" * 80)
+    print(f"Queue: {stats['chunks']} chunks for {stats['sent']} replies, "
+          f"{stats['retries']} retries, {stats['failed']} failed")
+    print("=" * 80)
+    print()
+
+    ok = queued["delivered"] == len(posts) and queued["in_order"] and queued["oversized"] == 0
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
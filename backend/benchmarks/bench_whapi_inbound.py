@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Whapi inbound webhook benchmark.
+
+Serves the real app with uvicorn against DATABASE_URL, with the DigitalOcean
+agent and the Whapi API replaced by local stand-ins, then posts webhook
+batches the way Whapi does (an array of messages per call) and reports:
+- webhook ack latency (must stay well under the Whapi webhook timeout)
+- end-to-end time until every reply reached the Whapi stand-in
+- that duplicate deliveries of a batch are not processed twice
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_whapi_inbound.py \\
+        --batches 20 --batch-size 25 --chats 100 --agent-latency-ms 200
+
+Run it against a scratch database: it writes bench_* users, channels and messages.
+"""
+import sys
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from standins import StandInServer, agent_app, whapi_app
+
+WEBHOOK_SECRET = "bench-webhook-secret"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def build_batch(run_id: str, batch: int, size: int, chats: int):
+    """A Whapi webhook payload with `size` text messages spread over `chats` chats"""
+    messages = []
+    for i in range(size):
+        chat = (batch * size + i) % chats
+        messages.append({
+            "id": f"bench-{run_id}-{batch}-{i}",
+            "from_me": False,
+            "type": "text",
+            "chat_id": f"bench{run_id}{chat:05d}@s.whatsapp.net",
+            "timestamp": int(time.time()),
+            "source": "mobile",
+            "text": {"body": f"Mensaje de prueba {batch}-{i}"},
+            "from": f"bench{run_id}{chat:05d}",
+            "from_name": f"Bench {chat}",
+        })
+    return {"messages": messages, "event": {"type": "messages", "event": "post"}}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Whapi inbound webhook")
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=25, help="Messages per webhook call")
+    parser.add_argument("--chats", type=int, default=100, help="Distinct WhatsApp chats")
+    parser.add_argument("--agent-latency-ms", type=float, default=200)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for replies")
+    args = parser.parse_args()
+
+    import httpx
+
+    agent = StandInServer(agent_app(latency_ms=args.agent_latency_ms)).start()
+    whapi = StandInServer(whapi_app()).start()
+    os.environ["DIGITALOCEAN_API_URL"] = agent.url
+    os.environ.setdefault("DIGITALOCEAN_API_KEY", "bench")
+    os.environ.setdefault("DIGITALOCEAN_AGENT_ID", "bench")
+    os.environ["WHAPI_BASE_URL"] = whapi.url
+    os.environ.setdefault("WHAPI_API_KEY", "bench")
+    os.environ["WHAPI_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+
+    from app.main import app
+    from app.services.turn_scheduler import turn_scheduler
+
+    server = StandInServer(app).start()
+    run_id = uuid.uuid4().hex[:8]
+    payloads = [build_batch(run_id, b, args.batch_size, args.chats) for b in range(args.batches)]
+    total = args.batches * args.batch_size
+
+    ack_latencies = []
+    async with httpx.AsyncClient(base_url=server.url, timeout=30.0) as client:
+        async def post(payload):
+            started = time.perf_counter()
+            response = await client.post(
+                "/canales/whapi/events", json=payload,
+                headers={"X-Webhook-Secret": WEBHOOK_SECRET}
+            )
+            response.raise_for_status()
+            ack_latencies.append((time.perf_counter() - started) * 1000)
+            return response.json()
+
+        started = time.time()
+        acks = await asyncio.gather(*[post(payload) for payload in payloads])
+        # Whapi retries on timeouts: a redelivered batch must not be processed again
+        duplicate_ack = await post(payloads[0])
+
+        rejected = await client.post("/canales/whapi/events", json=payloads[0])
+
+        while len(whapi.app.state.sent) < total and time.time() - started < args.timeout:
+            await asyncio.sleep(0.1)
+        elapsed = time.time() - started
+        await asyncio.sleep(1)  # Catch any reply sent twice
+
+    sent = whapi.app.state.sent
+    server.stop()
+    whapi.stop()
+    agent.stop()
+
+    print()
+    print("=" * 80)
+    print(f"{args.batches} batches x {args.batch_size} messages over {args.chats} chats, "
+          f"agent latency {args.agent_latency_ms:.0f} ms, concurrency {turn_scheduler.lanes['dm'].concurrency}")
+    print("=" * 80)
+    print(f"Accepted:           {sum(a['accepted'] for a in acks)} / {total}")
+    print(f"Ack latency:        mean {statistics.mean(ack_latencies):.1f} ms   "
+          f"p50 {percentile(ack_latencies, 50):.1f} ms   p99 {percentile(ack_latencies, 99):.1f} ms")
+    print(f"Replies delivered:  {len(sent)} / {total} in {elapsed:.2f} s "
+          f"({len(sent) / elapsed:.1f} msg/s)")
+    print(f"Duplicate batch:    accepted {duplicate_ack['accepted']} (expected 0)")
+    print(f"Missing secret:     HTTP {rejected.status_code} (expected 401)")
+    print("=" * 80)
+    print()
+
+    ok = (
+        len(sent) == total
+        and duplicate_ack["accepted"] == 0
+        and rejected.status_code == 401
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
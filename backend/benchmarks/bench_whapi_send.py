@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Whapi send queue benchmark.
+
+Pushes messages for many chats through the send queue against a local Whapi
+stand-in that answers every Nth request with 429 + Retry-After, then reports:
+- delivered / failed messages and retries
+- achieved send rate vs the configured channel rate
+- enqueue-to-delivery latency p50/p95/p99
+- whether every chat received its messages in order
+
+No database is needed.
+
+Usage:
+    python benchmarks/bench_whapi_send.py --chats 50 --messages 4 --rate 20 --throttle-every 7
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+async def run(args):
+    from standins import StandInServer, whapi_app
+
+    whapi = StandInServer(whapi_app(latency_ms=args.latency_ms, throttle_every=args.throttle_every)).start()
+    os.environ["WHAPI_BASE_URL"] = whapi.url
+    os.environ.setdefault("WHAPI_API_KEY", "bench")
+    os.environ["WHAPI_SEND_RATE_PER_SECOND"] = str(args.rate)
+    os.environ["WHAPI_SEND_BURST"] = str(args.rate)
+    os.environ["WHAPI_CHAT_RATE_PER_MINUTE"] = str(args.chat_rate_per_minute)
+
+    # Imported after the environment is set: limits are read at import time
+    from app.services.whapi_sender import whapi_send_queue
+
+    total = args.chats * args.messages
+    started = time.perf_counter()
+    futures = [
+        whapi_send_queue.enqueue(f"bench{chat:05d}@s.whatsapp.net", f"{chat}:{seq}")
+        for seq in range(args.messages)
+        for chat in range(args.chats)
+    ]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stats = whapi_send_queue.stats()
+    await whapi_send_queue.stop()
+    whapi.stop()
+
+    received = {}
+    for to, body, _ in whapi.app.state.sent:
+        chat, seq = body.split(":")
+        received.setdefault(chat, []).append(int(seq))
+    in_order = all(seqs == sorted(seqs) for seqs in received.values())
+    failed = sum(1 for r in results if isinstance(r, Exception))
+
+    print()
+    print("=" * 80)
+    print(f"{args.chats} chats x {args.messages} messages, channel rate {args.rate}/s, "
+          f"chat rate {args.chat_rate_per_minute}/min, 429 every {args.throttle_every or '-'} requests")
+    print("=" * 80)
+    print(f"Delivered:     {len(whapi.app.state.sent)} / {total}   failed {failed}   "
+          f"retries {stats['retries']}   429s served {whapi.app.state.throttled}")
+    print(f"Send rate:     {len(whapi.app.state.sent) / elapsed:.1f} msg/s over {elapsed:.2f} s")
+    print(f"Latency (ms):  {stats['latency_ms']}")
+    print(f"Per-chat FIFO: {'ok' if in_order else 'VIOLATED'}")
+    print("=" * 80)
+    print()
+
+    return len(whapi.app.state.sent) == total and in_order
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Whapi send queue")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=4, help="Messages per chat")
+    parser.add_argument("--rate", type=float, default=20, help="Channel sends per second")
+    parser.add_argument("--chat-rate-per-minute", type=float, default=120)
+    parser.add_argument("--throttle-every", type=int, default=7, help="Stand-in answers every Nth send with 429")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Stand-in response latency")
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
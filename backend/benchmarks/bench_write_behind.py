@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Outbound write-behind benchmark.
+
+Serves the real app with uvicorn against DATABASE_URL, with the DigitalOcean
+agent replaced by a local stand-in, and drives N concurrent conversations
+through POST /bot/process. Each mode runs in its own subprocess because
+OUTBOUND_WRITE_BEHIND is read at import time:
+
+- off: every bot reply is saved with its own commit (default behaviour)
+- on:  bot replies go through the write-behind buffer
+
+Reports commits/second (xact_commit delta from pg_stat_database) and turn
+latency p50/p99 for each mode.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_write_behind.py \\
+        --conversations 200 --turns 5 --agent-latency-ms 100
+
+Run it against a scratch database: it writes bench_* users, channels and messages.
+"""
+import sys
+import os
+import time
+import json
+import asyncio
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def xact_commits(engine) -> int:
+    """Committed transactions in the current database so far"""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        # Stats are cached per transaction; make sure we read fresh values
+        conn.execute(text("SELECT pg_stat_clear_snapshot()"))
+        return conn.execute(text(
+            "SELECT xact_commit FROM pg_stat_database WHERE datname = current_database()"
+        )).scalar()
+
+
+async def conversation(client, run_id: str, index: int, turns: int, latencies: list):
+    """One user sending `turns` messages in sequence to its own channel"""
+    for turn in range(turns):
+        started = time.perf_counter()
+        response = await client.post("/bot/process", json={
+            "platform": "web",
+            "platform_message_id": f"bench_{run_id}_{index}_{turn}",
+            "platform_channel_id": f"bench_{run_id}_channel_{index}",
+            "platform_user_id": f"bench_{run_id}_user_{index}",
+            "message_text": f"Mensaje de prueba {turn}",
+            "user_name": f"Bench {index}",
+        })
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run_mode(args):
+    """Child process: serve the app, drive the load, print a JSON result"""
+    import httpx
+    from standins import StandInServer, agent_app
+
+    agent = StandInServer(agent_app(latency_ms=args.agent_latency_ms)).start()
+    os.environ["DIGITALOCEAN_API_URL"] = agent.url
+    os.environ.setdefault("DIGITALOCEAN_API_KEY", "bench")
+    os.environ.setdefault("DIGITALOCEAN_AGENT_ID", "bench")
+
+    from app.main import app
+    from app.database import engine
+    from app.services.write_behind import outbound_buffer
+
+    server = StandInServer(app).start()
+    run_id = f"{args.mode}_{int(time.time())}"
+    latencies = []
+
+    limits = httpx.Limits(max_connections=args.conversations)
+    async with httpx.AsyncClient(base_url=server.url, timeout=120.0, limits=limits) as client:
+        commits_before = xact_commits(engine)
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            conversation(client, run_id, i, args.turns, latencies)
+            for i in range(args.conversations)
+        ])
+        elapsed = time.perf_counter() - started
+        commits_after = xact_commits(engine)
+
+    buffer_stats = outbound_buffer.stats()
+    server.stop()
+    agent.stop()
+
+    print(json.dumps({
+        "mode": args.mode,
+        "turns": len(latencies),
+        "seconds": round(elapsed, 2),
+        "commits": commits_after - commits_before,
+        "commits_per_second": round((commits_after - commits_before) / elapsed, 1),
+        "turns_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "buffer": buffer_stats,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark outbound write-behind")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5, help="Messages per conversation")
+    parser.add_argument("--agent-latency-ms", type=float, default=100)
+    parser.add_argument("--mode", choices=["off", "on"], default=None,
+                        help="Run a single mode in this process (used internally)")
+    args = parser.parse_args()
+
+    if args.mode:
+        asyncio.run(run_mode(args))
+        return
+
+    results = []
+    for mode in ("off", "on"):
+        env = dict(os.environ, OUTBOUND_WRITE_BEHIND="true" if mode == "on" else "false")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode,
+             "--conversations", str(args.conversations), "--turns", str(args.turns),
+             "--agent-latency-ms", str(args.agent_latency_ms)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print()
+    print("=" * 80)
+    print(f"{args.conversations} concurrent conversations x {args.turns} turns, "
+          f"agent latency {args.agent_latency_ms:.0f} ms")
+    print("=" * 80)
+    print(f"{'Write-behind':<14} {'Commits':<10} {'Commits/s':<12} {'Turns/s':<10} "
+          f"{'p50 ms':<10} {'p99 ms'}")
+    for result in results:
+        print(
+            f"{result['mode']:<14} {result['commits']:<10} {result['commits_per_second']:<12} "
+            f"{result['turns_per_second']:<10} {result['p50_ms']:<10} {result['p99_ms']}"
+        )
+    print("=" * 80)
+    print(f"Buffer (on): {results[1]['buffer']}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Local stand-in servers for benchmarks and manual testing.
+
+Each stand-in is a small FastAPI app that mimics the slice of an external
+API the backend uses, served by uvicorn on 127.0.0.1 in a background thread:
+
+    agent = StandInServer(agent_app(latency_ms=80)).start()
+    os.environ["DIGITALOCEAN_API_URL"] = agent.url
+    ...
+    agent.stop()
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StandInServer:
+    """
+    Run an ASGI app with uvicorn in a background thread.
+    """
+
+    def __init__(self, app: FastAPI, port: Optional[int] = None):
+        self.app = app
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError(f"Stand-in server on port {self.port} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def agent_app(
+    latency_ms: float = 50,
+    jitter_ms: float = 0,
+    reply: str = "Respuesta de prueba",
+    concurrency: int = 0
+) -> FastAPI:
+    """
+    DigitalOcean agent stand-in: OpenAI-style chat completions after a delay.
+
+    Set app.state.failing = True to answer every chat with 503.
+
+    Args:
+        latency_ms: Base response latency
+        jitter_ms: Uniform random extra latency
+        reply: Text returned as the assistant message
+        concurrency: Requests served at once, the rest wait (0 = unlimited),
+            i.e. the agent's throughput ceiling
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.failing = False
+    slots = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def respond(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        if app.state.failing:
+            return JSONResponse({"error": "agent unavailable"}, status_code=503)
+        if slots is not None:
+            async with slots:
+                await asyncio.sleep((latency_ms + random.uniform(0, jitter_ms)) / 1000)
+        else:
+            await asyncio.sleep((latency_ms + random.uniform(0, jitter_ms)) / 1000)
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        return {
+            "choices": [{"message": {"role": "assistant", "content": reply}}],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(reply) // 4}
+        }
+
+    app.post("/ai/agents/{agent_id}/chat")(respond)
+    app.post("/api/v1/chat/completions")(respond)
+
+    @app.get("/ai/agents/{agent_id}")
+    async def agent_info(agent_id: str):
+        return {"agent": {"id": agent_id}}
+
+    return app
+
+
+def whapi_app(latency_ms: float = 20, throttle_every: int = 0, retry_after: float = 0.2) -> FastAPI:
+    """
+    Whapi stand-in: accepts outgoing text messages and records them.
+
+    Sent messages are kept in app.state.sent as (to, body, received_at).
+
+    Args:
+        latency_ms: Response latency of /messages/text
+        throttle_every: Answer every Nth send with 429 (0 disables)
+        retry_after: Retry-After seconds sent with each 429
+    """
+    app = FastAPI()
+    app.state.sent = []
+    app.state.requests = 0
+    app.state.throttled = 0
+
+    @app.post("/messages/text")
+    async def send_text(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        if throttle_every and app.state.requests % throttle_every == 0:
+            app.state.throttled += 1
+            return JSONResponse(
+                {"error": {"code": 429, "message": "Too many requests"}},
+                status_code=429, headers={"Retry-After": str(retry_after)}
+            )
+        app.state.sent.append((body["to"], body["body"], time.time()))
+        return {"sent": True, "message": {"id": f"standin-{len(app.state.sent)}"}}
+
+    @app.get("/health")
+    async def health():
+        return {"status": {"code": 4, "text": "AUTH"}}
+
+    return app
+
+
+def files_app(chunk_bytes: int = 256 * 1024) -> FastAPI:
+    """
+    File host stand-in (Slack url_private, Whapi media links).
+
+    GET /files/{name}?size=N streams N bytes derived from the name, so the
+    same name always yields the same content. With declare_length=false the
+    Content-Length header is omitted, forcing the size cap to apply mid-stream.
+
+    Args:
+        chunk_bytes: Size of each streamed chunk
+    """
+    app = FastAPI()
+
+    @app.get("/files/{name}")
+    async def serve(name: str, size: int, declare_length: bool = True):
+        block = (name.encode() * (chunk_bytes // max(len(name), 1) + 1))[:chunk_bytes]
+
+        async def body():
+            remaining = size
+            while remaining > 0:
+                chunk = block[:min(remaining, chunk_bytes)]
+                remaining -= len(chunk)
+                yield chunk
+
+        headers = {"Content-Length": str(size)} if declare_length else {}
+        return StreamingResponse(body(), media_type="application/octet-stream", headers=headers)
+
+    return app
+
+
+def slack_api_app(
+    latency_ms: float = 20,
+    channel_rate: float = 1.0,
+    channel_burst: float = 2.0,
+    retry_after: float = 1.0,
+    lookup_latency_ms: float = 100
+) -> FastAPI:
+    """
+    Slack Web API stand-in: chat.postMessage with Slack's per-channel limit,
+    plus auth.test, users.info and conversations.info.
+
+    Each channel gets a token bucket (`channel_rate` per second, bursts of
+    `channel_burst`); a post without a token is answered with 429 and
+    Retry-After, like Slack does. Accepted posts are kept in app.state.sent
+    as (channel, thread_ts, text, received_at). Lookup latency can be changed
+    per method at runtime through app.state.lookup_latency_ms.
+
+    Args:
+        latency_ms: Response latency of chat.postMessage
+        channel_rate: Posts per second allowed per channel
+        channel_burst: Burst size per channel
+        retry_after: Retry-After seconds sent with each 429
+        lookup_latency_ms: Response latency of the lookup methods
+    """
+    app = FastAPI()
+    app.state.sent = []
+    app.state.requests = 0
+    app.state.throttled = 0
+    app.state.lookup_latency_ms = {
+        "auth.test": lookup_latency_ms, "users.info": lookup_latency_ms, "conversations.info": lookup_latency_ms
+    }
+    buckets = {}
+
+    @app.post("/chat.postMessage")
+    async def post_message(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        channel = body["channel"]
+        now = time.monotonic()
+        tokens, updated = buckets.get(channel, (channel_burst, now))
+        tokens = min(channel_burst, tokens + (now - updated) * channel_rate)
+        if tokens < 1:
+            buckets[channel] = (tokens, now)
+            app.state.throttled += 1
+            return JSONResponse(
+                {"ok": False, "error": "ratelimited"},
+                status_code=429, headers={"Retry-After": str(retry_after)}
+            )
+        buckets[channel] = (tokens - 1, now)
+        app.state.sent.append((channel, body.get("thread_ts"), body["text"], time.time()))
+        return {"ok": True, "channel": channel, "ts": f"{time.time():.6f}"}
+
+    @app.post("/auth.test")
+    async def auth_test():
+        await asyncio.sleep(app.state.lookup_latency_ms["auth.test"] / 1000)
+        return {"ok": True, "user_id": "UBOT", "bot_id": "BBOT", "team": "Stand-in", "team_id": "T0001"}
+
+    async def argument(request: Request, name: str) -> str:
+        # The Slack SDK sends arguments in the query string or as a form
+        if name in request.query_params:
+            return request.query_params[name]
+        form = parse_qs((await request.body()).decode())
+        return form.get(name, [""])[0]
+
+    @app.api_route("/users.info", methods=["GET", "POST"])
+    async def users_info(request: Request):
+        user = await argument(request, "user")
+        await asyncio.sleep(app.state.lookup_latency_ms["users.info"] / 1000)
+        return {"ok": True, "user": {
+            "id": user, "name": user.lower(), "real_name": f"Usuario {user}",
+            "profile": {"email": f"{user.lower()}@example.com"}
+        }}
+
+    @app.api_route("/conversations.info", methods=["GET", "POST"])
+    async def conversations_info(request: Request):
+        channel = await argument(request, "channel")
+        await asyncio.sleep(app.state.lookup_latency_ms["conversations.info"] / 1000)
+        return {"ok": True, "channel": {"id": channel, "name": f"canal-{channel.lower()}"}}
+
+    return app
+
+
+class SlackSocketStandIn:
+    """
+    Slack Socket Mode stand-in: apps.connections.open plus a websocket
+    server that pushes envelopes and records their acks.
+
+    The websocket server runs on its own event loop in a background thread;
+    serve `standin.app` with StandInServer for apps.connections.open:
+
+        socket = SlackSocketStandIn().start()
+        api = StandInServer(socket.app).start()
+        os.environ["SLACK_API_BASE_URL"] = api.url
+        latency_ms = socket.push({"type": "event_callback", ...})
+    """
+
+    def __init__(self, port: Optional[int] = None):
+        import websockets
+
+        self._websockets = websockets
+        self.port = port or free_port()
+        self.ws_url = f"ws://127.0.0.1:{self.port}/link"
+        self.connections = []
+        self.opened = 0
+        self._next = 0
+        self._acks = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._server = None
+
+        self.app = FastAPI()
+
+        @self.app.post("/apps.connections.open")
+        async def connections_open(request: Request):
+            if not request.headers.get("Authorization", "").startswith("Bearer xapp-"):
+                return {"ok": False, "error": "invalid_auth"}
+            self.opened += 1
+            return {"ok": True, "url": self.ws_url}
+
+    async def _handler(self, ws, *args):
+        self.connections.append(ws)
+        await ws.send(json.dumps({"type": "hello", "num_connections": len(self.connections)}))
+        try:
+            async for raw in ws:
+                ack = json.loads(raw)
+                future = self._acks.pop(ack.get("envelope_id"), None)
+                if future is not None and not future.done():
+                    future.set_result(time.perf_counter())
+        finally:
+            self.connections.remove(ws)
+
+    def start(self) -> "SlackSocketStandIn":
+        """Start the websocket server."""
+        async def serve():
+            return await self._websockets.serve(self._handler, "127.0.0.1", self.port)
+
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(serve(), self._loop).result()
+        return self
+
+    def wait_for_connections(self, count: int, timeout: float = 10):
+        """Block until `count` clients are connected."""
+        deadline = time.time() + timeout
+        while len(self.connections) < count:
+            if time.time() > deadline:
+                raise RuntimeError(f"Only {len(self.connections)} of {count} Socket Mode connections opened")
+            time.sleep(0.01)
+
+    async def _push(self, payload: dict, envelope_type: str) -> float:
+        envelope_id = uuid.uuid4().hex
+        future = self._loop.create_future()
+        self._acks[envelope_id] = future
+        ws = self.connections[self._next % len(self.connections)]
+        self._next += 1
+        sent = time.perf_counter()
+        await ws.send(json.dumps({
+            "envelope_id": envelope_id, "type": envelope_type, "payload": payload,
+            "accepts_response_payload": False, "retry_attempt": 0, "retry_reason": "",
+        }))
+        acked = await asyncio.wait_for(future, 5)
+        return (acked - sent) * 1000
+
+    def push(self, payload: dict, envelope_type: str = "events_api") -> float:
+        """Send one envelope and wait for its ack; returns the ack latency in ms."""
+        return asyncio.run_coroutine_threadsafe(self._push(payload, envelope_type), self._loop).result()
+
+    def disconnect_all(self, reason: str = "refresh_requested"):
+        """Ask every client to reconnect, as Slack does when rotating links."""
+        async def send_all():
+            for ws in list(self.connections):
+                await ws.send(json.dumps({"type": "disconnect", "reason": reason}))
+        asyncio.run_coroutine_threadsafe(send_all(), self._loop).result()
+
+    def stop(self):
+        self._server.close()
+        asyncio.run_coroutine_threadsafe(self._server.wait_closed(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Script to maintain the monthly partitions of the messages table.
+
+Usage:
+    python manage_partitions.py                      # create upcoming partitions
+    python manage_partitions.py --list               # list partitions
+    python manage_partitions.py --retention 12       # drop partitions older than 12 months
+
+Retention detaches and drops whole partitions, so it never runs a bulk DELETE.
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from app.database import SessionLocal
+from app.services.partition_service import (
+    PartitionService,
+    PARTITION_MONTHS_AHEAD,
+    retention_cutoff
+)
+
+
+def list_partitions():
+    """List all partitions of the messages table"""
+    db = SessionLocal()
+
+    try:
+        partitions = PartitionService(db).list_partitions()
+
+        print()
+        print("=" * 80)
+        print(f"{'Partition':<24} {'Rows (est.)':<14} {'Bounds'}")
+        print("=" * 80)
+
+        for partition in partitions:
+            print(f"{partition['name']:<24} {partition['estimated_rows']:<14} {partition['bound']}")
+
+        print("=" * 80)
+        print()
+
+    finally:
+        db.close()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Manage messages table partitions")
+    parser.add_argument("--list", action="store_true", help="List partitions and exit")
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD,
+                        help="Future monthly partitions to create")
+    parser.add_argument("--retention", type=int, default=0,
+                        help="Months of messages to keep; older partitions are dropped")
+    parser.add_argument("--force", action="store_true", help="Skip the retention confirmation")
+    args = parser.parse_args()
+
+    if args.list:
+        list_partitions()
+        return
+
+    db = SessionLocal()
+
+    try:
+        service = PartitionService(db)
+
+        created = service.ensure_future_partitions(args.months_ahead)
+        print(f"✅ Partitions created: {created}")
+
+        if args.retention > 0:
+            cutoff = retention_cutoff(args.retention)
+            if not args.force:
+                answer = input(f"⚠️  Drop all partitions before {cutoff}? (yes/no): ").strip().lower()
+                if answer != "yes":
+                    print("❌ Retention cancelled")
+                    return
+
+            dropped = service.apply_retention(args.retention)
+            print(f"🗑️  Partitions dropped: {', '.join(dropped) if dropped else 'none'}")
+
+    except KeyboardInterrupt:
+        print()
+        print("❌ Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for BotDO.
+
+Applies database/migrations/NNN_name.sql files in order, each in its own
+transaction, and records them in the schema_migrations table.
+
+Usage:
+    python migrate.py              # apply pending migrations
+    python migrate.py --status     # show applied and pending migrations
+    python migrate.py --dir PATH   # use another migrations directory
+"""
+import sys
+import os
+import re
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from sqlalchemy import text
+
+from app.database import engine
+
+DEFAULT_MIGRATIONS_DIR = Path(__file__).parent.parent / "database" / "migrations"
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{3})_([a-z0-9_]+)\.sql$")
+
+
+def discover_migrations(migrations_dir: Path) -> List[Tuple[int, str, Path]]:
+    """
+    Find migration files ordered by version.
+
+    Args:
+        migrations_dir: Directory containing NNN_name.sql files
+
+    Returns:
+        List of (version, name, path)
+    """
+    migrations = []
+    for path in sorted(migrations_dir.iterdir()):
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), path.stem, path))
+    return migrations
+
+
+def ensure_migrations_table(conn):
+    """Create schema_migrations if this database predates it"""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum VARCHAR(64),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def applied_versions(conn) -> dict:
+    """Map of applied version -> name"""
+    rows = conn.execute(text("SELECT version, name FROM schema_migrations ORDER BY version"))
+    return {row.version: row.name for row in rows}
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--dir", type=Path, default=DEFAULT_MIGRATIONS_DIR,
+                        help="Migrations directory")
+    parser.add_argument("--status", action="store_true", help="Show migration status and exit")
+    args = parser.parse_args()
+
+    migrations = discover_migrations(args.dir)
+
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        applied = applied_versions(conn)
+
+    pending = [m for m in migrations if m[0] not in applied]
+
+    if args.status:
+        print()
+        for version, name, _ in migrations:
+            mark = "✓ applied" if version in applied else "… pending"
+            print(f"  {mark:<12} {name}")
+        print()
+        return
+
+    if not pending:
+        print("✅ Database schema is up to date")
+        return
+
+    for version, name, path in pending:
+        sql = path.read_text(encoding="utf-8")
+        checksum = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+
+        print(f"⏳ Applying {name}...")
+        try:
+            # One transaction per migration: the file and its bookkeeping row
+            # are committed together or not at all
+            with engine.begin() as conn:
+                # Raw DBAPI cursor without parameters, so '%' in plpgsql
+                # format() strings is not treated as a placeholder
+                cursor = conn.connection.cursor()
+                cursor.execute(sql)
+                cursor.close()
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name, checksum) "
+                         "VALUES (:version, :name, :checksum)"),
+                    {"version": version, "name": name, "checksum": checksum}
+                )
+        except Exception as e:
+            print(f"❌ Migration {name} failed: {str(e)}")
+            sys.exit(1)
+
+        print(f"✅ Applied {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,5 +8,6 @@ PORT=${PORT:-8000}
 echo "🚀 Starting FastAPI application on port $PORT"
 
 # Iniciar Uvicorn en el puerto correcto
-exec uvicorn app.main:app --host 0.0.0.0 --port $PORT --workers 2
+# WEB_CONCURRENCY también se usa para validar el presupuesto de conexiones (DB_MAX_CONNECTIONS)
+exec uvicorn app.main:app --host 0.0.0.0 --port $PORT --workers ${WEB_CONCURRENCY:-2}
 
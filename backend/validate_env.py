@@ -55,11 +55,42 @@ REQUIRED_VARS = [
 ]
 
 OPTIONAL_VARS = [
+    "DATABASE_REPLICA_URL",
+    "DATABASE_REPLICA_MAX_LAG_SECONDS",
+    "DB_MAX_CONNECTIONS",
+    "WEB_CONCURRENCY",
+    "SLOW_QUERY_LOG_ENABLED",
+    "SLOW_QUERY_MS",
     "DIGITALOCEAN_API_URL",
+    "DIGITALOCEAN_AGENT_ENDPOINTS",
+    "SUMMARY_ENABLED",
+    "MEMORY_ENABLED",
+    "TURN_MAX_CONCURRENCY",
     "WHAPI_CHANNEL_ID",
+    "SLACK_SOCKET_MODE",
+    "SLACK_POST_RATE_PER_MINUTE",
+    "SLACK_EVENT_RECORD_PATH",
+    "WHAPI_WEBHOOK_SECRET",
     "ENVIRONMENT",
     "LOG_LEVEL",
     "RATE_LIMIT_PER_MINUTE",
+    "ENABLED_CONNECTORS",
+]
+
+# Connector credentials are only required for connectors in ENABLED_CONNECTORS
+ENABLED_CONNECTORS = [
+    name.strip().lower()
+    for name in os.getenv("ENABLED_CONNECTORS", "slack,whapi").split(",")
+    if name.strip()
+]
+CONNECTOR_VAR_PREFIXES = {"slack": "SLACK_", "whapi": "WHAPI_"}
+REQUIRED_VARS = [
+    var_name for var_name in REQUIRED_VARS
+    if not any(
+        var_name.startswith(prefix)
+        for connector, prefix in CONNECTOR_VAR_PREFIXES.items()
+        if connector not in ENABLED_CONNECTORS
+    )
 ]
 
 
@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS admin_users (
     email VARCHAR(255) UNIQUE NOT NULL,
     hashed_password VARCHAR(255) NOT NULL,
     is_active BOOLEAN DEFAULT true,
+    token_version INTEGER NOT NULL DEFAULT 0, -- Embedded in JWTs as "ver"; bump to revoke tokens
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -55,48 +56,134 @@ CREATE TABLE IF NOT EXISTS channels (
 -- Table: messages (Main Table)
 -- Purpose: Unified message storage for all channels
 -- ============================================
+-- Partitioned by month on "timestamp" so time-filtered queries prune
+-- partitions and retention is a DETACH + DROP instead of a bulk DELETE.
+-- Unique constraints on a partitioned table must include the partition key,
+-- so message_id alone is not unique here: save_message serializes saves of
+-- the same message_id to keep duplicate deliveries out.
 CREATE TABLE IF NOT EXISTS messages (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    message_id VARCHAR(255) UNIQUE NOT NULL, -- Message ID from the platform
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    message_id VARCHAR(255) NOT NULL, -- Message ID from the platform
     channel VARCHAR(50) NOT NULL, -- Origin: 'slack', 'whatsapp', 'web'
     direction VARCHAR(20) NOT NULL, -- 'inbound' or 'outbound'
     sender_type VARCHAR(20) NOT NULL, -- 'bot' or 'user'
     user_id UUID REFERENCES users(id) ON DELETE SET NULL,
     channel_id UUID REFERENCES channels(id) ON DELETE SET NULL,
     message_text TEXT,
-    timestamp TIMESTAMP NOT NULL, -- Original message timestamp
+    timestamp TIMESTAMP NOT NULL, -- Original message timestamp (partition key)
     platform_metadata JSONB, -- Platform-specific data (thread_ts, message_type, etc.)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT messages_pkey PRIMARY KEY (id, timestamp),
+    CONSTRAINT unique_message_id_timestamp UNIQUE (message_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Catch-all for rows outside every monthly partition (should stay empty)
+CREATE TABLE IF NOT EXISTS messages_default PARTITION OF messages DEFAULT;
+
+-- ============================================
+-- Table: message_rollups_hourly
+-- Purpose: Hourly message counts for dashboards (/api/stats)
+-- Maintained incrementally on insert and by a catch-up job keyed on created_at
+-- ============================================
+CREATE TABLE IF NOT EXISTS message_rollups_hourly (
+    bucket TIMESTAMP NOT NULL, -- date_trunc('hour', messages.timestamp)
+    channel VARCHAR(50) NOT NULL,
+    direction VARCHAR(20) NOT NULL,
+    sender_type VARCHAR(20) NOT NULL,
+    channel_id UUID NOT NULL DEFAULT '00000000-0000-0000-0000-000000000000', -- zero UUID = no channel
+    message_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT message_rollups_hourly_pkey PRIMARY KEY (bucket, channel, direction, sender_type, channel_id)
+);
+
+-- ============================================
+-- Table: rollup_state
+-- Purpose: created_at watermark of the rollup catch-up job
+-- ============================================
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP NOT NULL,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- ============================================
--- Indexes for Performance
+-- Table: media
+-- Purpose: Content-addressed attachments (Slack files, WhatsApp media)
+-- Files live on disk under MEDIA_DIR at a path derived from their SHA-256;
+-- messages reference them from platform_metadata->'media'
+-- ============================================
+CREATE TABLE IF NOT EXISTS media (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    sha256 CHAR(64) NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    content_type VARCHAR(255),
+    storage_path VARCHAR(500) NOT NULL, -- relative to MEDIA_DIR
+    platform VARCHAR(50) NOT NULL, -- platform of the first upload
+    original_filename VARCHAR(500),
+    reference_count INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_media_sha256 UNIQUE (sha256)
+);
+
 -- ============================================
+-- Table: conversation_summaries
+-- Purpose: Rolling summary of the older turns of long conversations
+-- watermark is the timestamp of the newest message folded into the summary
+-- ============================================
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    channel_id UUID PRIMARY KEY REFERENCES channels(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL,
+    watermark TIMESTAMP NOT NULL, -- messages.timestamp of the newest summarized message
+    summarized_messages INTEGER NOT NULL DEFAULT 0,
+    summary_tokens INTEGER NOT NULL DEFAULT 0, -- estimated
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
--- Admin Users indexes
-CREATE INDEX IF NOT EXISTS idx_admin_users_username ON admin_users(username);
-CREATE INDEX IF NOT EXISTS idx_admin_users_email ON admin_users(email);
-CREATE INDEX IF NOT EXISTS idx_admin_users_is_active ON admin_users(is_active);
+-- ============================================
+-- Indexes for Performance
+-- ============================================
+-- Only indexes backed by an actual query. UNIQUE constraints already index
+-- admin_users(username), admin_users(email), users(platform, platform_user_id),
+-- channels(platform, channel_id), messages(message_id, timestamp) and media(sha256).
 
 -- Users indexes
-CREATE INDEX IF NOT EXISTS idx_users_platform ON users(platform);
-CREATE INDEX IF NOT EXISTS idx_users_platform_user_id ON users(platform, platform_user_id);
-CREATE INDEX IF NOT EXISTS idx_users_display_name ON users(display_name);
-
--- Channels indexes
-CREATE INDEX IF NOT EXISTS idx_channels_platform ON channels(platform);
-CREATE INDEX IF NOT EXISTS idx_channels_platform_channel_id ON channels(platform, channel_id);
-CREATE INDEX IF NOT EXISTS idx_channels_is_active ON channels(is_active);
+-- list_users: optional platform filter, newest first
+CREATE INDEX IF NOT EXISTS idx_users_platform_created_at ON users(platform, created_at DESC);
 
 -- Messages indexes
-CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages(channel);
-CREATE INDEX IF NOT EXISTS idx_messages_direction ON messages(direction);
-CREATE INDEX IF NOT EXISTS idx_messages_sender_type ON messages(sender_type);
+-- Conversation history, channel listings and archival: one channel, by time
+CREATE INDEX IF NOT EXISTS idx_messages_channel_id_timestamp ON messages(channel_id, timestamp DESC);
+-- list_messages: time range and ORDER BY timestamp DESC
 CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
-CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id);
-CREATE INDEX IF NOT EXISTS idx_messages_channel_id ON messages(channel_id);
-CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
+-- Per-user lookups and ON DELETE SET NULL from users; bot replies have no user
+CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id) WHERE user_id IS NOT NULL;
+-- Rollup catch-up scans by created_at, which follows insert order: BRIN is enough
+CREATE INDEX IF NOT EXISTS idx_messages_created_at_brin ON messages USING brin (created_at);
+
+-- ============================================
+-- Table: schema_migrations
+-- Purpose: Versioned migrations applied by backend/migrate.py
+-- ============================================
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum VARCHAR(64),
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- This script already includes every migration up to the current version
+INSERT INTO schema_migrations (version, name) VALUES
+    (1, '001_partition_messages'),
+    (2, '002_message_rollups'),
+    (3, '003_index_redesign'),
+    (4, '004_admin_token_version'),
+    (5, '005_media'),
+    (6, '006_conversation_summaries'),
+    (7, '007_partition_default_rows')
+ON CONFLICT (version) DO NOTHING;
 
 -- ============================================
 -- Triggers for updated_at Timestamps
@@ -132,6 +219,141 @@ CREATE TRIGGER update_messages_updated_at
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
+-- ============================================
+-- Admin Token Revocation
+-- ============================================
+
+-- Bump token_version when the password or active flag changes, which
+-- invalidates every token issued before, and notify API workers so they
+-- drop cached principals for that user (see app/services/principal_cache.py)
+CREATE OR REPLACE FUNCTION bump_admin_token_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.hashed_password IS DISTINCT FROM OLD.hashed_password
+       OR NEW.is_active IS DISTINCT FROM OLD.is_active THEN
+        NEW.token_version = OLD.token_version + 1;
+    END IF;
+    IF NEW.token_version IS DISTINCT FROM OLD.token_version
+       OR NEW.username IS DISTINCT FROM OLD.username THEN
+        PERFORM pg_notify('admin_token_revoked', OLD.username);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_admin_user_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('admin_token_revoked', OLD.username);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_admin_users_token_version ON admin_users;
+CREATE TRIGGER bump_admin_users_token_version
+    BEFORE UPDATE ON admin_users
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_admin_token_version();
+
+DROP TRIGGER IF EXISTS notify_admin_users_deleted ON admin_users;
+CREATE TRIGGER notify_admin_users_deleted
+    AFTER DELETE ON admin_users
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_admin_user_deleted();
+
+-- ============================================
+-- Messages Partition Management
+-- ============================================
+
+-- Create the monthly partition that contains p_month (no-op if it exists).
+-- Rows of that month already in messages_default (e.g. a future-dated
+-- message) would make CREATE ... PARTITION OF fail, so in that case the
+-- partition is created standalone, the rows are moved into it and it is
+-- attached, all in the caller's transaction.
+CREATE OR REPLACE FUNCTION create_messages_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := 'messages_' || to_char(v_start, 'YYYY_MM');
+    v_stray BOOLEAN := FALSE;
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+    IF to_regclass('messages_default') IS NOT NULL THEN
+        SELECT EXISTS (
+            SELECT 1 FROM messages_default WHERE timestamp >= v_start AND timestamp < v_end
+        ) INTO v_stray;
+    END IF;
+    IF NOT v_stray THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_start, v_end
+        );
+    ELSE
+        EXECUTE format('CREATE TABLE %I (LIKE messages INCLUDING DEFAULTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM messages_default WHERE timestamp >= %L AND timestamp < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved',
+            v_start, v_end, v_name
+        );
+        EXECUTE format(
+            'ALTER TABLE messages ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_start, v_end
+        );
+        RAISE NOTICE 'Moved rows of % from messages_default into %', v_start, v_name;
+    END IF;
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Make sure the current month and the next p_months_ahead months exist
+CREATE OR REPLACE FUNCTION ensure_messages_partitions(p_months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    v_month DATE;
+    v_created INTEGER := 0;
+BEGIN
+    FOR i IN 0..p_months_ahead LOOP
+        v_month := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::date;
+        IF to_regclass('messages_' || to_char(v_month, 'YYYY_MM')) IS NULL THEN
+            PERFORM create_messages_partition(v_month);
+            v_created := v_created + 1;
+        END IF;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach and drop every monthly partition that ends on or before p_cutoff.
+-- Each partition is removed as a whole, so the cost does not depend on row count.
+CREATE OR REPLACE FUNCTION drop_messages_partitions_before(p_cutoff DATE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT c.relname AS name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'messages'::regclass
+          AND c.relname ~ '^messages_[0-9]{4}_[0-9]{2}$'
+        ORDER BY c.relname
+    LOOP
+        IF (to_date(substr(r.name, 10), 'YYYY_MM') + INTERVAL '1 month')::date <= p_cutoff THEN
+            EXECUTE format('ALTER TABLE messages DETACH PARTITION %I', r.name);
+            EXECUTE format('DROP TABLE %I', r.name);
+            RETURN NEXT r.name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create the initial set of monthly partitions
+SELECT ensure_messages_partitions(3);
+
+
 -- ============================================
 -- Grant Permissions
 -- ============================================
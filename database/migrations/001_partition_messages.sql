@@ -0,0 +1,127 @@
+-- Migration 001: convert messages into a monthly range-partitioned table
+-- Applied by backend/migrate.py inside a single transaction.
+-- Existing rows are copied into monthly partitions covering their timestamps.
+
+ALTER TABLE messages RENAME TO messages_legacy;
+DROP TRIGGER IF EXISTS update_messages_updated_at ON messages_legacy;
+ALTER TABLE messages_legacy RENAME CONSTRAINT messages_pkey TO messages_legacy_pkey;
+
+DROP INDEX IF EXISTS idx_messages_channel;
+DROP INDEX IF EXISTS idx_messages_direction;
+DROP INDEX IF EXISTS idx_messages_sender_type;
+DROP INDEX IF EXISTS idx_messages_timestamp;
+DROP INDEX IF EXISTS idx_messages_user_id;
+DROP INDEX IF EXISTS idx_messages_channel_id;
+DROP INDEX IF EXISTS idx_messages_created_at;
+
+CREATE TABLE messages (
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    message_id VARCHAR(255) NOT NULL,
+    channel VARCHAR(50) NOT NULL,
+    direction VARCHAR(20) NOT NULL,
+    sender_type VARCHAR(20) NOT NULL,
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    channel_id UUID REFERENCES channels(id) ON DELETE SET NULL,
+    message_text TEXT,
+    timestamp TIMESTAMP NOT NULL,
+    platform_metadata JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT messages_pkey PRIMARY KEY (id, timestamp),
+    CONSTRAINT unique_message_id_timestamp UNIQUE (message_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE messages_default PARTITION OF messages DEFAULT;
+
+-- Create the monthly partition that contains p_month (no-op if it exists)
+CREATE OR REPLACE FUNCTION create_messages_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := 'messages_' || to_char(v_start, 'YYYY_MM');
+BEGIN
+    IF to_regclass(v_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_start, v_end
+        );
+    END IF;
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Make sure the current month and the next p_months_ahead months exist
+CREATE OR REPLACE FUNCTION ensure_messages_partitions(p_months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    v_month DATE;
+    v_created INTEGER := 0;
+BEGIN
+    FOR i IN 0..p_months_ahead LOOP
+        v_month := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::date;
+        IF to_regclass('messages_' || to_char(v_month, 'YYYY_MM')) IS NULL THEN
+            PERFORM create_messages_partition(v_month);
+            v_created := v_created + 1;
+        END IF;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach and drop every monthly partition that ends on or before p_cutoff.
+-- Each partition is removed as a whole, so the cost does not depend on row count.
+CREATE OR REPLACE FUNCTION drop_messages_partitions_before(p_cutoff DATE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT c.relname AS name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'messages'::regclass
+          AND c.relname ~ '^messages_[0-9]{4}_[0-9]{2}$'
+        ORDER BY c.relname
+    LOOP
+        IF (to_date(substr(r.name, 10), 'YYYY_MM') + INTERVAL '1 month')::date <= p_cutoff THEN
+            EXECUTE format('ALTER TABLE messages DETACH PARTITION %I', r.name);
+            EXECUTE format('DROP TABLE %I', r.name);
+            RETURN NEXT r.name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for every month that already holds data, plus the months ahead
+SELECT create_messages_partition(month::date)
+FROM generate_series(
+    (SELECT date_trunc('month', MIN(timestamp)) FROM messages_legacy),
+    (SELECT date_trunc('month', MAX(timestamp)) FROM messages_legacy),
+    INTERVAL '1 month'
+) AS month;
+SELECT ensure_messages_partitions(3);
+
+INSERT INTO messages (
+    id, message_id, channel, direction, sender_type, user_id, channel_id,
+    message_text, timestamp, platform_metadata, created_at, updated_at
+)
+SELECT
+    id, message_id, channel, direction, sender_type, user_id, channel_id,
+    message_text, timestamp, platform_metadata, created_at, updated_at
+FROM messages_legacy;
+
+CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages(channel);
+CREATE INDEX IF NOT EXISTS idx_messages_direction ON messages(direction);
+CREATE INDEX IF NOT EXISTS idx_messages_sender_type ON messages(sender_type);
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
+CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id);
+CREATE INDEX IF NOT EXISTS idx_messages_channel_id ON messages(channel_id);
+CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
+
+CREATE TRIGGER update_messages_updated_at
+    BEFORE UPDATE ON messages
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+DROP TABLE messages_legacy;
@@ -0,0 +1,32 @@
+-- Migration 002: hourly message rollups for /api/stats
+-- Applied by backend/migrate.py inside a single transaction.
+-- Creates the rollup tables and backfills them from the raw messages table.
+
+CREATE TABLE IF NOT EXISTS message_rollups_hourly (
+    bucket TIMESTAMP NOT NULL, -- date_trunc('hour', messages.timestamp)
+    channel VARCHAR(50) NOT NULL,
+    direction VARCHAR(20) NOT NULL,
+    sender_type VARCHAR(20) NOT NULL,
+    channel_id UUID NOT NULL DEFAULT '00000000-0000-0000-0000-000000000000', -- zero UUID = no channel
+    message_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT message_rollups_hourly_pkey PRIMARY KEY (bucket, channel, direction, sender_type, channel_id)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO message_rollups_hourly (bucket, channel, direction, sender_type, channel_id, message_count)
+SELECT date_trunc('hour', timestamp), channel, direction, sender_type,
+       COALESCE(channel_id, '00000000-0000-0000-0000-000000000000'), COUNT(*)
+FROM messages
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT ON CONSTRAINT message_rollups_hourly_pkey
+DO UPDATE SET message_count = EXCLUDED.message_count, updated_at = CURRENT_TIMESTAMP;
+
+INSERT INTO rollup_state (name, watermark)
+SELECT 'message_rollups_hourly', COALESCE(MAX(created_at), CURRENT_TIMESTAMP) FROM messages
+ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,53 @@
+-- Migration 003: replace single-column indexes with query-driven ones
+-- Applied by backend/migrate.py inside a single transaction.
+-- Every insert on the bot path maintained seven single-column indexes on
+-- messages plus duplicates of the UNIQUE constraints on users, channels and
+-- admin_users. benchmarks/bench_indexes.py measures the before/after cost.
+
+-- Duplicates of UNIQUE constraints or unused by any query
+DROP INDEX IF EXISTS idx_admin_users_username;
+DROP INDEX IF EXISTS idx_admin_users_email;
+DROP INDEX IF EXISTS idx_admin_users_is_active;
+
+DROP INDEX IF EXISTS idx_users_platform;
+DROP INDEX IF EXISTS idx_users_platform_user_id;
+DROP INDEX IF EXISTS idx_users_display_name;
+
+DROP INDEX IF EXISTS idx_channels_platform;
+DROP INDEX IF EXISTS idx_channels_platform_channel_id;
+DROP INDEX IF EXISTS idx_channels_is_active;
+
+DROP INDEX IF EXISTS idx_messages_channel;
+DROP INDEX IF EXISTS idx_messages_direction;
+DROP INDEX IF EXISTS idx_messages_sender_type;
+DROP INDEX IF EXISTS idx_messages_user_id;
+DROP INDEX IF EXISTS idx_messages_channel_id;
+DROP INDEX IF EXISTS idx_messages_created_at;
+
+-- Indexes created by SQLAlchemy (index=True) on databases built with init_db()
+DROP INDEX IF EXISTS ix_admin_users_username;
+DROP INDEX IF EXISTS ix_admin_users_email;
+DROP INDEX IF EXISTS ix_admin_users_is_active;
+DROP INDEX IF EXISTS ix_users_platform;
+DROP INDEX IF EXISTS ix_users_display_name;
+DROP INDEX IF EXISTS ix_channels_platform;
+DROP INDEX IF EXISTS ix_channels_is_active;
+DROP INDEX IF EXISTS ix_messages_channel;
+DROP INDEX IF EXISTS ix_messages_direction;
+DROP INDEX IF EXISTS ix_messages_sender_type;
+DROP INDEX IF EXISTS ix_messages_user_id;
+DROP INDEX IF EXISTS ix_messages_channel_id;
+DROP INDEX IF EXISTS ix_messages_timestamp;
+DROP INDEX IF EXISTS ix_messages_created_at;
+
+-- list_users: optional platform filter, newest first
+CREATE INDEX IF NOT EXISTS idx_users_platform_created_at ON users(platform, created_at DESC);
+
+-- Conversation history, channel listings and archival: one channel, by time
+CREATE INDEX IF NOT EXISTS idx_messages_channel_id_timestamp ON messages(channel_id, timestamp DESC);
+-- list_messages: time range and ORDER BY timestamp DESC (kept from the old set)
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
+-- Per-user lookups and ON DELETE SET NULL from users; bot replies have no user
+CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id) WHERE user_id IS NOT NULL;
+-- Rollup catch-up scans by created_at, which follows insert order: BRIN is enough
+CREATE INDEX IF NOT EXISTS idx_messages_created_at_brin ON messages USING brin (created_at);
@@ -0,0 +1,43 @@
+-- Migration 004: token version for admin JWT revocation
+-- Applied by backend/migrate.py inside a single transaction.
+-- Tokens carry the version as the "ver" claim; bumping it revokes them.
+
+ALTER TABLE admin_users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
+
+-- Bump token_version when the password or active flag changes, which
+-- invalidates every token issued before, and notify API workers so they
+-- drop cached principals for that user (see app/services/principal_cache.py)
+CREATE OR REPLACE FUNCTION bump_admin_token_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.hashed_password IS DISTINCT FROM OLD.hashed_password
+       OR NEW.is_active IS DISTINCT FROM OLD.is_active THEN
+        NEW.token_version = OLD.token_version + 1;
+    END IF;
+    IF NEW.token_version IS DISTINCT FROM OLD.token_version
+       OR NEW.username IS DISTINCT FROM OLD.username THEN
+        PERFORM pg_notify('admin_token_revoked', OLD.username);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_admin_user_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('admin_token_revoked', OLD.username);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_admin_users_token_version ON admin_users;
+CREATE TRIGGER bump_admin_users_token_version
+    BEFORE UPDATE ON admin_users
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_admin_token_version();
+
+DROP TRIGGER IF EXISTS notify_admin_users_deleted ON admin_users;
+CREATE TRIGGER notify_admin_users_deleted
+    AFTER DELETE ON admin_users
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_admin_user_deleted();
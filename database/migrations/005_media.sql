@@ -0,0 +1,18 @@
+-- Migration 005: content-addressed media for connector attachments
+-- Applied by backend/migrate.py inside a single transaction.
+-- Files live on disk under MEDIA_DIR at a path derived from their SHA-256;
+-- messages reference them from platform_metadata->'media'.
+
+CREATE TABLE IF NOT EXISTS media (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    sha256 CHAR(64) NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    content_type VARCHAR(255),
+    storage_path VARCHAR(500) NOT NULL, -- relative to MEDIA_DIR
+    platform VARCHAR(50) NOT NULL, -- platform of the first upload
+    original_filename VARCHAR(500),
+    reference_count INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_media_sha256 UNIQUE (sha256)
+);
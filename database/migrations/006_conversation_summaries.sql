@@ -0,0 +1,15 @@
+-- Migration 006: rolling conversation summaries
+-- Applied by backend/migrate.py inside a single transaction.
+-- The background summarizer folds the older turns of long conversations into
+-- one summary per channel; watermark is the timestamp of the newest message
+-- already folded in, so updates only read the messages after it.
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    channel_id UUID PRIMARY KEY REFERENCES channels(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL,
+    watermark TIMESTAMP NOT NULL, -- messages.timestamp of the newest summarized message
+    summarized_messages INTEGER NOT NULL DEFAULT 0,
+    summary_tokens INTEGER NOT NULL DEFAULT 0, -- estimated
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,48 @@
+-- Migration 007: partition creation tolerates rows in messages_default
+-- Applied by backend/migrate.py inside a single transaction.
+-- A message stored before its month's partition existed lands in the DEFAULT
+-- partition, and Postgres then refuses to create that month's partition.
+-- create_messages_partition now moves those rows into the new partition.
+
+-- Create the monthly partition that contains p_month (no-op if it exists).
+-- Rows of that month already in messages_default (e.g. a future-dated
+-- message) would make CREATE ... PARTITION OF fail, so in that case the
+-- partition is created standalone, the rows are moved into it and it is
+-- attached, all in the caller's transaction.
+CREATE OR REPLACE FUNCTION create_messages_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_end DATE := (date_trunc('month', p_month) + INTERVAL '1 month')::date;
+    v_name TEXT := 'messages_' || to_char(v_start, 'YYYY_MM');
+    v_stray BOOLEAN := FALSE;
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+    IF to_regclass('messages_default') IS NOT NULL THEN
+        SELECT EXISTS (
+            SELECT 1 FROM messages_default WHERE timestamp >= v_start AND timestamp < v_end
+        ) INTO v_stray;
+    END IF;
+    IF NOT v_stray THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_start, v_end
+        );
+    ELSE
+        EXECUTE format('CREATE TABLE %I (LIKE messages INCLUDING DEFAULTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM messages_default WHERE timestamp >= %L AND timestamp < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved',
+            v_start, v_end, v_name
+        );
+        EXECUTE format(
+            'ALTER TABLE messages ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_start, v_end
+        );
+        RAISE NOTICE 'Moved rows of % from messages_default into %', v_start, v_name;
+    END IF;
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql;